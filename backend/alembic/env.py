@@ -20,7 +20,7 @@ fileConfig(config.config_file_name)
 # add your model's MetaData object here
 # for 'autogenerate' support
 from app.db.session import Base
-from app.models import defect, user
+from app.models import defect, defect_statistics, rollup, user
 
 target_metadata = Base.metadata
 
@@ -0,0 +1,24 @@
+"""Add defects (reported_at, id) index
+
+Revision ID: 5b7c3e1f2a94
+Revises: ce90a279e572
+Create Date: 2026-10-17 11:03:27.640193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7c3e1f2a94'
+down_revision = 'ce90a279e572'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_defects_reported_at_id', 'defects', ['reported_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_defects_reported_at_id', table_name='defects')
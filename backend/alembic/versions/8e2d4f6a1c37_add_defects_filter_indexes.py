@@ -0,0 +1,28 @@
+"""Add defects filter indexes
+
+Revision ID: 8e2d4f6a1c37
+Revises: 5b7c3e1f2a94
+Create Date: 2026-10-17 12:21:54.118406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e2d4f6a1c37'
+down_revision = '5b7c3e1f2a94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_defects_type_severity_reported_at', 'defects', ['defect_type', 'severity', 'reported_at'], unique=False)
+    op.create_index('ix_defects_type_reported_at', 'defects', ['defect_type', 'reported_at'], unique=False)
+    op.create_index('ix_defects_severity_reported_at', 'defects', ['severity', 'reported_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_defects_severity_reported_at', table_name='defects')
+    op.drop_index('ix_defects_type_reported_at', table_name='defects')
+    op.drop_index('ix_defects_type_severity_reported_at', table_name='defects')
@@ -0,0 +1,35 @@
+"""Add defect statistics
+
+Revision ID: a3f19c0d7b52
+Revises: 8e2d4f6a1c37
+Create Date: 2026-10-17 15:02:37.604118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f19c0d7b52'
+down_revision = '8e2d4f6a1c37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('defect_statistics',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('statistics', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('date')
+    )
+    op.create_index(op.f('ix_defect_statistics_id'), 'defect_statistics', ['id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_defect_statistics_id'), table_name='defect_statistics')
+    op.drop_table('defect_statistics')
@@ -0,0 +1,28 @@
+"""Add defects dedup key
+
+Revision ID: c61e8b2d4f90
+Revises: a3f19c0d7b52
+Create Date: 2026-10-17 16:40:12.381905
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c61e8b2d4f90'
+down_revision = 'a3f19c0d7b52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows keep a NULL key: duplicates already in the table are not
+    # touched, only new uploads are deduplicated
+    op.add_column('defects', sa.Column('dedup_key', sa.String(length=40), nullable=True))
+    op.create_index('ix_defects_dedup_key', 'defects', ['dedup_key'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_defects_dedup_key', table_name='defects')
+    op.drop_column('defects', 'dedup_key')
@@ -0,0 +1,93 @@
+"""Add defect daily rollups
+
+Revision ID: ce90a279e572
+Revises: 1d045270acb2
+Create Date: 2026-10-17 09:12:41.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'ce90a279e572'
+down_revision = '1d045270acb2'
+branch_labels = None
+depends_on = None
+
+
+# Rollup key expressions over a defects row set; the cell scale must match
+# app.models.rollup.ROLLUP_CELL_SCALE
+ROLLUP_SELECT = """
+    SELECT (reported_at AT TIME ZONE 'UTC')::date,
+           defect_type,
+           severity,
+           round(latitude * 1000)::integer,
+           round(longitude * 1000)::integer,
+           {sign}count(*)
+    FROM {source}
+    WHERE reported_at IS NOT NULL
+    GROUP BY 1, 2, 3, 4, 5
+"""
+
+ROLLUP_UPSERT = """
+    INSERT INTO defect_daily_rollups AS r (day, defect_type, severity, lat_cell, lng_cell, defect_count)
+    {select}
+    ON CONFLICT (day, defect_type, severity, lat_cell, lng_cell)
+    DO UPDATE SET defect_count = r.defect_count + EXCLUDED.defect_count;
+"""
+
+# Statement-level trigger function: each INSERT/UPDATE/DELETE statement on
+# defects applies its transition tables to the rollups in one grouped upsert
+APPLY_FUNCTION = """
+CREATE OR REPLACE FUNCTION defect_rollups_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        {remove}
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        {add}
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+""".format(
+    remove=ROLLUP_UPSERT.format(select=ROLLUP_SELECT.format(sign="-", source="old_rows")),
+    add=ROLLUP_UPSERT.format(select=ROLLUP_SELECT.format(sign="", source="new_rows")),
+)
+
+TRIGGERS = {
+    "defects_rollup_insert": "AFTER INSERT ON defects REFERENCING NEW TABLE AS new_rows",
+    "defects_rollup_update": "AFTER UPDATE ON defects REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "defects_rollup_delete": "AFTER DELETE ON defects REFERENCING OLD TABLE AS old_rows",
+}
+
+
+def upgrade():
+    op.create_table('defect_daily_rollups',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('defect_type', postgresql.ENUM('POTHOLE', 'CRACK', 'DAMAGED_PAVEMENT', 'WATER_LOGGING', 'MISSING_MANHOLE', 'OTHER', name='defecttype', create_type=False), nullable=False),
+    sa.Column('severity', postgresql.ENUM('LOW', 'MEDIUM', 'HIGH', 'CRITICAL', name='severitylevel', create_type=False), nullable=False),
+    sa.Column('lat_cell', sa.Integer(), nullable=False),
+    sa.Column('lng_cell', sa.Integer(), nullable=False),
+    sa.Column('defect_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'defect_type', 'severity', 'lat_cell', 'lng_cell')
+    )
+
+    # Backfill from existing defects before the triggers start tracking changes
+    op.execute(
+        "INSERT INTO defect_daily_rollups (day, defect_type, severity, lat_cell, lng_cell, defect_count)"
+        + ROLLUP_SELECT.format(sign="", source="defects")
+    )
+
+    op.execute(APPLY_FUNCTION)
+    for name, timing in TRIGGERS.items():
+        op.execute(f"CREATE TRIGGER {name} {timing} FOR EACH STATEMENT EXECUTE FUNCTION defect_rollups_apply()")
+
+
+def downgrade():
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON defects")
+    op.execute("DROP FUNCTION IF EXISTS defect_rollups_apply()")
+    op.drop_table('defect_daily_rollups')
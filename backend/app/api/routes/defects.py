@@ -1,79 +1,156 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, File, UploadFile
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, File, Request, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, select
+from sqlalchemy.dialects.postgresql import insert
 from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import json
-from geoalchemy2.functions import ST_MakePoint, ST_SetSRID, ST_Distance, ST_GeogFromText
+from geoalchemy2.functions import ST_MakePoint, ST_SetSRID
 
-from app.db.session import get_db
+from app.core.config import settings
+from app.core.http_cache import VERSION_ETAG, http_cache
+from app.core.request_metrics import TimedJSONResponse
+from app.db.session import get_async_db, get_db
 from app.models.defect import Defect as DefectModel, DefectType, SeverityLevel
+from app.models.rollup import DefectDailyRollup, ROLLUP_CELL_SCALE
 from app.schemas.defect import (
     Defect, 
     DefectCreate, 
     DefectUpdate, 
     DefectUploadPayload,
-    DefectStatistics
+    DefectStatistics,
+    DensityBatchRequest
 )
+from app.services.bulk_ingest import DEFECT_TYPE_MAPPING, InsertMethod, dedup_key
+from app.services.cache import cached_json_response, invalidate_cache
+from app.services.defect_fields import InvalidFields, field_columns, parse_fields, rows_to_dicts
+from app.services.density import density_counts
+from app.services.export import (
+    EXPORT_MEDIA_TYPES,
+    ExportFormat,
+    ExportUnavailable,
+    check_format_available,
+    export_defects
+)
+from app.services.filters import defect_filters
+from app.services.heatmap import (
+    can_use_rollups,
+    cell_size_for_zoom,
+    heatmap_grid,
+    heatmap_points,
+    rollup_heatmap_grid
+)
+from app.services.pagination import (
+    DEFECT_ORDER,
+    InvalidCursor,
+    after_cursor,
+    decode_cursor,
+    encode_cursor,
+    estimate_count
+)
+from app.services.point_feed import (
+    POINT_FEED_MEDIA_TYPE,
+    PointFeedUnavailable,
+    build_point_feed,
+    check_point_feed_available
+)
+from app.services.rollups import rollup_hotspots, rollups_enabled
+from app.services.spatial import bbox_filter
+from app.services.statistics import compute_defect_statistics
+from app.services.tiles import render_tile, valid_tile
+from app.services.upload_stream import StreamParseError, UploadFormat, detect_format, ingest_upload
 
 # Create API router for defect-related endpoints
 router = APIRouter()
 
-@router.get("/", response_model=List[Defect])
-def get_defects(
-    db: Session = Depends(get_db),
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+@router.get("/", response_model=List[Defect], dependencies=[Depends(http_cache(settings.HTTP_CACHE_MAX_AGE))])
+async def get_defects(
+    db: AsyncSession = Depends(get_async_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     defect_type: Optional[DefectType] = None,
     severity: Optional[SeverityLevel] = None,
     lat_min: Optional[float] = None,
     lat_max: Optional[float] = None,
     lng_min: Optional[float] = None,
-    lng_max: Optional[float] = None
+    lng_max: Optional[float] = None,
+    fields: Optional[str] = None
 ):
     """
     Retrieve all road defects with optional filtering.
     
+    Results are ordered newest first by (reported_at, id).
+    
     Parameters:
-    - skip: Number of records to skip for pagination
+    - skip: Number of records to skip for offset pagination
     - limit: Maximum number of records to return
+    - cursor: Opaque cursor from a previous page's X-Next-Cursor header;
+      when given, skip is ignored and the page starts right after it
     - defect_type: Filter by defect type (pothole, crack, etc.)
     - severity: Filter by severity level
     - lat_min, lat_max, lng_min, lng_max: Geographic bounding box filters
+    - fields: Comma-separated fields to return (e.g. id,latitude,longitude,severity
+      for map markers); all fields if omitted
     
     Returns a list of defect objects that match the filter criteria.
+    X-Next-Cursor is set when a full page was returned, and X-Total-Count
+    carries a planner estimate of the number of matching defects.
     """
+    position = None
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
     try:
-        # Start with base query for all defects
-        query = db.query(DefectModel)
-        
-        # Apply filters if provided
-        if defect_type:
-            query = query.filter(DefectModel.defect_type == defect_type)
-        if severity:
-            query = query.filter(DefectModel.severity == severity)
-        
-        # Apply bounding box filter if provided
-        # This allows filtering defects within a specific geographic area
-        if all([lat_min, lat_max, lng_min, lng_max]):
-            query = query.filter(
-                DefectModel.latitude >= lat_min,
-                DefectModel.latitude <= lat_max,
-                DefectModel.longitude >= lng_min,
-                DefectModel.longitude <= lng_max
-            )
-        
-        # Return paginated results
-        return query.offset(skip).limit(limit).all()
-    except Exception as e:
-        # Log any errors for debugging
-        print(e)
+        names = parse_fields(fields)
+    except InvalidFields as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    filters = defect_filters(defect_type, severity, lat_min, lat_max, lng_min, lng_max)
+    
+    # Estimate the total before pagination narrows the query
+    headers = {
+        "X-Total-Count": str(await db.run_sync(estimate_count, select(DefectModel.id).where(*filters)))
+    }
+    
+    # Read only the requested columns as plain tuples, plus the
+    # (reported_at, id) position used for the next cursor, filtered by
+    # type, severity and bounding box (answered from the GiST index on location)
+    query = select(
+        *field_columns(names),
+        DefectModel.reported_at.label("cursor_reported_at"),
+        DefectModel.id.label("cursor_id")
+    ).where(*filters)
+    
+    # Keyset pagination seeks past the cursor; offset mode is kept for
+    # existing clients but uses the same stable order
+    query = query.order_by(*DEFECT_ORDER)
+    if position:
+        query = query.where(after_cursor(*position))
+    else:
+        query = query.offset(skip)
+    rows = (await db.execute(query.limit(limit))).all()
+    
+    if rows and len(rows) == limit:
+        headers["X-Next-Cursor"] = encode_cursor(rows[-1].cursor_reported_at, rows[-1].cursor_id)
+    
+    # Rows are trusted database values: encode them directly instead of
+    # validating each one against the response model, which only documents
+    # the full row shape (a sparse fieldset returns a subset of it)
+    return TimedJSONResponse(rows_to_dicts(rows, names), headers=headers)
 
 
 @router.post("/", response_model=Defect)
-def create_defect(
+async def create_defect(
     defect: DefectCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new road defect report.
@@ -100,14 +177,114 @@ def create_defect(
     
     # Add to database, commit the transaction, and refresh to get generated values
     db.add(db_defect)
-    db.commit()
-    db.refresh(db_defect)
+    await db.commit()
+    await db.refresh(db_defect)
+    await invalidate_cache()
     return db_defect
 
-@router.get("/{defect_id}", response_model=Defect)
-def get_defect(
+@router.get("/tiles/{z}/{x}/{y}.mvt", dependencies=[Depends(http_cache(settings.TILE_CACHE_MAX_AGE))])
+async def get_defect_tile(
+    z: int,
+    x: int,
+    y: int,
+    db: AsyncSession = Depends(get_async_db),
+    defect_type: Optional[DefectType] = None,
+    severity: Optional[SeverityLevel] = None
+):
+    """
+    Get defects as a Mapbox Vector Tile for the map.
+    
+    Parameters:
+    - z, x, y: Slippy-map tile coordinates
+    - defect_type: Filter by defect type (pothole, crack, etc.)
+    - severity: Filter by severity level
+    
+    The tile has a single "defects" layer. At low zooms nearby defects are
+    merged into cluster features with a point_count and their worst severity;
+    at high zooms each defect is a feature with its id, type, severity and
+    reported_at (epoch seconds). Responses carry an ETag and are cached
+    for TILE_CACHE_MAX_AGE seconds; If-None-Match is answered with 304 Not
+    Modified (see http_cache).
+    """
+    if not valid_tile(z, x, y):
+        raise HTTPException(status_code=400, detail="Invalid tile coordinates")
+    
+    tile = await db.run_sync(render_tile, z, x, y, defect_type, severity)
+    return Response(content=tile, media_type=MVT_MEDIA_TYPE)
+
+@router.get("/export")
+def export_defects_data(
+    export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+    defect_type: Optional[DefectType] = None,
+    severity: Optional[SeverityLevel] = None,
+    lat_min: Optional[float] = None,
+    lat_max: Optional[float] = None,
+    lng_min: Optional[float] = None,
+    lng_max: Optional[float] = None
+):
+    """
+    Export defects as a streamed file for bulk extracts.
+    
+    Parameters:
+    - format: csv, ndjson, geojson or parquet
+    - defect_type, severity, lat_min, lat_max, lng_min, lng_max: Same filters as GET /api/defects
+    
+    Rows are ordered by id and streamed from a server-side cursor, so
+    extracts of any size are produced in constant memory. Parquet export
+    requires pyarrow.
+    """
+    try:
+        check_format_available(export_format)
+    except ExportUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    
+    filters = defect_filters(defect_type, severity, lat_min, lat_max, lng_min, lng_max)
+    filename = f"defects-{datetime.utcnow():%Y%m%dT%H%M%SZ}.{export_format.value}"
+    return StreamingResponse(
+        export_defects(export_format, filters),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/points", dependencies=[Depends(http_cache(settings.HTTP_CACHE_MAX_AGE))])
+def get_defect_points(
+    db: Session = Depends(get_db),
+    defect_type: Optional[DefectType] = None,
+    severity: Optional[SeverityLevel] = None,
+    lat_min: Optional[float] = None,
+    lat_max: Optional[float] = None,
+    lng_min: Optional[float] = None,
+    lng_max: Optional[float] = None,
+    limit: Optional[int] = Query(None, ge=1)
+):
+    """
+    Get defects as a compact binary columnar feed for rendering on the map.
+    
+    Parameters:
+    - defect_type, severity, lat_min, lat_max, lng_min, lng_max: Same filters as GET /api/defects
+    - limit: Most points to return, newest first (capped at POINT_FEED_MAX_POINTS)
+    
+    The payload packs float32 latitudes and longitudes, uint32 epoch seconds
+    and uint8 type and severity codes, 14 bytes per point; the layout is
+    documented in app.services.point_feed; like other responses it is brotli
+    or gzip compressed when the client accepts it. X-Point-Count holds the
+    number of points.
+    Requires numpy.
+    """
+    try:
+        check_point_feed_available()
+    except PointFeedUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    
+    limit = min(limit or settings.POINT_FEED_MAX_POINTS, settings.POINT_FEED_MAX_POINTS)
+    filters = defect_filters(defect_type, severity, lat_min, lat_max, lng_min, lng_max)
+    payload, count = build_point_feed(db, filters, limit)
+    return Response(content=payload, media_type=POINT_FEED_MEDIA_TYPE, headers={"X-Point-Count": str(count)})
+
+@router.get("/{defect_id}", response_model=Defect, dependencies=[Depends(http_cache(settings.HTTP_CACHE_MAX_AGE))])
+async def get_defect(
     defect_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a specific road defect by ID.
@@ -118,17 +295,17 @@ def get_defect(
     Returns the defect object if found, or raises a 404 error if not found.
     """
     # Query the database for the defect with the specified ID
-    defect = db.query(DefectModel).filter(DefectModel.id == defect_id).first()
+    defect = await db.get(DefectModel, defect_id)
     if not defect:
         # If no defect is found with that ID, raise a 404 error
         raise HTTPException(status_code=404, detail="Defect not found")
     return defect
 
 @router.put("/{defect_id}", response_model=Defect)
-def update_defect(
+async def update_defect(
     defect_id: int,
     defect_update: DefectUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update an existing road defect.
@@ -140,7 +317,7 @@ def update_defect(
     Only provided fields will be updated. Returns the updated defect object.
     """
     # Find the defect to update
-    db_defect = db.query(DefectModel).filter(DefectModel.id == defect_id).first()
+    db_defect = await db.get(DefectModel, defect_id)
     if not db_defect:
         raise HTTPException(status_code=404, detail="Defect not found")
     
@@ -151,14 +328,15 @@ def update_defect(
         setattr(db_defect, field, value)
     
     # Commit changes to database and refresh the object
-    db.commit()
-    db.refresh(db_defect)
+    await db.commit()
+    await db.refresh(db_defect)
+    await invalidate_cache()
     return db_defect
 
 @router.delete("/{defect_id}")
-def delete_defect(
+async def delete_defect(
     defect_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a road defect.
@@ -169,19 +347,23 @@ def delete_defect(
     Returns a success message if the defect was deleted.
     """
     # Find the defect to delete
-    db_defect = db.query(DefectModel).filter(DefectModel.id == defect_id).first()
+    db_defect = await db.get(DefectModel, defect_id)
     if not db_defect:
         raise HTTPException(status_code=404, detail="Defect not found")
     
     # Delete the defect and commit the transaction
-    db.delete(db_defect)
-    db.commit()
+    await db.delete(db_defect)
+    await db.commit()
+    await invalidate_cache()
     return {"success": True}
 
 @router.post("/upload", response_model=Defect)
-def upload_defect_data(
+async def upload_defect_data(
     payload: DefectUploadPayload,
-    db: Session = Depends(get_db)
+    response: Response,
+    dedup: Optional[bool] = None,
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Upload road defect data from external source.
@@ -193,53 +375,65 @@ def upload_defect_data(
     - defect_type: String description of defect type
     - severity: Optional severity level
     - notes: Optional additional information
+    - idempotency_key: Optional client key for the upload (or the Idempotency-Key header)
+    
+    With dedup (default from settings) a detection that was already uploaded,
+    with the same idempotency key or the same vehicle, timestamp and
+    coordinates, is not stored again: the existing defect is returned with
+    an Idempotent-Replayed: true header.
     
     Returns the created defect object.
     """
     # Extract coordinates from the payload
     lat, lng = payload.coordinates
     
-    # Map external defect type to internal enum
+    # Map external defect type to internal enum, defaulting to OTHER if not found
     # This allows for flexible input while maintaining data consistency
-    defect_type_mapping = {
-        "minor pothole": DefectType.POTHOLE,
-        "pothole": DefectType.POTHOLE,
-        "crack": DefectType.CRACK,
-        "damaged pavement": DefectType.DAMAGED_PAVEMENT,
-        "water logging": DefectType.WATER_LOGGING,
-        "missing manhole": DefectType.MISSING_MANHOLE
-    }
-    
-    # Get the mapped defect type or default to OTHER if not found
-    defect_type = defect_type_mapping.get(payload.defect_type.lower(), DefectType.OTHER)
-    
-    # Create defect with geographic point data
-    db_defect = DefectModel(
-        vehicle_id=payload.vehicle_id,
-        defect_type=defect_type,
-        severity=payload.severity,
-        latitude=lat,
-        longitude=lng,
-        location=ST_SetSRID(ST_MakePoint(lng, lat), 4326),
-        notes=payload.notes,
-        reported_at=payload.timestamp
+    defect_type = DEFECT_TYPE_MAPPING.get(payload.defect_type.lower(), DefectType.OTHER)
+    
+    key = None
+    if settings.INGEST_DEDUP if dedup is None else dedup:
+        key = dedup_key(payload.vehicle_id, payload.timestamp, lat, lng, idempotency_key or payload.idempotency_key)
+    
+    # Insert with geographic point data; a row with the same dedup key is left as is
+    result = await db.execute(
+        insert(DefectModel).values(
+            vehicle_id=payload.vehicle_id,
+            defect_type=defect_type,
+            severity=payload.severity,
+            latitude=lat,
+            longitude=lng,
+            location=ST_SetSRID(ST_MakePoint(lng, lat), 4326),
+            notes=payload.notes,
+            reported_at=payload.timestamp,
+            dedup_key=key
+        ).on_conflict_do_nothing(index_elements=["dedup_key"]).returning(DefectModel.id)
     )
+    defect_id = result.scalar()
+    await db.commit()
     
-    # Add to database, commit the transaction, and refresh to get generated values
-    db.add(db_defect)
-    db.commit()
-    db.refresh(db_defect)
-    return db_defect
+    if defect_id is None:
+        response.headers["Idempotent-Replayed"] = "true"
+        return (await db.execute(select(DefectModel).where(DefectModel.dedup_key == key))).scalar_one()
+    
+    await invalidate_cache()
+    return await db.get(DefectModel, defect_id)
 
 @router.post("/upload/bulk", response_model=Dict[str, Any])
 async def upload_bulk_defect_data(
     file: UploadFile = File(...),
+    upload_format: Optional[UploadFormat] = Query(None, alias="format"),
+    stream: bool = False,
+    chunk_size: Optional[int] = Query(None, gt=0, le=50000),
+    method: Optional[InsertMethod] = None,
+    dedup: Optional[bool] = None,
     db: Session = Depends(get_db)
 ):
     """
-    Upload multiple road defect data entries from a JSON file.
+    Upload multiple road defect data entries from a JSON or NDJSON file.
     
-    The JSON file should contain an array of objects with the following structure:
+    A JSON file should contain an array of objects with the following structure,
+    an NDJSON file one such object per line:
     [
         {
             "vehicle_id": "string",
@@ -247,222 +441,176 @@ async def upload_bulk_defect_data(
             "coordinates": [latitude, longitude],
             "defect_type": "string",
             "severity": "low|medium|high|critical" (optional, defaults to medium),
-            "notes": "string" (optional)
+            "notes": "string" (optional),
+            "idempotency_key": "string" (optional)
         },
         ...
     ]
     
-    Returns a summary of the upload operation, including success count and any errors.
+    Parameters:
+    - format: "json" or "ndjson" (detected from the file name, content type or first byte if omitted)
+    - stream: Parse a JSON array incrementally instead of loading it whole (NDJSON is always streamed)
+    - chunk_size: Entries validated and written per chunk (default from settings)
+    - method: "values" for multi-row INSERT or "copy" for PostgreSQL COPY
+    - dedup: Skip entries already stored, matched by idempotency_key or by
+      vehicle, timestamp and rounded coordinates (default from settings)
+    
+    Entries are written in chunks, each committed on its own. Returns a summary
+    of the upload operation, including success count, duplicates skipped, any
+    per-entry errors, per-chunk progress and throughput/peak memory stats.
     """
-    # Map external defect type to internal enum
-    defect_type_mapping = {
-        "minor pothole": DefectType.POTHOLE,
-        "pothole": DefectType.POTHOLE,
-        "crack": DefectType.CRACK,
-        "damaged pavement": DefectType.DAMAGED_PAVEMENT,
-        "water logging": DefectType.WATER_LOGGING,
-        "missing manhole": DefectType.MISSING_MANHOLE
-    }
-    
-    # Read and parse JSON file
     try:
-        # Read the uploaded file content
-        contents = await file.read()
-        data = json.loads(contents)
-        
-        # Validate that the file contains an array of defect objects
-        if not isinstance(data, list):
-            raise HTTPException(status_code=400, detail="JSON file must contain an array of defect objects")
-        
-        # Process each defect entry
-        success_count = 0
-        failed_entries = []
-        
-        for idx, entry in enumerate(data):
-            try:
-                # Validate required fields are present
-                if not all(k in entry for k in ["vehicle_id", "timestamp", "coordinates", "defect_type"]):
-                    failed_entries.append({
-                        "index": idx,
-                        "error": "Missing required fields"
-                    })
-                    continue
-                
-                # Parse timestamp from ISO format
-                try:
-                    timestamp = datetime.fromisoformat(entry["timestamp"].replace("Z", "+00:00"))
-                except (ValueError, TypeError):
-                    failed_entries.append({
-                        "index": idx,
-                        "error": "Invalid timestamp format"
-                    })
-                    continue
-                
-                # Validate coordinates format and range
-                coordinates = entry["coordinates"]
-                if not isinstance(coordinates, list) or len(coordinates) != 2:
-                    failed_entries.append({
-                        "index": idx,
-                        "error": "Coordinates must be [latitude, longitude]"
-                    })
-                    continue
-                
-                lat, lng = coordinates
-                if not (-90 <= lat <= 90) or not (-180 <= lng <= 180):
-                    failed_entries.append({
-                        "index": idx,
-                        "error": "Invalid coordinates"
-                    })
-                    continue
-                
-                # Map defect type
-                defect_type = defect_type_mapping.get(entry["defect_type"].lower(), DefectType.OTHER)
-                
-                # Map severity if provided
-                severity = SeverityLevel.MEDIUM
-                if "severity" in entry:
-                    try:
-                        severity = SeverityLevel(entry["severity"].lower())
-                    except ValueError:
-                        failed_entries.append({
-                            "index": idx,
-                            "error": "Invalid severity level"
-                        })
-                        continue
-                
-                # Create defect with geographic point data
-                db_defect = DefectModel(
-                    vehicle_id=entry["vehicle_id"],
-                    defect_type=defect_type,
-                    severity=severity,
-                    latitude=lat,
-                    longitude=lng,
-                    location=ST_SetSRID(ST_MakePoint(lng, lat), 4326),
-                    notes=entry.get("notes"),
-                    reported_at=timestamp
-                )
-                
-                db.add(db_defect)
-                success_count += 1
-                
-            except Exception as e:
-                failed_entries.append({
-                    "index": idx,
-                    "error": str(e)
-                })
+        if upload_format is None:
+            upload_format = detect_format(file.file, file.filename, file.content_type)
         
-        # Commit all successful entries
-        db.commit()
+        # Parse, validate and insert off the event loop on a sync session: the
+        # file reads and ORM calls are blocking and validation is CPU-bound
+        summary = await run_in_threadpool(
+            ingest_upload, db, file.file, upload_format, stream, chunk_size, method, dedup
+        )
+        if summary["success_count"]:
+            await invalidate_cache()
         
-        return {
-            "success": True,
-            "processed_count": len(data),
-            "success_count": success_count,
-            "failed_count": len(failed_entries),
-            "failed_entries": failed_entries
-        }
+        return {"success": True, **summary}
         
+    except StreamParseError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON file")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
 
-@router.get("/statistics/summary", response_model=DefectStatistics)
-def get_defect_statistics(
-    db: Session = Depends(get_db)
+@router.get("/statistics/summary", response_model=DefectStatistics, dependencies=[Depends(http_cache(settings.HTTP_CACHE_ANALYTICS_MAX_AGE, etag=VERSION_ETAG))])
+async def get_defect_statistics(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    year: Optional[int] = Query(None, ge=1970, le=9999),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
 ):
     """
     Get statistics about reported defects.
-    """
-    # Total count
-    total_count = db.query(DefectModel).count()
-    
-    # Count by type
-    type_counts = {}
-    for defect_type in DefectType:
-        count = db.query(DefectModel).filter(DefectModel.defect_type == defect_type).count()
-        type_counts[defect_type.value] = count
-    
-    # Count by severity
-    severity_counts = {}
-    for severity in SeverityLevel:
-        count = db.query(DefectModel).filter(DefectModel.severity == severity).count()
-        severity_counts[severity.value] = count
-    
-    # Simple time-based analysis (by month for the current year)
-    current_year = datetime.now().year
-    time_counts = {}
-    for month in range(1, 13):
-        count = db.query(DefectModel).filter(
-            func.extract('year', DefectModel.reported_at) == current_year,
-            func.extract('month', DefectModel.reported_at) == month
-        ).count()
-        time_counts[f"{current_year}-{month:02d}"] = count
     
-    return {
-        "total_count": total_count,
-        "by_type": type_counts,
-        "by_severity": severity_counts,
-        "by_time": time_counts
-    }
+    Parameters:
+    - year: Only count defects reported in this year; by_time lists its months
+    - start_date, end_date: Only count defects reported in this inclusive date range;
+      by_time lists the months it spans
+    
+    Without filters all defects are counted and by_time covers the current year.
+    All counts come from a single grouped query. Responses are cached until
+    the next write and carry an ETag for conditional GETs.
+    """
+    return await cached_json_response(request, "statistics/summary", lambda: db.run_sync(
+        compute_defect_statistics, year=year, start_date=start_date, end_date=end_date
+    ))
 
-@router.get("/analytics/heatmap")
-def get_heatmap_data(
-    db: Session = Depends(get_db),
+@router.get("/analytics/heatmap", dependencies=[Depends(http_cache(settings.HTTP_CACHE_ANALYTICS_MAX_AGE, etag=VERSION_ETAG))])
+async def get_heatmap_data(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     defect_type: Optional[DefectType] = None,
     severity: Optional[SeverityLevel] = None,
-    days: Optional[int] = None
+    days: Optional[int] = None,
+    zoom: Optional[int] = Query(None, ge=0, le=22),
+    resolution: Optional[float] = Query(None, gt=0, le=10),
+    lat_min: Optional[float] = None,
+    lat_max: Optional[float] = None,
+    lng_min: Optional[float] = None,
+    lng_max: Optional[float] = None
 ):
     """
     Get data optimized for heatmap visualization.
     Returns defect points with weight based on severity.
+    
+    Parameters:
+    - defect_type, severity, days: Optional filters
+    - zoom: Map zoom level; aggregates points into grid cells sized for that zoom
+    - resolution: Grid cell size in degrees, overrides the zoom-derived size
+    - lat_min, lat_max, lng_min, lng_max: Viewport bounding box
+    
+    Results of up to HEATMAP_RAW_POINT_LIMIT defects are returned as points
+    ("mode": "points"); larger results are aggregated in SQL into grid cells
+    ("mode": "grid") sized by zoom or resolution, or HEATMAP_DEFAULT_CELL_SIZE
+    degrees without them, each returned as a point at the cell center whose
+    weight is the summed severity weight of its defects.
+    Responses are cached until the next write and carry an ETag.
     """
-    query = db.query(
-        DefectModel.latitude,
-        DefectModel.longitude,
-        DefectModel.defect_type,
-        DefectModel.severity,
-        DefectModel.reported_at
-    )
+    return await cached_json_response(request, "analytics/heatmap", lambda: _heatmap_data(
+        db, defect_type, severity, days, zoom, resolution, lat_min, lat_max, lng_min, lng_max
+    ))
+
+async def _heatmap_data(
+    db: AsyncSession,
+    defect_type: Optional[DefectType],
+    severity: Optional[SeverityLevel],
+    days: Optional[int],
+    zoom: Optional[int],
+    resolution: Optional[float],
+    lat_min: Optional[float],
+    lat_max: Optional[float],
+    lng_min: Optional[float],
+    lng_max: Optional[float]
+):
+    filters = []
+    rollup_filters = []
     
     # Apply filters if provided
     if defect_type:
-        query = query.filter(DefectModel.defect_type == defect_type)
+        filters.append(DefectModel.defect_type == defect_type)
+        rollup_filters.append(DefectDailyRollup.defect_type == defect_type)
     if severity:
-        query = query.filter(DefectModel.severity == severity)
+        filters.append(DefectModel.severity == severity)
+        rollup_filters.append(DefectDailyRollup.severity == severity)
     if days:
         cutoff_date = datetime.now() - timedelta(days=days)
-        query = query.filter(DefectModel.reported_at >= cutoff_date)
+        filters.append(DefectModel.reported_at >= cutoff_date)
+    has_bbox = None not in (lat_min, lat_max, lng_min, lng_max)
+    if has_bbox:
+        filters.append(bbox_filter(lat_min, lat_max, lng_min, lng_max))
     
-    defects = query.all()
+    query = select(
+        DefectModel.latitude,
+        DefectModel.longitude,
+        DefectModel.defect_type,
+        DefectModel.severity,
+        DefectModel.reported_at
+    ).where(*filters)
     
-    # Map severity to weight
-    severity_weights = {
-        SeverityLevel.LOW: 0.5,
-        SeverityLevel.MEDIUM: 1.0,
-        SeverityLevel.HIGH: 1.5,
-        SeverityLevel.CRITICAL: 2.0
-    }
+    # Small result sets are cheap enough to return as raw points
+    raw_limit = settings.HEATMAP_RAW_POINT_LIMIT
+    rows = (await db.execute(query.limit(raw_limit + 1))).all()
+    if len(rows) <= raw_limit:
+        heatmap_data = heatmap_points(rows)
+        return {
+            "mode": "points",
+            "points": heatmap_data,
+            "count": len(heatmap_data)
+        }
     
-    # Format data for heatmap
-    heatmap_data = []
-    for defect in defects:
-        heatmap_data.append({
-            "lat": defect.latitude,
-            "lng": defect.longitude,
-            "weight": severity_weights[defect.severity],
-            "type": defect.defect_type.value,
-            "reported_at": defect.reported_at.isoformat()
-        })
+    # Clients that send neither zoom nor resolution still get a bounded grid
+    cell_size = resolution or (
+        cell_size_for_zoom(zoom) if zoom is not None else settings.HEATMAP_DEFAULT_CELL_SIZE
+    )
+    if can_use_rollups(cell_size, days):
+        cells = await db.run_sync(
+            rollup_heatmap_grid, rollup_filters, cell_size,
+            lat_min=lat_min, lat_max=lat_max, lng_min=lng_min, lng_max=lng_max
+        )
+    else:
+        cells = await db.run_sync(heatmap_grid, filters, cell_size)
     
     return {
-        "points": heatmap_data,
-        "count": len(heatmap_data)
+        "mode": "grid",
+        "cell_size": cell_size,
+        "points": cells,
+        "count": len(cells),
+        "defect_count": sum(cell["count"] for cell in cells)
     }
 
-@router.get("/analytics/density")
-def get_defect_density(
-    db: Session = Depends(get_db),
+@router.get("/analytics/density", dependencies=[Depends(http_cache(settings.HTTP_CACHE_ANALYTICS_MAX_AGE, etag=VERSION_ETAG))])
+async def get_defect_density(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     lat: float = Query(..., ge=-90, le=90),
     lng: float = Query(..., ge=-180, le=180),
     radius: float = Query(..., gt=0, le=50000),  # radius in meters
@@ -472,52 +620,36 @@ def get_defect_density(
     """
     Get defect density within a specified radius of a point.
     Returns count of defects and breakdown by type and severity.
+    Responses are cached until the next write and carry an ETag.
     """
-    # Create a point from the provided coordinates
-    point = f"POINT({lng} {lat})"
-    
-    # Query defects within radius
-    query = db.query(DefectModel).filter(
-        ST_Distance(
-            DefectModel.location, 
-            ST_GeogFromText(point)
-        ) <= radius
-    )
-    
-    # Apply additional filters
-    if defect_type:
-        query = query.filter(DefectModel.defect_type == defect_type)
-    if severity:
-        query = query.filter(DefectModel.severity == severity)
-    
-    defects = query.all()
-    
-    # Count by type
-    type_counts = {}
-    for defect_type in DefectType:
-        count = sum(1 for d in defects if d.defect_type == defect_type)
-        type_counts[defect_type.value] = count
+    async def compute():
+        return (await db.run_sync(density_counts, [(lat, lng, radius)], defect_type, severity))[0]
+    return await cached_json_response(request, "analytics/density", compute)
+
+@router.post("/analytics/density/batch")
+async def get_defect_density_batch(
+    body: DensityBatchRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get defect density around many points in one request.
     
-    # Count by severity
-    severity_counts = {}
-    for severity in SeverityLevel:
-        count = sum(1 for d in defects if d.severity == severity)
-        severity_counts[severity.value] = count
+    Takes a DensityBatchRequest with:
+    - centers: Up to 1000 {lat, lng, radius} objects (radius in meters)
+    - defect_type, severity: Optional filters applied to every center
     
+    Returns one density result per center, in request order, computed in a
+    single query.
+    """
+    centers = [(c.lat, c.lng, c.radius) for c in body.centers]
     return {
-        "center": {
-            "lat": lat,
-            "lng": lng
-        },
-        "radius_meters": radius,
-        "total_count": len(defects),
-        "by_type": type_counts,
-        "by_severity": severity_counts
+        "results": await db.run_sync(density_counts, centers, body.defect_type, body.severity)
     }
 
-@router.get("/analytics/hotspots")
-def get_defect_hotspots(
-    db: Session = Depends(get_db),
+@router.get("/analytics/hotspots", dependencies=[Depends(http_cache(settings.HTTP_CACHE_ANALYTICS_MAX_AGE, etag=VERSION_ETAG))])
+async def get_defect_hotspots(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     limit: int = 10,
     defect_type: Optional[DefectType] = None,
     severity: Optional[SeverityLevel] = None,
@@ -526,38 +658,63 @@ def get_defect_hotspots(
     """
     Identify hotspot areas with high concentration of defects.
     Uses clustering to group nearby defects.
+    
+    Without a days filter the counts come from the daily rollup table.
+    Responses are cached until the next write and carry an ETag.
     """
+    return await cached_json_response(request, "analytics/hotspots", lambda: _defect_hotspots(
+        db, limit, defect_type, severity, days
+    ))
+
+async def _defect_hotspots(
+    db: AsyncSession,
+    limit: int,
+    defect_type: Optional[DefectType],
+    severity: Optional[SeverityLevel],
+    days: Optional[int]
+):
     # For simplicity, we'll use a basic approach:
     # Round coordinates to create grid cells and count defects in each cell
     
-    # First, get all defects with optional filtering
-    query = db.query(
-        func.round(DefectModel.latitude, 3).label('lat_grid'),
-        func.round(DefectModel.longitude, 3).label('lng_grid'),
-        func.count().label('defect_count')
-    )
-    
-    # Apply filters if provided
-    if defect_type:
-        query = query.filter(DefectModel.defect_type == defect_type)
-    if severity:
-        query = query.filter(DefectModel.severity == severity)
-    if days:
-        cutoff_date = datetime.now() - timedelta(days=days)
-        query = query.filter(DefectModel.reported_at >= cutoff_date)
-    
-    # Group by grid cells and order by count
-    hotspots = query.group_by('lat_grid', 'lng_grid').order_by(desc('defect_count')).limit(limit).all()
+    # The rollups already hold per-cell counts; a rolling days window does not
+    # align with their day buckets, so that case is answered from raw defects
+    if not days and rollups_enabled():
+        hotspots = await db.run_sync(rollup_hotspots, limit, defect_type, severity)
+    else:
+        # Same grid as the rollups: round(coordinate * 1000) / 1000
+        lat_grid = func.round(DefectModel.latitude * ROLLUP_CELL_SCALE)
+        lng_grid = func.round(DefectModel.longitude * ROLLUP_CELL_SCALE)
+        query = select(
+            lat_grid.label('lat_grid'),
+            lng_grid.label('lng_grid'),
+            func.count().label('defect_count')
+        )
+        
+        # Apply filters if provided
+        if defect_type:
+            query = query.where(DefectModel.defect_type == defect_type)
+        if severity:
+            query = query.where(DefectModel.severity == severity)
+        if days:
+            cutoff_date = datetime.now() - timedelta(days=days)
+            query = query.where(DefectModel.reported_at >= cutoff_date)
+        
+        # Group by grid cells and order by count
+        query = query.group_by(lat_grid, lng_grid).order_by(desc('defect_count')).limit(limit)
+        rows = (await db.execute(query)).all()
+        hotspots = [
+            {
+                "lat": h.lat_grid / ROLLUP_CELL_SCALE,
+                "lng": h.lng_grid / ROLLUP_CELL_SCALE,
+                "count": h.defect_count
+            }
+            for h in rows
+        ]
     
     return {
         "hotspots": [
-            {
-                "lat": float(h.lat_grid),
-                "lng": float(h.lng_grid),
-                "count": h.defect_count,
-                # Approximate radius in meters (0.001 degree ≈ 111 meters)
-                "radius": 111
-            }
+            # Approximate radius in meters (0.001 degree ≈ 111 meters)
+            {**h, "radius": 111}
             for h in hotspots
         ]
-    } 
\ No newline at end of file
+    }
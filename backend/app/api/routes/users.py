@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.models.user import User as UserModel
 from app.schemas.user import User, UserCreate, UserUpdate
 from app.core.security import get_password_hash
@@ -10,35 +12,35 @@ from app.core.security import get_password_hash
 router = APIRouter()
 
 @router.get("/", response_model=List[User])
-def get_users(
-    db: Session = Depends(get_db),
+async def get_users(
+    db: AsyncSession = Depends(get_async_db),
     skip: int = 0,
     limit: int = 100
 ):
     """
     Retrieve users.
     """
-    users = db.query(UserModel).offset(skip).limit(limit).all()
+    users = (await db.execute(select(UserModel).offset(skip).limit(limit))).scalars().all()
     return users
 
 @router.post("/", response_model=User)
-def create_user(
+async def create_user(
     user: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create new user.
     """
     # Check if user already exists
-    db_user = db.query(UserModel).filter(UserModel.email == user.email).first()
+    db_user = (await db.execute(select(UserModel).where(UserModel.email == user.email))).scalar_one_or_none()
     if db_user:
         raise HTTPException(
             status_code=400,
             detail="Email already registered"
         )
     
-    # Create new user with hashed password
-    hashed_password = get_password_hash(user.password)
+    # Create new user with hashed password (bcrypt is CPU-bound, keep it off the event loop)
+    hashed_password = await run_in_threadpool(get_password_hash, user.password)
     db_user = UserModel(
         email=user.email,
         hashed_password=hashed_password,
@@ -47,33 +49,33 @@ def create_user(
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 @router.get("/{user_id}", response_model=User)
-def get_user(
+async def get_user(
     user_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a specific user by id.
     """
-    user = db.query(UserModel).filter(UserModel.id == user_id).first()
+    user = await db.get(UserModel, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 @router.put("/{user_id}", response_model=User)
-def update_user(
+async def update_user(
     user_id: int,
     user_update: UserUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update a user.
     """
-    db_user = db.query(UserModel).filter(UserModel.id == user_id).first()
+    db_user = await db.get(UserModel, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -82,27 +84,27 @@ def update_user(
     
     # Hash password if it's being updated
     if "password" in update_data:
-        update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+        update_data["hashed_password"] = await run_in_threadpool(get_password_hash, update_data.pop("password"))
     
     for field, value in update_data.items():
         setattr(db_user, field, value)
     
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 @router.delete("/{user_id}")
-def delete_user(
+async def delete_user(
     user_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a user.
     """
-    db_user = db.query(UserModel).filter(UserModel.id == user_id).first()
+    db_user = await db.get(UserModel, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    db.delete(db_user)
-    db.commit()
+    await db.delete(db_user)
+    await db.commit()
     return {"success": True} 
\ No newline at end of file
@@ -0,0 +1,149 @@
+import zlib
+from functools import lru_cache
+from typing import Optional, Set
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.config import settings
+
+
+@lru_cache(maxsize=None)
+def brotli_available() -> bool:
+    """Whether the optional brotli package is installed; imported on first check only."""
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> Set[str]:
+    """Codings listed in an Accept-Encoding header, without those refused with q=0."""
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding)
+    return accepted
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Content coding to use for a response: br when accepted and available, then gzip, else None."""
+    accepted = accepted_encodings(accept_encoding)
+    if "br" in accepted and brotli_available():
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class Compressor:
+    """Incremental gzip or brotli compressor for a response body."""
+
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            import brotli
+            self._brotli = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+            self._gzip = None
+        else:
+            self._brotli = None
+            # wbits 31: deflate with a gzip header and trailer
+            self._gzip = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        """Compress the next chunk; the output of non-final chunks is flushed so clients can decode it."""
+        if self._brotli is not None:
+            return self._brotli.process(data) + (self._brotli.finish() if final else self._brotli.flush())
+        return self._gzip.compress(data) + self._gzip.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+def compressible(headers: Headers) -> bool:
+    """Whether a response may be compressed: not already encoded, nor of an excluded content type."""
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").lower()
+    excluded = [t.strip().lower() for t in settings.COMPRESSION_EXCLUDED_TYPES.split(",") if t.strip()]
+    return not any(content_type.startswith(t) for t in excluded)
+
+
+class CompressionMiddleware:
+    """
+    gzip or brotli compress responses, as negotiated with Accept-Encoding.
+
+    Bodies sent in one piece are compressed only from COMPRESSION_MIN_SIZE
+    bytes; streamed bodies (exports) are compressed chunk by chunk as they
+    are sent. Responses that already have a Content-Encoding and content
+    types in COMPRESSION_EXCLUDED_TYPES (already-compressed formats such
+    as vector tiles and Parquet) pass through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if message["status"] < 200 or message["status"] in (204, 304) or not compressible(headers):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Held back until the first body chunk shows whether to compress
+                    start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(scope=start_message)
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body and len(body) < settings.COMPRESSION_MIN_SIZE:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                compressor = Compressor(encoding)
+                headers["Content-Encoding"] = encoding
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = compressor.compress(body, final=True)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start_message)
+            await send({
+                "type": "http.response.body",
+                "body": compressor.compress(body, final=not more_body),
+                "more_body": more_body,
+            })
+
+        await self.app(scope, receive, send_compressed)
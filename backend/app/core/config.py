@@ -8,6 +8,25 @@ class Settings(BaseSettings):
     
     # Database settings
     DATABASE_URL: str = os.getenv("DATABASE_URL", "your postgres url")
+    # Serve API routes from an asyncpg engine; "false" keeps them on the sync
+    # psycopg2 engine, with each database call run in the threadpool
+    DB_ASYNC: bool = os.getenv("DB_ASYNC", "true").lower() == "true"
+    
+    # Connection pool settings
+    # "queue" keeps a pool of DB_POOL_SIZE connections (+ DB_MAX_OVERFLOW under bursts);
+    # "null" opens a connection per checkout, the default on Lambda where each
+    # concurrent invocation would otherwise hold its own pool
+    DB_POOL_MODE: str = os.getenv("DB_POOL_MODE", "null" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "queue")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Per-statement timeout in milliseconds, 0 disables it
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+    # Connecting through PgBouncer in transaction mode: no server-side prepared
+    # statements and no connection-level settings
+    DB_PGBOUNCER: bool = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
     
     # JWT settings
     SECRET_KEY: str = os.getenv("SECRET_KEY", "supersecretkey")
@@ -21,6 +40,85 @@ class Settings(BaseSettings):
     AWS_REGION: str = os.getenv("AWS_REGION", "us-east-1")
     S3_BUCKET: str = os.getenv("S3_BUCKET", "roadmetrics-data")
     
+    # Bulk ingest settings
+    # Rows validated and written per chunk, and the write strategy ("values" or "copy")
+    BULK_INGEST_CHUNK_SIZE: int = int(os.getenv("BULK_INGEST_CHUNK_SIZE", "5000"))
+    BULK_INGEST_METHOD: str = os.getenv("BULK_INGEST_METHOD", "values")
+    # Skip re-uploaded detections: uploads get a dedup key from vehicle_id,
+    # timestamp and coordinates rounded to INGEST_DEDUP_COORD_DECIMALS places
+    # (5 ≈ 1 m), or from a client idempotency key, unique in the database
+    INGEST_DEDUP: bool = os.getenv("INGEST_DEDUP", "true").lower() == "true"
+    INGEST_DEDUP_COORD_DECIMALS: int = int(os.getenv("INGEST_DEDUP_COORD_DECIMALS", "5"))
+    
+    # Analytics settings
+    # Serve analytics from the defect_daily_rollups table when the filters allow it
+    ANALYTICS_USE_ROLLUPS: bool = os.getenv("ANALYTICS_USE_ROLLUPS", "true").lower() == "true"
+    # Heatmap grid cells are HEATMAP_CELL_PIXELS screen pixels wide at the requested zoom;
+    # results with at most HEATMAP_RAW_POINT_LIMIT defects are returned as raw points;
+    # larger ones requested without a zoom use HEATMAP_DEFAULT_CELL_SIZE-degree cells
+    HEATMAP_CELL_PIXELS: int = int(os.getenv("HEATMAP_CELL_PIXELS", "8"))
+    HEATMAP_RAW_POINT_LIMIT: int = int(os.getenv("HEATMAP_RAW_POINT_LIMIT", "2000"))
+    HEATMAP_DEFAULT_CELL_SIZE: float = float(os.getenv("HEATMAP_DEFAULT_CELL_SIZE", "0.01"))
+    
+    # Vector tile settings
+    # Points are clustered up to this zoom, on a grid of TILE_CLUSTER_PIXELS screen pixels
+    TILE_CLUSTER_MAX_ZOOM: int = int(os.getenv("TILE_CLUSTER_MAX_ZOOM", "13"))
+    TILE_CLUSTER_PIXELS: int = int(os.getenv("TILE_CLUSTER_PIXELS", "16"))
+    TILE_MAX_FEATURES: int = int(os.getenv("TILE_MAX_FEATURES", "20000"))
+    TILE_CACHE_MAX_AGE: int = int(os.getenv("TILE_CACHE_MAX_AGE", "300"))
+    
+    # Response cache for the analytics endpoints
+    # "local" is an in-process LRU, "redis" is shared through CACHE_REDIS_URL
+    # (memory:// uses an in-process fake), "none" disables caching
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "local")
+    CACHE_TTL_SECONDS: int = int(os.getenv("CACHE_TTL_SECONDS", "300"))
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+    CACHE_REDIS_URL: str = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    
+    # HTTP caching of GET responses
+    # max-age of defect lists, single defects and the point feed (0 sends
+    # "no-cache": clients revalidate every use with the ETag)
+    # and of the analytics endpoints; tiles use TILE_CACHE_MAX_AGE
+    HTTP_CACHE_MAX_AGE: int = int(os.getenv("HTTP_CACHE_MAX_AGE", "0"))
+    HTTP_CACHE_ANALYTICS_MAX_AGE: int = int(os.getenv("HTTP_CACHE_ANALYTICS_MAX_AGE", "60"))
+    
+    # Response compression
+    # gzip, or brotli when the client accepts it and the brotli package is
+    # installed, for bodies of at least COMPRESSION_MIN_SIZE bytes; content
+    # types starting with an entry of COMPRESSION_EXCLUDED_TYPES are left alone
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+    COMPRESSION_EXCLUDED_TYPES: str = os.getenv(
+        "COMPRESSION_EXCLUDED_TYPES",
+        "application/vnd.mapbox-vector-tile,application/vnd.apache.parquet,application/gzip,application/zip,image/"
+    )
+    
+    # Batch report settings
+    # Default reporting window, and the grid (in degrees, 0.01° ≈ 1.1 km) critical
+    # defects are binned into to find the BATCH_CRITICAL_AREAS worst areas
+    BATCH_REPORT_DAYS: int = int(os.getenv("BATCH_REPORT_DAYS", "30"))
+    BATCH_CRITICAL_CELL_DEGREES: float = float(os.getenv("BATCH_CRITICAL_CELL_DEGREES", "0.01"))
+    BATCH_CRITICAL_AREAS: int = int(os.getenv("BATCH_CRITICAL_AREAS", "10"))
+    
+    # Request metrics settings
+    # Fraction of requests (0-1) timed for DB queries and serialization, reported
+    # in a Server-Timing header and, with REQUEST_METRICS_LOG, a structured log line;
+    # METRICS_PROMETHEUS also serves histograms on /metrics (needs prometheus_client).
+    # Sampled requests pay for the statement hooks, so only 1% are by default
+    REQUEST_METRICS_SAMPLE_RATE: float = float(os.getenv("REQUEST_METRICS_SAMPLE_RATE", "0.01"))
+    REQUEST_METRICS_LOG: bool = os.getenv("REQUEST_METRICS_LOG", "false").lower() == "true"
+    METRICS_PROMETHEUS: bool = os.getenv("METRICS_PROMETHEUS", "false").lower() == "true"
+    
+    # Binary point feed settings
+    # Most points returned by /api/defects/points (newest first)
+    POINT_FEED_MAX_POINTS: int = int(os.getenv("POINT_FEED_MAX_POINTS", "2000000"))
+    
+    # Export settings
+    # Rows fetched per server-side cursor batch (one Parquet row group per batch)
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "10000"))
+    
     class Config:
         case_sensitive = True
 
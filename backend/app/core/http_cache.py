@@ -0,0 +1,160 @@
+import hashlib
+import json
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Request
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.services.cache import get_cache
+
+# Request state keys of the caching headers of a response, and of whether
+# its ETag is left to HttpCacheMiddleware to compute from the body
+STATE_KEY = "http_cache_headers"
+BODY_ETAG_KEY = "http_cache_body_etag"
+
+# ETag kinds of http_cache()
+VERSION_ETAG = "version"
+CONTENT_ETAG = "content"
+ETAG_KINDS = (VERSION_ETAG, CONTENT_ETAG)
+
+
+def cache_control(max_age: int) -> str:
+    """Cache-Control value for a max-age; 0 lets clients store responses but revalidate every use."""
+    return "no-cache" if max_age <= 0 else f"public, max-age={max_age}"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an ETag with an If-None-Match header value."""
+    if not if_none_match:
+        return False
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+async def version_etag(request: Request) -> str:
+    """
+    Weak ETag of a GET response from the data version stamp, the path and the
+    sorted, non-empty query parameters.
+
+    Every write to defects bumps the version (see invalidate_cache), so the
+    ETag stays the same exactly as long as the data the response was built
+    from, and can be checked without building the response.
+    """
+    params = sorted((k, v) for k, v in request.query_params.multi_items() if v != "")
+    stamp = await get_cache().stamp()
+    digest = hashlib.sha1(json.dumps([stamp, request.url.path, params]).encode()).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+def body_etag(body: bytes) -> str:
+    """Weak ETag of a response body, as sent before any compression."""
+    return f'W/"{hashlib.md5(body).hexdigest()}"'
+
+
+def http_cache(max_age: int, etag: Optional[str] = CONTENT_ETAG):
+    """
+    Route dependency applying an HTTP caching policy to a GET endpoint.
+
+    Responses get Cache-Control for max_age seconds (see cache_control) and,
+    unless etag is None, an ETag of one of two kinds:
+
+    - VERSION_ETAG: a version_etag(), checked before the endpoint runs, so a
+      request whose If-None-Match still matches is answered 304 Not Modified
+      without building the response. For endpoints served from the response
+      cache, whose bodies may lag other processes' writes by the same
+      CACHE_TTL_SECONDS the in-process stamps roll over with.
+    - CONTENT_ETAG: for endpoints that always read fresh data. The version
+      ETag is only used when the version is shared by all processes (the
+      redis backend); otherwise a write on another process would not change
+      it, so the ETag is a hash of the body and the 304 is sent once the
+      endpoint has run.
+
+    The headers are added by HttpCacheMiddleware, since endpoints return
+    their own Response objects.
+    """
+    if etag is not None and etag not in ETAG_KINDS:
+        raise ValueError(f"etag must be one of {ETAG_KINDS} or None, got {etag!r}")
+
+    async def apply_policy(request: Request):
+        headers = {"Cache-Control": cache_control(max_age)}
+        if etag == VERSION_ETAG or (etag == CONTENT_ETAG and get_cache().shared_version):
+            headers["ETag"] = await version_etag(request)
+            if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+                raise HTTPException(status_code=304, headers=headers)
+        elif etag == CONTENT_ETAG:
+            setattr(request.state, BODY_ETAG_KEY, True)
+        setattr(request.state, STATE_KEY, headers)
+
+    return apply_policy
+
+
+class HttpCacheMiddleware:
+    """
+    Add the caching headers chosen by an http_cache() dependency to
+    successful responses, replacing any ETag or Cache-Control the endpoint set.
+
+    Where the ETag is a body hash, the body is held back to hash it and a
+    matching If-None-Match gets an empty 304 instead; streamed bodies are
+    sent as they come, without an ETag.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start_message = None
+
+        async def send_with_headers(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                state = scope.get("state", {})
+                policy: Optional[Dict[str, str]] = state.get(STATE_KEY)
+                if message["status"] != 200 or not policy:
+                    await send(message)
+                    return
+                headers = MutableHeaders(scope=message)
+                for name, value in policy.items():
+                    headers[name] = value
+                if state.get(BODY_ETAG_KEY):
+                    # Held back until the body is known
+                    start_message = message
+                    return
+                await send(message)
+                return
+
+            if start_message is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            headers = MutableHeaders(scope=start)
+            if message.get("more_body", False):
+                await send(start)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers["ETag"] = body_etag(body)
+            if etag_matches(if_none_match, headers["ETag"]):
+                for name in ("content-length", "content-type"):
+                    if name in headers:
+                        del headers[name]
+                start["status"] = 304
+                message = {"type": "http.response.body", "body": b""}
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,205 @@
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.request_metrics")
+
+# Metrics of the request being served, None outside sampled requests. The
+# object is shared with threadpool workers and SQLAlchemy's async greenlets,
+# which run with a copy of the request's context
+_current: ContextVar[Optional["RequestMetrics"]] = ContextVar("request_metrics", default=None)
+
+# Longest statement text kept for the slowest query in logs
+MAX_STATEMENT_LENGTH = 500
+
+
+class RequestMetrics:
+    """Database and serialization timings of one request."""
+
+    __slots__ = ("query_count", "db_time", "slowest_time", "slowest_statement", "serialization_time")
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.serialization_time = 0.0
+
+    def record_query(self, statement: str, elapsed: float):
+        self.query_count += 1
+        self.db_time += elapsed
+        if elapsed >= self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = statement
+
+    def server_timing(self, total: float) -> str:
+        """Server-Timing header value; durations in milliseconds."""
+        return (
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.query_count} queries", '
+            f"db-slowest;dur={self.slowest_time * 1000:.2f}, "
+            f"serialize;dur={self.serialization_time * 1000:.2f}, "
+            f"total;dur={total * 1000:.2f}"
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        statement = self.slowest_statement
+        if statement is not None:
+            statement = " ".join(statement.split())[:MAX_STATEMENT_LENGTH]
+        return {
+            "db_queries": self.query_count,
+            "db_ms": round(self.db_time * 1000, 2),
+            "slowest_query_ms": round(self.slowest_time * 1000, 2),
+            "slowest_query": statement,
+            "serialization_ms": round(self.serialization_time * 1000, 2),
+        }
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    """Metrics of the request being served, if it is sampled."""
+    return _current.get()
+
+
+@contextmanager
+def serialization_timer():
+    """Count the time spent in the block as response serialization."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serialization_time += time.perf_counter() - started
+
+
+class TimedJSONResponse(ORJSONResponse):
+    """
+    orjson response that records its encoding time in the request metrics.
+
+    UTC datetimes end in "Z", as in pydantic's JSON output, so rows encoded
+    directly look the same as those serialized through a response model.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with serialization_timer():
+            return orjson.dumps(
+                content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z
+            )
+
+
+def instrument_queries(sync_engine) -> None:
+    """Time every statement run on the engine while a sampled request is being served."""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            context._query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        metrics = _current.get()
+        started = getattr(context, "_query_started", None)
+        if metrics is not None and started is not None:
+            metrics.record_query(statement, time.perf_counter() - started)
+
+
+@lru_cache(maxsize=None)
+def prometheus_histograms():
+    """Prometheus histograms, created on first use; prometheus_client is only needed with METRICS_PROMETHEUS."""
+    from prometheus_client import Histogram
+
+    return {
+        "duration": Histogram(
+            "http_request_duration_seconds", "Request duration", ["method", "route", "status"]
+        ),
+        "db_queries": Histogram(
+            "http_request_db_queries", "Database statements per request", ["route"],
+            buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)
+        ),
+        "db_time": Histogram("http_request_db_seconds", "Database time per request", ["route"]),
+        "serialization": Histogram(
+            "http_request_serialization_seconds", "Response serialization time per request", ["route"]
+        ),
+    }
+
+
+def prometheus_exposition():
+    """(body, content type) of the Prometheus text exposition for /metrics."""
+    from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+    prometheus_histograms()
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class RequestMetricsMiddleware:
+    """
+    Instrument a sampled fraction (REQUEST_METRICS_SAMPLE_RATE) of requests.
+
+    Sampled responses get a Server-Timing header with the query count, DB
+    time, slowest statement and serialization time, and one structured log
+    line per request. Queries a streaming response runs while sending its
+    body are logged but miss the header, which goes out first. With
+    METRICS_PROMETHEUS the same figures feed histograms served on /metrics.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        rate = settings.REQUEST_METRICS_SAMPLE_RATE
+        if scope["type"] != "http" or rate <= 0 or (rate < 1 and random.random() >= rate):
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", metrics.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self._report(scope, status, time.perf_counter() - started, metrics)
+
+    @staticmethod
+    def _report(scope, status: int, duration: float, metrics: RequestMetrics):
+        # Endpoint function names keep the route label bounded, unlike raw paths
+        endpoint = scope.get("endpoint")
+        route = getattr(endpoint, "__name__", "unmatched")
+        if settings.REQUEST_METRICS_LOG:
+            logger.info("request_metrics %s", json.dumps({
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route,
+                "status": status,
+                "duration_ms": round(duration * 1000, 2),
+                **metrics.as_dict(),
+            }))
+        if settings.METRICS_PROMETHEUS:
+            histograms = prometheus_histograms()
+            histograms["duration"].labels(scope["method"], route, str(status)).observe(duration)
+            histograms["db_queries"].labels(route).observe(metrics.query_count)
+            histograms["db_time"].labels(route).observe(metrics.db_time)
+            histograms["serialization"].labels(route).observe(metrics.serialization_time)
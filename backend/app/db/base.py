@@ -1,3 +1,4 @@
 # Import all models for Alembic migrations
 from app.models.defect import Defect
+from app.models.rollup import DefectDailyRollup
 from app.models.user import User 
\ No newline at end of file
@@ -0,0 +1,155 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+from uuid import uuid4
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.core.config import settings
+
+POOL_MODES = ("queue", "null")
+
+
+class PoolStats:
+    """Counters for connection checkouts from one pool; failures are pool timeouts and connect errors."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.failures = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float, failed: bool = False):
+        with self._lock:
+            if failed:
+                self.failures += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            attempts = self.checkouts + self.failures
+            return {
+                "checkouts": self.checkouts,
+                "failures": self.failures,
+                "avg_wait_ms": round(self.total_wait / attempts * 1000, 3) if attempts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+def _instrumented(pool_class):
+    """
+    Subclass of a pool class that records how long each checkout waits.
+
+    The wait covers queueing for a free connection and, when the pool has to
+    open one, connecting; with NullPool it is the connect time.
+    """
+
+    class InstrumentedPool(pool_class):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.stats = PoolStats()
+
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except Exception:
+                self.stats.record(time.perf_counter() - started, failed=True)
+                raise
+            self.stats.record(time.perf_counter() - started)
+            return connection
+
+        def recreate(self):
+            # Keep the counters across pool recreation (e.g. after dispose)
+            pool = super().recreate()
+            pool.stats = self.stats
+            return pool
+
+    InstrumentedPool.__name__ = f"Instrumented{pool_class.__name__}"
+    return InstrumentedPool
+
+
+InstrumentedQueuePool = _instrumented(QueuePool)
+InstrumentedAsyncQueuePool = _instrumented(AsyncAdaptedQueuePool)
+InstrumentedNullPool = _instrumented(NullPool)
+
+
+def engine_options(is_async: bool = False) -> Dict[str, Any]:
+    """
+    create_engine keyword arguments for the configured pooling strategy.
+
+    Statement timeouts are sent as a connection option, except behind
+    PgBouncer where connections are shared between clients and the timeout
+    is set per transaction instead (see apply_statement_timeout).
+    """
+    if settings.DB_POOL_MODE not in POOL_MODES:
+        raise ValueError(f"DB_POOL_MODE must be one of {POOL_MODES}, got {settings.DB_POOL_MODE!r}")
+
+    options: Dict[str, Any] = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if settings.DB_POOL_MODE == "null":
+        options["poolclass"] = InstrumentedNullPool
+    else:
+        options.update(
+            poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+
+    connect_args: Dict[str, Any] = {}
+    timeout = settings.DB_STATEMENT_TIMEOUT_MS
+    if is_async:
+        if settings.DB_PGBOUNCER:
+            # asyncpg prepares and caches named statements by default, which
+            # break once PgBouncer hands the next transaction another server.
+            # The statements SQLAlchemy still prepares get unique names, since
+            # asyncpg's per-connection counters collide on a shared server.
+            connect_args.update(
+                statement_cache_size=0,
+                prepared_statement_cache_size=0,
+                prepared_statement_name_func=lambda: f"__asyncpg_{uuid4()}__",
+            )
+        elif timeout:
+            connect_args["server_settings"] = {"statement_timeout": str(timeout)}
+    elif timeout and not settings.DB_PGBOUNCER:
+        connect_args["options"] = f"-c statement_timeout={timeout}"
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
+def apply_statement_timeout(sync_engine) -> None:
+    """Behind PgBouncer, set DB_STATEMENT_TIMEOUT_MS at the start of every transaction."""
+    if not (settings.DB_PGBOUNCER and settings.DB_STATEMENT_TIMEOUT_MS):
+        return
+
+    @event.listens_for(sync_engine, "begin")
+    def set_local_timeout(conn):
+        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(settings.DB_STATEMENT_TIMEOUT_MS)}")
+
+
+def pool_status(engine) -> Optional[Dict[str, Any]]:
+    """Current occupancy and checkout counters of an engine's pool."""
+    if engine is None:
+        return None
+    pool = getattr(engine, "sync_engine", engine).pool
+    status: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            # Connections opened beyond pool_size; negative while the pool is still filling
+            overflow=pool.overflow(),
+            max_overflow=settings.DB_MAX_OVERFLOW,
+        )
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update(stats.as_dict())
+    return status
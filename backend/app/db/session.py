@@ -1,22 +1,151 @@
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
+from app.core.request_metrics import instrument_queries
+from app.db.pool import apply_statement_timeout, engine_options
 
-# Create SQLAlchemy engine
-engine = create_engine(settings.DATABASE_URL)
+# Engines are created on first database use rather than at import, so cold
+# starts that never touch the database (e.g. /health on Lambda) skip loading
+# the psycopg2/asyncpg dialects and opening pools
+_engine = None
+_async_engine = None
 
-# Create sessionmaker
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL with its driver switched to asyncpg."""
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+def get_engine():
+    """The sync engine, created with the configured pooling strategy (see app.db.pool) on first call."""
+    global _engine
+    if _engine is None:
+        _engine = create_engine(settings.DATABASE_URL, **engine_options())
+        apply_statement_timeout(_engine)
+        instrument_queries(_engine)
+    return _engine
+
+
+def get_async_engine():
+    """The asyncpg engine used by the API routes, or None when DB_ASYNC is off."""
+    global _async_engine
+    if _async_engine is None and settings.DB_ASYNC:
+        _async_engine = create_async_engine(async_database_url(settings.DATABASE_URL), **engine_options(is_async=True))
+        apply_statement_timeout(_async_engine.sync_engine)
+        instrument_queries(_async_engine.sync_engine)
+    return _async_engine
+
+
+def created_engines():
+    """(sync, async) engines that exist so far, without creating them."""
+    return _engine, _async_engine
+
+
+def __getattr__(name):
+    # `engine` and `async_engine` stay importable for scripts; importing them
+    # creates the engine
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class _LazySession(Session):
+    def __init__(self, bind=None, **kwargs):
+        super().__init__(bind=bind or get_engine(), **kwargs)
+
+
+class _LazyAsyncSession(AsyncSession):
+    def __init__(self, bind=None, **kwargs):
+        super().__init__(bind=bind or get_async_engine(), **kwargs)
+
+
+# Create sessionmaker; sessions bind to the engine when first instantiated
+SessionLocal = sessionmaker(class_=_LazySession, autocommit=False, autoflush=False)
 
 # Create base class for SQLAlchemy models
 Base = declarative_base()
 
+# Async sessionmaker, used by the API routes when DB_ASYNC is on
+# Objects stay loaded after commit, since lazy refreshes cannot run implicitly
+# on an AsyncSession
+AsyncSessionLocal = (
+    async_sessionmaker(class_=_LazyAsyncSession, autoflush=False, expire_on_commit=False)
+    if settings.DB_ASYNC else None
+)
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+
+class ThreadedSession:
+    """
+    AsyncSession-compatible wrapper around a sync Session.
+
+    Each call runs in the threadpool, one at a time, so async routes can use
+    the psycopg2 engine unchanged when DB_ASYNC is off. Only the subset of
+    the AsyncSession API used by the routes is provided.
+    """
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    async def execute(self, statement, *args, **kwargs):
+        # Rows are fetched in the worker thread, like AsyncSession buffers them
+        def execute():
+            return self.sync_session.execute(statement, *args, **kwargs).freeze()
+        frozen = await run_in_threadpool(execute)
+        return frozen()
+
+    async def scalar(self, statement, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, *args, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def refresh(self, instance, *args, **kwargs):
+        await run_in_threadpool(self.sync_session.refresh, instance, *args, **kwargs)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+
+# Async dependency for the API routes: an AsyncSession on asyncpg, or the sync
+# engine behind ThreadedSession when DB_ASYNC is off. Services written against
+# a sync Session are called through `await db.run_sync(fn, ...)` in both modes
+async def get_async_db():
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        db = ThreadedSession(SessionLocal())
+        try:
+            yield db
+        finally:
+            await db.close()
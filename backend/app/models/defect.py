@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Enum, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
@@ -57,6 +57,11 @@ class Defect(Base):
     # Optional text notes about the defect
     notes = Column(Text, nullable=True)
     
+    # Ingest deduplication key (see app.services.bulk_ingest.dedup_key), unique
+    # so re-uploads of the same detection are skipped; NULL for defects created
+    # through the API or ingested with dedup off
+    dedup_key = Column(String(40), nullable=True)
+    
     # Timestamps for creation and updates
     # reported_at is set automatically to the current time when a defect is created
     reported_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -66,4 +71,17 @@ class Defect(Base):
     # Optional relationship to user if authentication is implemented
     # This would link defects to the users who reported them
     # reported_by = Column(Integer, ForeignKey("users.id"), nullable=True)
-    # user = relationship("User", back_populates="reported_defects") 
\ No newline at end of file
+    # user = relationship("User", back_populates="reported_defects")
+
+    __table_args__ = (
+        # Serves the newest-first (reported_at, id) ordering and keyset
+        # pagination of the defect list, scanned backwards
+        Index("ix_defects_reported_at_id", "reported_at", "id"),
+        # Common filter combinations, each ending in reported_at so the
+        # filtered list and date-windowed analytics read rows in order
+        Index("ix_defects_type_severity_reported_at", "defect_type", "severity", "reported_at"),
+        Index("ix_defects_type_reported_at", "defect_type", "reported_at"),
+        Index("ix_defects_severity_reported_at", "severity", "reported_at"),
+        # Conflict target of the ingest upserts
+        Index("ix_defects_dedup_key", "dedup_key", unique=True),
+    ) 
\ No newline at end of file
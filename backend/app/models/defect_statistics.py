@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Date, DateTime, Integer
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+from app.db.session import Base
+
+# SQLAlchemy model for the defect_statistics table
+# One row of daily statistics (total, counts by type and by severity) per
+# day, written by the EC2 batch job (infrastructure/scripts/batch/data_aggregation.py)
+# with INSERT ... ON CONFLICT (date) DO UPDATE
+class DefectStatistics(Base):
+    __tablename__ = "defect_statistics"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Day the statistics cover; unique, as the upsert's conflict target
+    date = Column(Date, nullable=False, unique=True)
+
+    # {"total_count": ..., "by_type": {...}, "by_severity": {...}, "date": "YYYY-MM-DD"}
+    statistics = Column(JSONB, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
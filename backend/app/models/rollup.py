@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Date, Enum, Integer
+
+from app.db.session import Base
+from app.models.defect import DefectType, SeverityLevel
+
+# Rollup grid cells are 1/ROLLUP_CELL_SCALE degrees wide (0.001° ≈ 111 m),
+# the same grid the hotspot endpoint rounds coordinates to
+ROLLUP_CELL_SCALE = 1000
+
+# SQLAlchemy model for the defect_daily_rollups table
+# Pre-aggregated defect counts per UTC day, type, severity and grid cell
+# Maintained by statement-level triggers on the defects table (see the
+# add_defect_daily_rollups migration), so every insert, update and delete,
+# including bulk COPY ingests, is reflected incrementally
+class DefectDailyRollup(Base):
+    __tablename__ = "defect_daily_rollups"
+
+    # UTC calendar day of reported_at
+    day = Column(Date, primary_key=True)
+
+    defect_type = Column(Enum(DefectType), primary_key=True)
+    severity = Column(Enum(SeverityLevel), primary_key=True)
+
+    # Grid cell indices: round(latitude * ROLLUP_CELL_SCALE), round(longitude * ROLLUP_CELL_SCALE)
+    lat_cell = Column(Integer, primary_key=True)
+    lng_cell = Column(Integer, primary_key=True)
+
+    # Number of defects in this bucket; may drop to 0 after deletes
+    defect_count = Column(Integer, nullable=False, default=0)
@@ -37,6 +37,8 @@ class DefectUploadPayload(BaseModel):
     defect_type: str
     severity: Optional[SeverityLevel] = SeverityLevel.MEDIUM
     notes: Optional[str] = None
+    # Optional client key identifying this upload, so retries are not stored twice
+    idempotency_key: Optional[str] = None
     
     @validator('coordinates')
     def validate_coordinates(cls, v):
@@ -53,4 +55,14 @@ class DefectStatistics(BaseModel):
     total_count: int
     by_type: dict
     by_severity: dict
-    by_time: dict 
\ No newline at end of file
+    by_time: dict 
+
+class DensityCenter(BaseModel):
+    lat: float = Field(..., ge=-90, le=90)
+    lng: float = Field(..., ge=-180, le=180)
+    radius: float = Field(..., gt=0, le=50000)  # radius in meters
+
+class DensityBatchRequest(BaseModel):
+    centers: List[DensityCenter] = Field(..., min_length=1, max_length=1000)
+    defect_type: Optional[DefectType] = None
+    severity: Optional[SeverityLevel] = None
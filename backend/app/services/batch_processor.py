@@ -1,92 +1,138 @@
 import logging
 import json
-from datetime import datetime, timedelta
-from sqlalchemy import create_engine, func, and_
-from sqlalchemy.orm import sessionmaker
-import boto3
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+from sqlalchemy import func, select, tuple_, union_all
+from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.db.session import Base
+from app.db.session import SessionLocal
 from app.models.defect import Defect, DefectType, SeverityLevel
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-def get_db_session():
-    """Create and return a database session."""
-    engine = create_engine(settings.DATABASE_URL)
-    SessionLocal = sessionmaker(bind=engine)
+def get_db_session() -> Session:
+    """Create and return a database session on the shared engine."""
     return SessionLocal()
 
-def aggregate_defect_data():
+def report_window(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    days: Optional[int] = None
+):
+    """
+    Resolve a report period into a half-open [start, end) range.
+    
+    end defaults to now and start to `days` (BATCH_REPORT_DAYS) before end.
+    """
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(days=days or settings.BATCH_REPORT_DAYS)
+    return start, end
+
+def aggregation_query(start: datetime, end: datetime, cell_size: float, top_areas: int):
+    """
+    One grouped scan of the period producing both report sections.
+    
+    GROUPING SETS groups the defects of the window by type and by grid cell
+    (cell_size degrees square) in the same pass; the per-type rows and the
+    top_areas cells with the most critical defects are then selected from
+    that single result.
+    """
+    lat_cell = func.floor(Defect.latitude / cell_size)
+    lng_cell = func.floor(Defect.longitude / cell_size)
+    
+    grouped = select(
+        Defect.defect_type,
+        lat_cell.label("lat_cell"),
+        lng_cell.label("lng_cell"),
+        # 1 on per-cell rows, where defect_type is aggregated away
+        func.grouping(Defect.defect_type).label("is_cell"),
+        func.count().label("defect_count"),
+        func.count().filter(Defect.severity == SeverityLevel.CRITICAL).label("critical_count")
+    ).where(
+        Defect.reported_at >= start,
+        Defect.reported_at < end
+    ).group_by(
+        func.grouping_sets(tuple_(Defect.defect_type), tuple_(lat_cell, lng_cell))
+    ).cte("grouped")
+    
+    type_rows = select(grouped).where(grouped.c.is_cell == 0)
+    critical_cells = select(grouped).where(
+        grouped.c.is_cell == 1,
+        grouped.c.critical_count > 0
+    ).order_by(
+        grouped.c.critical_count.desc(),
+        grouped.c.defect_count.desc()
+    ).limit(top_areas)
+    return union_all(type_rows, critical_cells.subquery().select())
+
+def aggregate_defect_data(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    days: Optional[int] = None,
+    cell_size: Optional[float] = None,
+    top_areas: Optional[int] = None,
+    store: bool = True
+) -> Dict[str, Any]:
     """
     Aggregate defect data for analytics.
+    
+    Counts defects by type over the period [start, end) (the last
+    BATCH_REPORT_DAYS days by default) and finds the grid cells of
+    cell_size degrees with the most critical defects, all from one grouped
+    query. With store=True the report is written to S3.
     This could be expanded to generate reports, update dashboards, etc.
     """
+    start, end = report_window(start, end, days)
+    cell_size = cell_size or settings.BATCH_CRITICAL_CELL_DEGREES
+    top_areas = top_areas or settings.BATCH_CRITICAL_AREAS
+    
     session = get_db_session()
     try:
-        # Get data for the past 30 days
-        thirty_days_ago = datetime.now() - timedelta(days=30)
+        defect_counts = {defect_type.value: 0 for defect_type in DefectType}
+        critical_areas_list = []
         
-        # Count defects by type
-        defect_counts = {}
-        for defect_type in DefectType:
-            count = session.query(func.count(Defect.id)).filter(
-                and_(
-                    Defect.defect_type == defect_type,
-                    Defect.reported_at >= thirty_days_ago
-                )
-            ).scalar()
-            defect_counts[defect_type.value] = count
-        
-        # Get most severe areas (areas with critical defects)
-        critical_areas = session.query(
-            Defect.latitude, 
-            Defect.longitude,
-            func.count(Defect.id).label('defect_count')
-        ).filter(
-            and_(
-                Defect.severity == SeverityLevel.CRITICAL,
-                Defect.reported_at >= thirty_days_ago
-            )
-        ).group_by(
-            Defect.latitude, 
-            Defect.longitude
-        ).order_by(
-            func.count(Defect.id).desc()
-        ).limit(10).all()
-        
-        # Format the results
-        critical_areas_list = [
-            {
-                'latitude': area[0],
-                'longitude': area[1],
-                'defect_count': area[2]
-            }
-            for area in critical_areas
-        ]
+        for row in session.execute(aggregation_query(start, end, cell_size, top_areas)):
+            if not row.is_cell:
+                defect_counts[row.defect_type.value] = row.defect_count
+            else:
+                # Cells are reported at their center
+                critical_areas_list.append({
+                    'latitude': round((row.lat_cell + 0.5) * cell_size, 6),
+                    'longitude': round((row.lng_cell + 0.5) * cell_size, 6),
+                    'defect_count': row.critical_count,
+                    'total_defect_count': row.defect_count
+                })
+        critical_areas_list.sort(key=lambda area: (-area['defect_count'], -area['total_defect_count']))
         
         # Create a summary report
         report = {
-            'generated_at': datetime.now().isoformat(),
-            'period': '30 days',
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+            'period': f'{(end - start).total_seconds() / 86400:g} days',
+            'period_start': start.isoformat(),
+            'period_end': end.isoformat(),
+            'cell_size_degrees': cell_size,
             'defect_counts': defect_counts,
             'critical_areas': critical_areas_list
         }
         
-        # Store the report in S3
-        s3 = boto3.client('s3', region_name=settings.AWS_REGION)
-        report_key = f'reports/{datetime.now().strftime("%Y-%m-%d")}_defect_report.json'
-        
-        s3.put_object(
-            Bucket=settings.S3_BUCKET,
-            Key=report_key,
-            Body=json.dumps(report),
-            ContentType='application/json'
-        )
-        
-        logger.info(f"Report generated and stored at {report_key}")
+        if store:
+            # Store the report in S3
+            # boto3 is slow to import; only load it when a report is uploaded
+            import boto3
+            s3 = boto3.client('s3', region_name=settings.AWS_REGION)
+            report_key = f'reports/{end.strftime("%Y-%m-%d")}_defect_report.json'
+            
+            s3.put_object(
+                Bucket=settings.S3_BUCKET,
+                Key=report_key,
+                Body=json.dumps(report),
+                ContentType='application/json'
+            )
+            
+            logger.info(f"Report generated and stored at {report_key}")
         return report
         
     except Exception as e:
@@ -95,11 +141,25 @@ def aggregate_defect_data():
     finally:
         session.close()
 
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
 def handler(event, context):
     """AWS Lambda handler for batch processing."""
     logger.info("Starting batch processing job")
+    # Optional period and grid overrides from the invocation event:
+    # {"start": ISO datetime, "end": ISO datetime, "days": int, "cell_size": float}
+    event = event or {}
     try:
-        report = aggregate_defect_data()
+        report = aggregate_defect_data(
+            start=_parse_time(event.get('start')),
+            end=_parse_time(event.get('end')),
+            days=event.get('days'),
+            cell_size=event.get('cell_size')
+        )
         return {
             'statusCode': 200,
             'body': json.dumps({
@@ -0,0 +1,438 @@
+import enum
+import hashlib
+import io
+import logging
+import time
+from datetime import datetime, timezone
+from itertools import islice
+from operator import itemgetter, methodcaller
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.defect import Defect, DefectType, SeverityLevel
+
+logger = logging.getLogger(__name__)
+
+# Map external defect type descriptions to the internal enum
+# Anything not listed here is stored as DefectType.OTHER
+DEFECT_TYPE_MAPPING = {
+    "minor pothole": DefectType.POTHOLE,
+    "pothole": DefectType.POTHOLE,
+    "crack": DefectType.CRACK,
+    "damaged pavement": DefectType.DAMAGED_PAVEMENT,
+    "water logging": DefectType.WATER_LOGGING,
+    "missing manhole": DefectType.MISSING_MANHOLE
+}
+
+REQUIRED_FIELDS = ("vehicle_id", "timestamp", "coordinates", "defect_type")
+_REQUIRED = frozenset(REQUIRED_FIELDS)
+
+# Severity lookup by lowercase value, avoids raising ValueError per row
+_SEVERITY_BY_VALUE = {severity.value: severity for severity in SeverityLevel}
+
+# Columns written for each ingested row, in COPY order
+_COLUMNS = ("vehicle_id", "defect_type", "severity", "latitude", "longitude", "notes", "reported_at", "dedup_key")
+
+
+class InvalidEntry:
+    """Placeholder for an entry that could not be parsed, reported as a failed entry."""
+    __slots__ = ("error",)
+
+    def __init__(self, error: str):
+        self.error = error
+
+
+class InsertMethod(str, enum.Enum):
+    """Strategy used to write a validated chunk to the database."""
+    VALUES = "values"  # multi-row INSERT ... VALUES
+    COPY = "copy"      # COPY into a temp staging table, then INSERT ... SELECT
+
+
+# Multi-row INSERT with the geography computed server-side from the coordinates
+# SQLAlchemy batches the parameter sets into INSERT ... VALUES (...), (...) pages
+# Rows whose dedup key already exists are skipped; RETURNING tells how many were new
+_INSERT_STMT = insert(Defect.__table__).values(
+    location=func.ST_SetSRID(func.ST_MakePoint(bindparam("lng"), bindparam("lat")), 4326)
+).on_conflict_do_nothing(index_elements=["dedup_key"]).returning(Defect.__table__.c.id)
+
+_STAGING_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS defects_ingest_staging (
+    vehicle_id text,
+    defect_type text,
+    severity text,
+    latitude double precision,
+    longitude double precision,
+    notes text,
+    reported_at timestamptz,
+    dedup_key text
+) ON COMMIT DELETE ROWS
+"""
+
+_STAGING_COPY = (
+    "COPY defects_ingest_staging ({}) FROM STDIN WITH (FORMAT csv)".format(", ".join(_COLUMNS))
+)
+
+_STAGING_INSERT = """
+INSERT INTO defects (vehicle_id, defect_type, severity, latitude, longitude, location, notes, reported_at, dedup_key)
+SELECT vehicle_id, defect_type::defecttype, severity::severitylevel, latitude, longitude,
+       ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography, notes, reported_at, dedup_key
+FROM defects_ingest_staging
+ON CONFLICT (dedup_key) DO NOTHING
+"""
+
+
+def dedup_key(
+    vehicle_id: Optional[str],
+    reported_at: Optional[datetime],
+    latitude: float,
+    longitude: float,
+    idempotency_key: Optional[str] = None
+) -> Optional[str]:
+    """
+    Deduplication key of an uploaded detection.
+
+    A client-supplied idempotency key identifies the upload on its own
+    (scoped to the vehicle). Otherwise the key is derived from vehicle_id,
+    reported_at (in UTC) and the coordinates rounded to
+    INGEST_DEDUP_COORD_DECIMALS places, so a retried upload of the same
+    detection maps to the same key. Returns None, meaning no deduplication,
+    for detections without a vehicle.
+    """
+    if idempotency_key is not None:
+        raw = f"key|{vehicle_id}|{idempotency_key}"
+    elif vehicle_id is None or reported_at is None:
+        return None
+    else:
+        if reported_at.tzinfo is not None:
+            reported_at = reported_at.astimezone(timezone.utc)
+        digits = settings.INGEST_DEDUP_COORD_DECIMALS
+        raw = f"{vehicle_id}|{reported_at.isoformat()}|{latitude:.{digits}f}|{longitude:.{digits}f}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+class _Rejected:
+    """A column value that fails validation, with the error to report."""
+    __slots__ = ("error",)
+
+    def __init__(self, error: str):
+        self.error = error
+
+
+# Stands in for an absent optional field in a column
+_MISSING = object()
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def _defect_type(value: Any) -> Any:
+    try:
+        return DEFECT_TYPE_MAPPING.get(value.lower(), DefectType.OTHER)
+    except AttributeError as e:
+        return _Rejected(str(e))
+
+
+def _severity(value: Any) -> Any:
+    if value is _MISSING:
+        return SeverityLevel.MEDIUM
+    return _SEVERITY_BY_VALUE.get(str(value).lower()) or _Rejected("Invalid severity level")
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float))
+
+
+def _lookup_distinct(values: List[Any], lookup: Callable[[Any], Any]) -> List[Any]:
+    """Map a column through lookup, calling it once per distinct value."""
+    try:
+        table = {value: lookup(value) for value in set(values)}
+    except TypeError:
+        # Unhashable values (e.g. a list where a string belongs)
+        return list(map(lookup, values))
+    return list(map(table.__getitem__, values))
+
+
+def validate_entries(
+    entries: List[Any],
+    start_index: int = 0,
+    dedup: bool = True
+) -> Tuple[List[Dict[str, Any]], List[int], List[Dict[str, Any]]]:
+    """
+    Validate a list of raw upload entries column by column.
+
+    Returns a tuple of (rows, indexes, failed_entries) where rows are column
+    dicts ready for insertion, indexes holds the original position of each
+    row in the upload, and failed_entries uses the same {"index", "error"}
+    shape the bulk upload endpoint has always reported. With dedup each row
+    gets a dedup_key, from the entry's optional idempotency_key if present.
+
+    Only the structure of each entry is checked one by one; the fields are
+    then pulled out as columns and checked a column at a time, with NumPy
+    masks for the coordinate ranges and one enum lookup per distinct type
+    or severity. Each entry reports the first check it fails, in the order
+    timestamp, coordinates, severity, defect type.
+    """
+    import numpy as np
+
+    failed: Dict[int, str] = {}
+    positions = []
+    docs = []
+    for idx, entry in enumerate(entries, start_index):
+        if isinstance(entry, InvalidEntry):
+            failed[idx] = entry.error
+        elif isinstance(entry, dict) and entry.keys() >= _REQUIRED:
+            positions.append(idx)
+            docs.append(entry)
+        else:
+            failed[idx] = "Missing required fields"
+
+    count = len(docs)
+    valid = np.ones(count, dtype=bool)
+
+    def reject(mask, error):
+        for i in np.flatnonzero(valid & mask):
+            failed[positions[i]] = error
+        valid[mask] = False
+
+    def rejected(column):
+        return np.fromiter((type(value) is _Rejected for value in column), dtype=bool, count=count)
+
+    timestamps = list(map(_parse_timestamp, map(itemgetter("timestamp"), docs)))
+    reject(np.fromiter((t is None for t in timestamps), dtype=bool, count=count), "Invalid timestamp format")
+
+    # Uploads are normally uniform, so the per-entry type checks are only
+    # made when the set of types in a column shows something unexpected
+    coordinates = list(map(itemgetter("coordinates"), docs))
+    if not (set(map(type, coordinates)) <= {list} and set(map(len, coordinates)) <= {2}):
+        shaped = np.fromiter((isinstance(c, list) and len(c) == 2 for c in coordinates), dtype=bool, count=count)
+        reject(~shaped, "Coordinates must be [latitude, longitude]")
+        coordinates = [c if ok else (0, 0) for c, ok in zip(coordinates, shaped)]
+    lats = list(map(itemgetter(0), coordinates))
+    lngs = list(map(itemgetter(1), coordinates))
+    numeric = np.ones(count, dtype=bool)
+    if not set(map(type, lats)) | set(map(type, lngs)) <= {int, float}:
+        numeric = np.fromiter((_is_number(a) and _is_number(b) for a, b in zip(lats, lngs)), dtype=bool, count=count)
+        lats = [a if ok else 0 for a, ok in zip(lats, numeric)]
+        lngs = [b if ok else 0 for b, ok in zip(lngs, numeric)]
+    lat = np.array(lats, dtype=float)
+    lng = np.array(lngs, dtype=float)
+    # Written as the ranges that pass, so NaN fails them
+    in_range = (lat >= -90) & (lat <= 90) & (lng >= -180) & (lng <= 180)
+    reject(~(numeric & in_range), "Invalid coordinates")
+
+    severities = _lookup_distinct(list(map(methodcaller("get", "severity", _MISSING), docs)), _severity)
+    reject(rejected(severities), "Invalid severity level")
+
+    defect_types = _lookup_distinct(list(map(itemgetter("defect_type"), docs)), _defect_type)
+    for i in np.flatnonzero(valid & rejected(defect_types)):
+        failed[positions[i]] = defect_types[i].error
+        valid[i] = False
+
+    rows = []
+    indexes = []
+    for i in np.flatnonzero(valid).tolist():
+        entry = docs[i]
+        lat_i, lng_i = lats[i], lngs[i]
+        key = None
+        if dedup:
+            idempotency_key = entry.get("idempotency_key")
+            key = dedup_key(
+                entry["vehicle_id"], timestamps[i], lat_i, lng_i,
+                None if idempotency_key is None else str(idempotency_key)
+            )
+        rows.append({
+            "vehicle_id": entry["vehicle_id"],
+            "defect_type": defect_types[i],
+            "severity": severities[i],
+            "latitude": lat_i,
+            "longitude": lng_i,
+            "lat": lat_i,
+            "lng": lng_i,
+            "notes": entry.get("notes"),
+            "reported_at": timestamps[i],
+            "dedup_key": key
+        })
+        indexes.append(positions[i])
+
+    failed_entries = [{"index": idx, "error": error} for idx, error in sorted(failed.items())]
+    return rows, indexes, failed_entries
+
+
+def _write_values(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """Write rows with multi-row INSERT statements; returns the number of rows inserted."""
+    return len(db.execute(_INSERT_STMT, rows).all())
+
+
+def _copy_field(value: Any) -> str:
+    """
+    One field of a COPY csv line. None is a bare empty field, which COPY
+    reads as NULL; strings are always quoted, so "" stays an empty string.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return '"' + value.replace('"', '""') + '"'
+    return str(value)
+
+
+def _write_copy(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """Write rows by streaming them through COPY into a staging table."""
+    buffer = io.StringIO()
+    for row in rows:
+        # Enum columns are stored by name in PostgreSQL
+        buffer.write(",".join(_copy_field(value) for value in (
+            row["vehicle_id"],
+            row["defect_type"].name,
+            row["severity"].name,
+            row["latitude"],
+            row["longitude"],
+            row["notes"],
+            row["reported_at"].isoformat(),
+            row["dedup_key"]
+        )))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    cursor = db.connection().connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(_STAGING_DDL)
+        cursor.copy_expert(_STAGING_COPY, buffer)
+        cursor.execute(_STAGING_INSERT)
+        inserted = cursor.rowcount
+    finally:
+        cursor.close()
+    return inserted
+
+
+_WRITERS = {
+    InsertMethod.VALUES: _write_values,
+    InsertMethod.COPY: _write_copy,
+}
+
+
+def _write_chunk(
+    db: Session,
+    writer: Callable[[Session, List[Dict[str, Any]]], int],
+    rows: List[Dict[str, Any]],
+    indexes: List[int],
+    failed_entries: List[Dict[str, Any]]
+) -> int:
+    """
+    Write and commit one chunk, returning the number of rows inserted (rows
+    skipped as duplicates are not counted). If the chunk is rejected by the
+    database the rows are retried one at a time so failures are reported per
+    entry.
+    """
+    # COPY runs on the raw DBAPI cursor, whose errors SQLAlchemy does not wrap
+    database_errors = (SQLAlchemyError, db.get_bind().dialect.loaded_dbapi.Error)
+    try:
+        inserted = writer(db, rows)
+        db.commit()
+        return inserted
+    except database_errors as e:
+        db.rollback()
+        logger.warning(f"Bulk chunk rejected, retrying row by row: {e}")
+
+    inserted = 0
+    for idx, row in zip(indexes, rows):
+        try:
+            inserted += _write_values(db, [row])
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            error = getattr(e, "orig", None) or e
+            failed_entries.append({"index": idx, "error": str(error).strip()})
+    return inserted
+
+
+def ingest_entries(
+    db: Session,
+    entries: Iterable[Any],
+    chunk_size: Optional[int] = None,
+    method: Optional[InsertMethod] = None,
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    dedup: Optional[bool] = None
+) -> Dict[str, Any]:
+    """
+    Validate and insert defect upload entries in chunks.
+
+    Parameters:
+    - db: Database session, committed once per chunk
+    - entries: Any iterable of raw upload entries (dicts parsed from JSON)
+    - chunk_size: Rows validated and written per chunk (default from settings)
+    - method: InsertMethod used to write each chunk (default from settings)
+    - progress_callback: Optional callable invoked with each chunk report
+    - dedup: Skip entries already ingested, by dedup key (default from settings)
+
+    Returns a summary with processed/success/failed counts, the number of
+    duplicates skipped, the per-row failed_entries and a per-chunk progress
+    list.
+    """
+    chunk_size = chunk_size or settings.BULK_INGEST_CHUNK_SIZE
+    dedup = settings.INGEST_DEDUP if dedup is None else dedup
+    method = InsertMethod(method or settings.BULK_INGEST_METHOD)
+    writer = _WRITERS[method]
+
+    processed_count = 0
+    success_count = 0
+    duplicates_skipped = 0
+    failed_entries = []
+    chunks = []
+
+    iterator = iter(entries)
+    while True:
+        batch = list(islice(iterator, chunk_size))
+        if not batch:
+            break
+
+        started = time.perf_counter()
+        failed_before = len(failed_entries)
+        rows, indexes, failed = validate_entries(batch, processed_count, dedup)
+        failed_entries.extend(failed)
+
+        inserted = 0
+        duplicates = 0
+        if rows:
+            failed_before_write = len(failed_entries)
+            inserted = _write_chunk(db, writer, rows, indexes, failed_entries)
+            # Valid rows neither inserted nor rejected hit an existing dedup key
+            duplicates = len(rows) - inserted - (len(failed_entries) - failed_before_write)
+
+        report = {
+            "chunk": len(chunks),
+            "start_index": processed_count,
+            "rows": len(batch),
+            "inserted": inserted,
+            "duplicates": duplicates,
+            "failed": len(failed_entries) - failed_before,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+        chunks.append(report)
+        logger.info(
+            f"Bulk ingest chunk {report['chunk']}: {inserted}/{len(batch)} rows "
+            f"inserted, {duplicates} duplicates skipped in {report['elapsed_ms']} ms ({method.value})"
+        )
+        if progress_callback:
+            progress_callback(report)
+
+        processed_count += len(batch)
+        success_count += inserted
+        duplicates_skipped += duplicates
+
+    return {
+        "processed_count": processed_count,
+        "success_count": success_count,
+        "duplicates_skipped": duplicates_skipped,
+        "failed_count": len(failed_entries),
+        "failed_entries": failed_entries,
+        "chunks": chunks
+    }
@@ -0,0 +1,295 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import orjson
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+from app.core.request_metrics import serialization_timer
+
+CACHE_BACKENDS = ("local", "redis", "none")
+
+# Cached value: serialized JSON body
+CacheEntry = bytes
+
+
+class CacheStats:
+    """Hit, miss and eviction counters for one cache."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def count(self, hits: int = 0, misses: int = 0, evictions: int = 0):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.evictions += evictions
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+class NullCache:
+    """Cache that stores nothing; it still keeps the data version."""
+
+    name = "none"
+    # Whether the data version counts the writes of every process
+    shared_version = False
+
+    def __init__(self):
+        self.stats = CacheStats()
+        self._version = 0
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        self.stats.count(misses=1)
+        return None
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        pass
+
+    async def version(self) -> int:
+        return self._version
+
+    async def bump_version(self) -> int:
+        self._version += 1
+        return self._version
+
+    async def stamp(self) -> str:
+        """
+        Data version stamp for HTTP ETags.
+
+        The version only counts this process's writes, so the stamp also
+        changes every CACHE_TTL_SECONDS: a response validated against it is
+        never stale for longer than a cached entry could be.
+        """
+        return f"{await self.version()}.{int(time.time() // settings.CACHE_TTL_SECONDS)}"
+
+    async def size(self) -> Optional[int]:
+        return 0
+
+
+class LocalCache(NullCache):
+    """
+    In-process LRU cache with a per-entry TTL.
+
+    The data version lives in the process too, so writes served by another
+    process (e.g. another Lambda instance) are only picked up once entries
+    expire after ttl seconds.
+    """
+
+    name = "local"
+
+    def __init__(self, max_entries: int, ttl: float):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, CacheEntry]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and item[0] < time.monotonic():
+                del self._entries[key]
+                self.stats.count(evictions=1)
+                item = None
+            if item is None:
+                self.stats.count(misses=1)
+                return None
+            self._entries.move_to_end(key)
+        self.stats.count(hits=1)
+        return item[1]
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, entry)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            self.stats.count(evictions=evicted)
+
+    async def bump_version(self) -> int:
+        # Entries of older versions can never be hit again; drop them now
+        with self._lock:
+            dropped = len(self._entries)
+            self._entries.clear()
+            self._version += 1
+        if dropped:
+            self.stats.count(evictions=dropped)
+        return self._version
+
+    async def size(self) -> Optional[int]:
+        return len(self._entries)
+
+
+class FakeRedis:
+    """
+    Minimal in-process stand-in for redis.asyncio.Redis (get, set with ex,
+    incr, dbsize), used for CACHE_REDIS_URL=memory:// in tests and local runs.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Optional[float], bytes]] = {}
+
+    def _live(self, key):
+        item = self._data.get(key)
+        if item is not None and item[0] is not None and item[0] < time.monotonic():
+            del self._data[key]
+            return None
+        return item
+
+    async def get(self, key: str) -> Optional[bytes]:
+        item = self._live(key)
+        return item[1] if item else None
+
+    async def set(self, key: str, value, ex: Optional[int] = None) -> bool:
+        if isinstance(value, str):
+            value = value.encode()
+        elif isinstance(value, int):
+            value = str(value).encode()
+        self._data[key] = (time.monotonic() + ex if ex else None, value)
+        return True
+
+    async def incr(self, key: str) -> int:
+        item = self._live(key)
+        value = int(item[1]) + 1 if item else 1
+        self._data[key] = (item[0] if item else None, str(value).encode())
+        return value
+
+    async def dbsize(self) -> int:
+        return sum(1 for key in list(self._data) if self._live(key))
+
+
+class RedisCache(NullCache):
+    """
+    Cache shared by all API processes through Redis.
+
+    Entries expire after ttl seconds and eviction under memory pressure is
+    left to Redis, so only hits and misses are counted here. The data
+    version is a Redis counter, so a write on any process invalidates the
+    cache for all of them.
+    """
+
+    name = "redis"
+    shared_version = True
+
+    def __init__(self, client, ttl: float, prefix: str = "roadmetrics:cache:"):
+        super().__init__()
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        raw = await self.client.get(self.prefix + key)
+        if raw is None:
+            self.stats.count(misses=1)
+            return None
+        self.stats.count(hits=1)
+        return raw
+
+    async def set(self, key: str, entry: CacheEntry) -> None:
+        await self.client.set(self.prefix + key, entry, ex=int(self.ttl))
+
+    async def version(self) -> int:
+        return int(await self.client.get(self.prefix + "version") or 0)
+
+    async def bump_version(self) -> int:
+        return await self.client.incr(self.prefix + "version")
+
+    async def stamp(self) -> str:
+        # The shared counter sees every process's writes
+        return str(await self.version())
+
+    async def size(self) -> Optional[int]:
+        return None
+
+
+@lru_cache(maxsize=None)
+def get_cache() -> NullCache:
+    """The response cache selected by CACHE_BACKEND, created on first use."""
+    backend = settings.CACHE_BACKEND
+    if backend not in CACHE_BACKENDS:
+        raise ValueError(f"CACHE_BACKEND must be one of {CACHE_BACKENDS}, got {backend!r}")
+    if backend == "none":
+        return NullCache()
+    if backend == "local":
+        return LocalCache(settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS)
+    if settings.CACHE_REDIS_URL.startswith("memory://"):
+        client = FakeRedis()
+    else:
+        # redis is optional; imported only when configured
+        from redis import asyncio as redis_asyncio
+        client = redis_asyncio.from_url(settings.CACHE_REDIS_URL)
+    return RedisCache(client, settings.CACHE_TTL_SECONDS)
+
+
+async def invalidate_cache() -> None:
+    """Bump the data version after a write so cached analytics are recomputed."""
+    await get_cache().bump_version()
+
+
+def cache_key(namespace: str, request: Request, version: int) -> str:
+    """Key for a response: endpoint namespace, data version and the sorted, non-empty query parameters."""
+    params = sorted((k, v) for k, v in request.query_params.multi_items() if v != "")
+    digest = hashlib.sha1(json.dumps(params).encode()).hexdigest()
+    return f"{namespace}:v{version}:{digest}"
+
+
+def _render(data: Any) -> bytes:
+    # Same encoding as the app's default TimedJSONResponse
+    with serialization_timer():
+        return orjson.dumps(jsonable_encoder(data), option=orjson.OPT_NON_STR_KEYS)
+
+
+async def cached_json_response(
+    request: Request,
+    namespace: str,
+    compute: Callable[[], Awaitable[Any]]
+) -> Response:
+    """
+    Serve a JSON response from the cache, computing and storing it on a miss.
+
+    X-Cache tells whether the cache was hit. ETags and 304 answers are left
+    to the route's http_cache() policy, which checks the data version
+    before the cache is consulted.
+    """
+    cache = get_cache()
+    key = cache_key(namespace, request, await cache.version())
+    body = await cache.get(key)
+    status = "HIT"
+    if body is None:
+        status = "MISS"
+        body = _render(await compute())
+        await cache.set(key, body)
+
+    return Response(content=body, media_type="application/json", headers={"X-Cache": status})
+
+
+async def cache_status() -> Dict[str, Any]:
+    """Backend, size, data version and counters of the response cache."""
+    cache = get_cache()
+    return {
+        "backend": cache.name,
+        "entries": await cache.size(),
+        "version": await cache.version(),
+        **cache.stats.as_dict(),
+    }
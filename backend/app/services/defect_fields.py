@@ -0,0 +1,54 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from app.models.defect import Defect
+
+# Columns of the Defect response schema, in its field order. The list
+# endpoint selects these directly, skipping the location geography
+DEFECT_FIELDS = {
+    "defect_type": Defect.defect_type,
+    "severity": Defect.severity,
+    "latitude": Defect.latitude,
+    "longitude": Defect.longitude,
+    "notes": Defect.notes,
+    "id": Defect.id,
+    "vehicle_id": Defect.vehicle_id,
+    "reported_at": Defect.reported_at,
+    "updated_at": Defect.updated_at,
+}
+
+
+class InvalidFields(ValueError):
+    """A sparse fieldset names a field that does not exist."""
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """
+    Field names of a comma-separated sparse fieldset, in schema order.
+
+    None or an empty string selects every field.
+    """
+    if not fields:
+        return list(DEFECT_FIELDS)
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - DEFECT_FIELDS.keys()
+    if unknown:
+        raise InvalidFields(
+            f"Unknown fields: {', '.join(sorted(unknown))}; choose from {', '.join(DEFECT_FIELDS)}"
+        )
+    return [name for name in DEFECT_FIELDS if name in requested]
+
+
+def field_columns(names: Sequence[str]) -> list:
+    """Columns to select for the given fields."""
+    return [DEFECT_FIELDS[name] for name in names]
+
+
+def rows_to_dicts(rows: Iterable[Sequence[Any]], names: Sequence[str]) -> List[Dict[str, Any]]:
+    """
+    Response dicts from column tuples selected with field_columns(names).
+
+    Rows come straight from the database, so they are not re-validated
+    against the schema; enums and datetimes are left to the JSON encoder.
+    """
+    names = tuple(names)
+    return [dict(zip(names, row)) for row in rows]
@@ -0,0 +1,71 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from geoalchemy2 import Geography
+from sqlalchemy import Float, Integer, cast, column, func, select, values
+from sqlalchemy.orm import Session
+
+from app.models.defect import Defect, DefectType, SeverityLevel
+
+
+def density_counts(
+    db: Session,
+    centers: Sequence[Tuple[float, float, float]],
+    defect_type: Optional[DefectType] = None,
+    severity: Optional[SeverityLevel] = None
+) -> List[Dict[str, Any]]:
+    """
+    Count defects within a radius of one or more centers in a single query.
+
+    `centers` holds (lat, lng, radius_meters) tuples. The centers are joined
+    to defects with ST_DWithin, which can use the GiST index on location,
+    and counts are grouped by center, type and severity in SQL. Returns one
+    density result per center, in the order given.
+    """
+    center_rows = values(
+        column("idx", Integer),
+        column("lat", Float),
+        column("lng", Float),
+        column("radius", Float),
+        name="centers"
+    ).data([(idx, float(lat), float(lng), float(radius)) for idx, (lat, lng, radius) in enumerate(centers)])
+
+    point = cast(func.ST_SetSRID(func.ST_MakePoint(center_rows.c.lng, center_rows.c.lat), 4326), Geography(srid=4326))
+
+    stmt = select(
+        center_rows.c.idx,
+        Defect.defect_type,
+        Defect.severity,
+        func.count().label("defect_count")
+    ).select_from(
+        center_rows.join(Defect, func.ST_DWithin(Defect.location, point, center_rows.c.radius))
+    ).group_by(
+        center_rows.c.idx, Defect.defect_type, Defect.severity
+    )
+
+    # Apply additional filters
+    if defect_type:
+        stmt = stmt.where(Defect.defect_type == defect_type)
+    if severity:
+        stmt = stmt.where(Defect.severity == severity)
+
+    results = [
+        {
+            "center": {
+                "lat": lat,
+                "lng": lng
+            },
+            "radius_meters": radius,
+            "total_count": 0,
+            "by_type": {t.value: 0 for t in DefectType},
+            "by_severity": {s.value: 0 for s in SeverityLevel}
+        }
+        for lat, lng, radius in centers
+    ]
+
+    for row in db.execute(stmt):
+        result = results[row.idx]
+        result["total_count"] += row.defect_count
+        result["by_type"][row.defect_type.value] += row.defect_count
+        result["by_severity"][row.severity.value] += row.defect_count
+
+    return results
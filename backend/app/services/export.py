@@ -0,0 +1,199 @@
+import csv
+import enum
+import io
+import json
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.defect import Defect
+
+# Exported columns, in output order; location is carried by latitude/longitude
+EXPORT_COLUMNS = (
+    "id",
+    "vehicle_id",
+    "defect_type",
+    "severity",
+    "latitude",
+    "longitude",
+    "notes",
+    "reported_at",
+    "updated_at",
+)
+
+
+class ExportFormat(str, enum.Enum):
+    """Output format of a defect export."""
+    CSV = "csv"
+    NDJSON = "ndjson"
+    GEOJSON = "geojson"
+    PARQUET = "parquet"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.GEOJSON: "application/geo+json",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+}
+
+
+class ExportUnavailable(RuntimeError):
+    """Raised when an export format needs an optional dependency that is not installed."""
+
+
+def check_format_available(export_format: ExportFormat) -> None:
+    """Fail before streaming starts if the format cannot be produced."""
+    if export_format == ExportFormat.PARQUET:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ExportUnavailable("Parquet export requires pyarrow to be installed")
+
+
+def _record(row) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "vehicle_id": row.vehicle_id,
+        "defect_type": row.defect_type.value,
+        "severity": row.severity.value,
+        "latitude": row.latitude,
+        "longitude": row.longitude,
+        "notes": row.notes,
+        "reported_at": row.reported_at.isoformat() if row.reported_at else None,
+        "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+    }
+
+
+def _csv_chunks(batches: Iterator[Sequence]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for batch in batches:
+        for row in batch:
+            record = _record(row)
+            writer.writerow(["" if record[c] is None else record[c] for c in EXPORT_COLUMNS])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def _ndjson_chunks(batches: Iterator[Sequence]) -> Iterator[bytes]:
+    for batch in batches:
+        yield "".join(json.dumps(_record(row)) + "\n" for row in batch).encode()
+
+
+def _geojson_chunks(batches: Iterator[Sequence]) -> Iterator[bytes]:
+    yield b'{"type":"FeatureCollection","features":['
+    first = True
+    for batch in batches:
+        features = []
+        for row in batch:
+            properties = _record(row)
+            features.append(json.dumps({
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [row.longitude, row.latitude]},
+                "properties": properties
+            }))
+        if features:
+            yield (("" if first else ",") + ",".join(features)).encode()
+            first = False
+    yield b"]}"
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only file that hands back whatever has been written since the last drain."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _parquet_chunks(batches: Iterator[Sequence]) -> Iterator[bytes]:
+    # Imported lazily: pyarrow is optional and only needed for this format
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("vehicle_id", pa.string()),
+        ("defect_type", pa.dictionary(pa.int8(), pa.string())),
+        ("severity", pa.dictionary(pa.int8(), pa.string())),
+        ("latitude", pa.float64()),
+        ("longitude", pa.float64()),
+        ("notes", pa.string()),
+        ("reported_at", pa.timestamp("us", tz="UTC")),
+        ("updated_at", pa.timestamp("us", tz="UTC")),
+    ])
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        for batch in batches:
+            columns = {
+                "id": [row.id for row in batch],
+                "vehicle_id": [row.vehicle_id for row in batch],
+                "defect_type": [row.defect_type.value for row in batch],
+                "severity": [row.severity.value for row in batch],
+                "latitude": [row.latitude for row in batch],
+                "longitude": [row.longitude for row in batch],
+                "notes": [row.notes for row in batch],
+                "reported_at": [row.reported_at for row in batch],
+                "updated_at": [row.updated_at for row in batch],
+            }
+            # Each batch becomes one row group, flushed to the response as it is written
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+_CHUNKERS = {
+    ExportFormat.CSV: _csv_chunks,
+    ExportFormat.NDJSON: _ndjson_chunks,
+    ExportFormat.GEOJSON: _geojson_chunks,
+    ExportFormat.PARQUET: _parquet_chunks,
+}
+
+
+def export_defects(
+    export_format: ExportFormat,
+    filters: List[Any],
+    batch_size: Optional[int] = None
+) -> Iterator[bytes]:
+    """
+    Stream matching defects encoded as export_format.
+
+    Rows are read through a server-side cursor in batches of batch_size
+    (EXPORT_BATCH_SIZE by default) and encoded batch by batch, so memory
+    stays constant however many rows match. The generator opens its own
+    session, which stays open until the response has been fully sent.
+    """
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    stmt = select(*[getattr(Defect, column) for column in EXPORT_COLUMNS]).where(*filters).order_by(Defect.id)
+
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt, execution_options={"yield_per": batch_size})
+        yield from _CHUNKERS[export_format](result.partitions())
+    finally:
+        db.close()
@@ -0,0 +1,28 @@
+from typing import Any, List, Optional
+
+from app.models.defect import Defect, DefectType, SeverityLevel
+from app.services.spatial import bbox_filter
+
+
+def defect_filters(
+    defect_type: Optional[DefectType] = None,
+    severity: Optional[SeverityLevel] = None,
+    lat_min: Optional[float] = None,
+    lat_max: Optional[float] = None,
+    lng_min: Optional[float] = None,
+    lng_max: Optional[float] = None
+) -> List[Any]:
+    """
+    Conditions for the defect list filters shared by GET /api/defects and
+    the export endpoint.
+
+    The bounding box only applies when all four edges are given.
+    """
+    filters = []
+    if defect_type:
+        filters.append(Defect.defect_type == defect_type)
+    if severity:
+        filters.append(Defect.severity == severity)
+    if None not in (lat_min, lat_max, lng_min, lng_max):
+        filters.append(bbox_filter(lat_min, lat_max, lng_min, lng_max))
+    return filters
@@ -0,0 +1,125 @@
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.defect import Defect, SeverityLevel
+from app.models.rollup import DefectDailyRollup, ROLLUP_CELL_SCALE
+
+# Map severity to heatmap weight
+SEVERITY_WEIGHTS = {
+    SeverityLevel.LOW: 0.5,
+    SeverityLevel.MEDIUM: 1.0,
+    SeverityLevel.HIGH: 1.5,
+    SeverityLevel.CRITICAL: 2.0
+}
+
+# Rollup cells are only merged into grid cells at least this many times
+# larger, keeping the error from their rounded positions small
+ROLLUP_MIN_CELL_FACTOR = 10
+
+
+def cell_size_for_zoom(zoom: int) -> float:
+    """
+    Grid cell size in degrees for a map zoom level.
+
+    Cells are HEATMAP_CELL_PIXELS screen pixels wide on 256px tiles, so the
+    number of cells in a viewport stays roughly constant across zooms.
+    """
+    return 360.0 / 2 ** zoom / (256 / settings.HEATMAP_CELL_PIXELS)
+
+
+def _severity_weight(severity_column):
+    return case(
+        *[(severity_column == severity, weight) for severity, weight in SEVERITY_WEIGHTS.items()],
+        else_=1.0
+    )
+
+
+def heatmap_points(rows) -> List[Dict[str, Any]]:
+    """Format raw defect rows as weighted heatmap points."""
+    return [
+        {
+            "lat": row.latitude,
+            "lng": row.longitude,
+            "weight": SEVERITY_WEIGHTS[row.severity],
+            "type": row.defect_type.value,
+            "reported_at": row.reported_at.isoformat() if row.reported_at else None
+        }
+        for row in rows
+    ]
+
+
+def heatmap_grid(db: Session, filters: List[Any], cell_size: float) -> List[Dict[str, Any]]:
+    """
+    Aggregate defects into cell_size-degree grid cells in SQL.
+
+    Each cell is returned at its center with the summed severity weight and
+    the number of defects it holds.
+    """
+    lat_cell = func.floor(Defect.latitude / cell_size)
+    lng_cell = func.floor(Defect.longitude / cell_size)
+    stmt = select(
+        lat_cell.label("lat_cell"),
+        lng_cell.label("lng_cell"),
+        func.sum(_severity_weight(Defect.severity)).label("weight"),
+        func.count().label("defect_count")
+    ).where(*filters).group_by(lat_cell, lng_cell)
+    return _format_cells(db.execute(stmt), cell_size)
+
+
+def can_use_rollups(cell_size: float, days: Optional[int]) -> bool:
+    """Whether a grid request can be answered from the daily rollups."""
+    return (
+        settings.ANALYTICS_USE_ROLLUPS
+        and not days
+        and cell_size * ROLLUP_CELL_SCALE >= ROLLUP_MIN_CELL_FACTOR
+    )
+
+
+def rollup_heatmap_grid(
+    db: Session,
+    filters: List[Any],
+    cell_size: float,
+    lat_min: Optional[float] = None,
+    lat_max: Optional[float] = None,
+    lng_min: Optional[float] = None,
+    lng_max: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Same grid as heatmap_grid, merged from the rollup table's 0.001° cells.
+
+    `filters` must be expressed on DefectDailyRollup columns.
+    """
+    lat = DefectDailyRollup.lat_cell / float(ROLLUP_CELL_SCALE)
+    lng = DefectDailyRollup.lng_cell / float(ROLLUP_CELL_SCALE)
+    lat_cell = func.floor(lat / cell_size)
+    lng_cell = func.floor(lng / cell_size)
+
+    conditions = list(filters)
+    if None not in (lat_min, lat_max, lng_min, lng_max):
+        conditions += [
+            DefectDailyRollup.lat_cell.between(round(lat_min * ROLLUP_CELL_SCALE), round(lat_max * ROLLUP_CELL_SCALE)),
+            DefectDailyRollup.lng_cell.between(round(lng_min * ROLLUP_CELL_SCALE), round(lng_max * ROLLUP_CELL_SCALE)),
+        ]
+
+    stmt = select(
+        lat_cell.label("lat_cell"),
+        lng_cell.label("lng_cell"),
+        func.sum(DefectDailyRollup.defect_count * _severity_weight(DefectDailyRollup.severity)).label("weight"),
+        func.sum(DefectDailyRollup.defect_count).label("defect_count")
+    ).where(*conditions).group_by(lat_cell, lng_cell).having(func.sum(DefectDailyRollup.defect_count) > 0)
+    return _format_cells(db.execute(stmt), cell_size)
+
+
+def _format_cells(rows, cell_size: float) -> List[Dict[str, Any]]:
+    return [
+        {
+            "lat": (row.lat_cell + 0.5) * cell_size,
+            "lng": (row.lng_cell + 0.5) * cell_size,
+            "weight": float(row.weight),
+            "count": int(row.defect_count)
+        }
+        for row in rows
+    ]
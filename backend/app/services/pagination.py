@@ -0,0 +1,73 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import Select, and_, or_, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.defect import Defect
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+# Stable newest-first order shared by offset and cursor pagination. DESC puts
+# rows without a reported_at first, matching a backward scan of the
+# (reported_at, id) index.
+DEFECT_ORDER = (Defect.reported_at.desc(), Defect.id.desc())
+
+
+def encode_cursor(reported_at: Optional[datetime], defect_id: int) -> str:
+    """Encode the position after a row as an opaque, URL-safe cursor."""
+    payload = json.dumps([reported_at.isoformat() if reported_at else None, defect_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """Decode a cursor produced by encode_cursor into (reported_at, id)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        reported_at, defect_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if reported_at is not None:
+            reported_at = datetime.fromisoformat(reported_at)
+        if not isinstance(defect_id, int):
+            raise TypeError("cursor id must be an integer")
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+    return reported_at, defect_id
+
+
+def after_cursor(reported_at: Optional[datetime], defect_id: int):
+    """
+    Filter for the rows that follow a cursor position in DEFECT_ORDER.
+
+    For timestamped positions this is a single row comparison the index can
+    seek to. Rows without a reported_at come first, so only a cursor inside
+    that (normally empty) group needs the broader condition.
+    """
+    if reported_at is None:
+        return or_(
+            and_(Defect.reported_at.is_(None), Defect.id < defect_id),
+            Defect.reported_at.isnot(None)
+        )
+    return tuple_(Defect.reported_at, Defect.id) < tuple_(reported_at, defect_id)
+
+
+def estimate_count(db: Session, stmt: Select) -> int:
+    """
+    Planner row estimate for a statement, without running COUNT(*).
+
+    The estimate comes from EXPLAIN and table statistics, so it is cheap on
+    any table size but only as accurate as the last ANALYZE.
+    """
+    compiled = stmt.compile(
+        dialect=db.get_bind().dialect,
+        compile_kwargs={"literal_binds": True}
+    )
+    plan: Any = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}").scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,177 @@
+"""
+Compact binary point feed for rendering large numbers of defects on the map.
+
+Payload layout (version 1), all values little-endian so browsers can view
+the columns with typed arrays without copying:
+
+    offset       size  type        contents
+    0            4     bytes       magic b"RMPF"
+    4            2     uint16      format version (1)
+    6            2     uint16      flags (0, reserved)
+    8            4     uint32      n, the number of points
+    12           4     uint32      reserved (0); pads the header to 16 bytes
+    16           4n    float32[n]  latitude
+    16 + 4n      4n    float32[n]  longitude
+    16 + 8n      4n    uint32[n]   reported_at, seconds since the Unix epoch (0 if unknown)
+    16 + 12n     n     uint8[n]    defect type code
+    16 + 13n     n     uint8[n]    severity code
+
+The payload is 16 + 14n bytes. Every column starts at a multiple of 4, e.g.
+new Float32Array(buffer, 16, n) for latitudes. Codes are positions in the
+DefectType and SeverityLevel declaration order (TYPE_CODES, SEVERITY_CODES),
+so severity codes sort from low to critical. Points are newest first.
+
+The columns are produced by PostgreSQL: a binary COPY of fixed-width
+columns is viewed as a NumPy structured array and converted column by
+column, without building a Python object per row. decode_points() reads a
+payload back into NumPy arrays.
+"""
+import io
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import BigInteger, SmallInteger, case, cast, func, select
+from sqlalchemy.dialects.postgresql import REAL
+from sqlalchemy.orm import Session
+
+from app.models.defect import Defect, DefectType, SeverityLevel
+from app.services.pagination import DEFECT_ORDER
+
+POINT_FEED_MEDIA_TYPE = "application/vnd.roadmetrics.points"
+
+MAGIC = b"RMPF"
+VERSION = 1
+HEADER_SIZE = 16
+
+TYPE_CODES = {defect_type: code for code, defect_type in enumerate(DefectType)}
+SEVERITY_CODES = {severity: code for code, severity in enumerate(SeverityLevel)}
+
+# Binary COPY framing: 11-byte signature, int32 flags, int32 header extension length
+_COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+_COPY_HEADER_SIZE = len(_COPY_SIGNATURE) + 8
+
+
+class InvalidPayload(ValueError):
+    """Raised when a point feed payload cannot be decoded."""
+
+
+class PointFeedUnavailable(RuntimeError):
+    """Raised when NumPy, which builds the feed, is not installed."""
+
+
+def check_point_feed_available() -> None:
+    """Fail before querying if the feed cannot be built."""
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        raise PointFeedUnavailable("The point feed requires numpy to be installed")
+
+
+def points_query(filters: List[Any], limit: int):
+    """Fixed-width feed columns of matching defects: float4, float4, int2, int2, int8."""
+    return select(
+        cast(Defect.latitude, REAL),
+        cast(Defect.longitude, REAL),
+        cast(case(*[(Defect.defect_type == t, code) for t, code in TYPE_CODES.items()]), SmallInteger),
+        cast(case(*[(Defect.severity == s, code) for s, code in SEVERITY_CODES.items()]), SmallInteger),
+        func.coalesce(cast(func.extract("epoch", Defect.reported_at), BigInteger), 0),
+    ).where(*filters).order_by(*DEFECT_ORDER).limit(limit)
+
+
+def _copy_dtype():
+    import numpy as np
+
+    # Each tuple is an int16 field count, then an int32 length before every field
+    return np.dtype([
+        ("fields", ">i2"),
+        ("lat_len", ">i4"), ("lat", ">f4"),
+        ("lng_len", ">i4"), ("lng", ">f4"),
+        ("type_len", ">i4"), ("type", ">i2"),
+        ("severity_len", ">i4"), ("severity", ">i2"),
+        ("epoch_len", ">i4"), ("epoch", ">i8"),
+    ])
+
+
+def _copy_tuples(data: bytes):
+    """View the tuples of a binary COPY of points_query() as a structured array."""
+    import numpy as np
+
+    if not data.startswith(_COPY_SIGNATURE):
+        raise ValueError("not a binary COPY stream")
+    extension = int.from_bytes(data[_COPY_HEADER_SIZE - 4:_COPY_HEADER_SIZE], "big")
+    start = _COPY_HEADER_SIZE + extension
+    dtype = _copy_dtype()
+    # The stream ends with an int16 -1 trailer
+    count = (len(data) - start - 2) // dtype.itemsize
+    return np.frombuffer(data, dtype=dtype, count=count, offset=start)
+
+
+def encode_points(lat, lng, epoch, type_codes, severity_codes) -> bytes:
+    """Pack point columns (array-likes of equal length) into a feed payload."""
+    import numpy as np
+
+    count = len(lat)
+    header = np.zeros(1, dtype=[
+        ("magic", "S4"), ("version", "<u2"), ("flags", "<u2"), ("count", "<u4"), ("reserved", "<u4")
+    ])
+    header["magic"] = MAGIC
+    header["version"] = VERSION
+    header["count"] = count
+    return b"".join((
+        header.tobytes(),
+        np.asarray(lat, dtype="<f4").tobytes(),
+        np.asarray(lng, dtype="<f4").tobytes(),
+        np.asarray(epoch, dtype="<u4").tobytes(),
+        np.asarray(type_codes, dtype="u1").tobytes(),
+        np.asarray(severity_codes, dtype="u1").tobytes(),
+    ))
+
+
+def decode_points(payload: bytes) -> Dict[str, Any]:
+    """
+    Decode an uncompressed feed payload into NumPy arrays.
+
+    Returns {"latitude", "longitude", "reported_at", "defect_type",
+    "severity"}; the last two hold codes, see TYPE_CODES and SEVERITY_CODES.
+    """
+    import numpy as np
+
+    if len(payload) < HEADER_SIZE or payload[:4] != MAGIC:
+        raise InvalidPayload("not a point feed payload")
+    version = int.from_bytes(payload[4:6], "little")
+    if version != VERSION:
+        raise InvalidPayload(f"unsupported point feed version {version}")
+    count = int.from_bytes(payload[8:12], "little")
+    if len(payload) != HEADER_SIZE + 14 * count:
+        raise InvalidPayload(f"expected {HEADER_SIZE + 14 * count} bytes for {count} points, got {len(payload)}")
+
+    columns = {}
+    offset = HEADER_SIZE
+    for name, dtype in (
+        ("latitude", "<f4"), ("longitude", "<f4"), ("reported_at", "<u4"),
+        ("defect_type", "u1"), ("severity", "u1"),
+    ):
+        columns[name] = np.frombuffer(payload, dtype=dtype, count=count, offset=offset)
+        offset += count * np.dtype(dtype).itemsize
+    return columns
+
+
+def build_point_feed(db: Session, filters: List[Any], limit: int) -> Tuple[bytes, int]:
+    """
+    Payload for the defects matching filters (at most limit, newest first),
+    and its number of points.
+
+    Needs a psycopg2 connection for COPY and NumPy.
+    """
+    query = points_query(filters, limit).compile(
+        dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}
+    )
+    buffer = io.BytesIO()
+    cursor = db.connection().connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT binary)", buffer)
+    finally:
+        cursor.close()
+
+    rows = _copy_tuples(buffer.getvalue())
+    payload = encode_points(rows["lat"], rows["lng"], rows["epoch"], rows["type"], rows["severity"])
+    return payload, len(rows)
@@ -0,0 +1,149 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Integer, and_, cast, func, literal_column, select, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.defect import Defect, DefectType, SeverityLevel
+from app.models.rollup import DefectDailyRollup, ROLLUP_CELL_SCALE
+
+logger = logging.getLogger(__name__)
+
+
+def rollups_enabled() -> bool:
+    """Whether analytics endpoints may answer from the rollup table."""
+    return settings.ANALYTICS_USE_ROLLUPS
+
+
+def raw_rollup_query():
+    """
+    Group the raw defects table by the rollup key.
+
+    Rows without a reported_at have no day and are not rolled up.
+    """
+    return select(
+        cast(func.timezone("UTC", Defect.reported_at), DefectDailyRollup.day.type).label("day"),
+        Defect.defect_type.label("defect_type"),
+        Defect.severity.label("severity"),
+        cast(func.round(Defect.latitude * ROLLUP_CELL_SCALE), Integer).label("lat_cell"),
+        cast(func.round(Defect.longitude * ROLLUP_CELL_SCALE), Integer).label("lng_cell"),
+        func.count().label("defect_count")
+    ).where(
+        Defect.reported_at.isnot(None)
+    ).group_by(
+        literal_column("1"), literal_column("2"), literal_column("3"),
+        literal_column("4"), literal_column("5")
+    )
+
+
+def rebuild_rollups(db: Session) -> int:
+    """
+    Recompute the rollup table from scratch.
+
+    The table is locked for the duration so concurrent trigger updates
+    cannot interleave with the rebuild. Returns the number of buckets written.
+    """
+    db.execute(text("LOCK TABLE defect_daily_rollups IN EXCLUSIVE MODE"))
+    db.execute(DefectDailyRollup.__table__.delete())
+    result = db.execute(
+        DefectDailyRollup.__table__.insert().from_select(
+            ["day", "defect_type", "severity", "lat_cell", "lng_cell", "defect_count"],
+            raw_rollup_query()
+        )
+    )
+    db.commit()
+    logger.info(f"Rebuilt defect rollups: {result.rowcount} buckets")
+    return result.rowcount
+
+
+def check_rollup_consistency(db: Session, limit: int = 100) -> Dict[str, Any]:
+    """
+    Compare the rollup table against counts computed from the raw defects.
+
+    Every bucket whose rollup count differs from the raw count (including
+    buckets missing on either side) is a mismatch. Returns the raw and
+    rollup totals, the number of mismatched buckets and up to `limit` of them.
+    """
+    raw = raw_rollup_query().subquery("raw")
+    rollup = select(DefectDailyRollup).where(DefectDailyRollup.defect_count != 0).subquery("rollup")
+
+    keys = ("day", "defect_type", "severity", "lat_cell", "lng_cell")
+    raw_count = func.coalesce(raw.c.defect_count, 0)
+    rollup_count = func.coalesce(rollup.c.defect_count, 0)
+
+    mismatches = select(
+        *[func.coalesce(raw.c[key], rollup.c[key]).label(key) for key in keys],
+        raw_count.label("raw_count"),
+        rollup_count.label("rollup_count")
+    ).select_from(
+        raw.join(rollup, and_(*[raw.c[key] == rollup.c[key] for key in keys]), full=True)
+    ).where(
+        raw_count != rollup_count
+    ).subquery("mismatches")
+
+    mismatch_count = db.execute(select(func.count()).select_from(mismatches)).scalar()
+    samples = db.execute(select(mismatches).limit(limit)).all()
+
+    raw_total = db.execute(
+        select(func.count()).select_from(Defect).where(Defect.reported_at.isnot(None))
+    ).scalar()
+    rollup_total = db.execute(select(func.coalesce(func.sum(DefectDailyRollup.defect_count), 0))).scalar()
+
+    return {
+        "consistent": mismatch_count == 0,
+        "raw_total": raw_total,
+        "rollup_total": int(rollup_total),
+        "mismatch_count": mismatch_count,
+        "mismatches": [
+            {
+                "day": row.day.isoformat(),
+                "defect_type": row.defect_type.value,
+                "severity": row.severity.value,
+                "lat_cell": row.lat_cell,
+                "lng_cell": row.lng_cell,
+                "raw_count": row.raw_count,
+                "rollup_count": row.rollup_count
+            }
+            for row in samples
+        ]
+    }
+
+
+def rollup_hotspots(
+    db: Session,
+    limit: int,
+    defect_type: Optional[DefectType] = None,
+    severity: Optional[SeverityLevel] = None
+) -> List[Dict[str, Any]]:
+    """
+    Top grid cells by defect count, read from the rollups.
+
+    Cells match the 0.001 degree grid of the raw hotspot query.
+    """
+    count = func.sum(DefectDailyRollup.defect_count)
+    query = select(
+        DefectDailyRollup.lat_cell,
+        DefectDailyRollup.lng_cell,
+        count.label("defect_count")
+    )
+    if defect_type:
+        query = query.where(DefectDailyRollup.defect_type == defect_type)
+    if severity:
+        query = query.where(DefectDailyRollup.severity == severity)
+
+    rows = db.execute(
+        query.group_by(DefectDailyRollup.lat_cell, DefectDailyRollup.lng_cell)
+        .having(count > 0)
+        .order_by(count.desc())
+        .limit(limit)
+    ).all()
+
+    return [
+        {
+            "lat": row.lat_cell / ROLLUP_CELL_SCALE,
+            "lng": row.lng_cell / ROLLUP_CELL_SCALE,
+            "count": int(row.defect_count)
+        }
+        for row in rows
+    ]
@@ -0,0 +1,22 @@
+from geoalchemy2 import Geography
+from sqlalchemy import and_, cast, func
+
+from app.models.defect import Defect
+
+
+def bbox_filter(lat_min: float, lat_max: float, lng_min: float, lng_max: float):
+    """
+    Filter defects to a bounding box with the && operator on location.
+
+    The envelope is cast to geography so the comparison can use the GiST
+    index on defects.location instead of scanning the float columns. The
+    geography && compares geodesic bounding boxes, whose edges bulge past
+    the requested latitudes, so the exact box is rechecked on the
+    latitude/longitude columns of the rows the index returns.
+    """
+    envelope = func.ST_MakeEnvelope(lng_min, lat_min, lng_max, lat_max, 4326)
+    return and_(
+        Defect.location.op("&&")(cast(envelope, Geography(srid=4326))),
+        Defect.latitude.between(lat_min, lat_max),
+        Defect.longitude.between(lng_min, lng_max),
+    )
@@ -0,0 +1,149 @@
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.defect import Defect, DefectType, SeverityLevel
+from app.models.rollup import DefectDailyRollup
+from app.services.rollups import rollups_enabled
+
+# GROUPING() bitmask for (defect_type, severity, month); a set bit means the
+# column is aggregated away in that row
+_BY_TYPE = 0b011
+_BY_SEVERITY = 0b101
+_BY_MONTH = 0b110
+_TOTAL = 0b111
+
+
+def _month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def _next_month(value: datetime) -> datetime:
+    return datetime(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def statistics_window(
+    year: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> Tuple[Optional[datetime], Optional[datetime], datetime, datetime]:
+    """
+    Resolve the statistics filters into half-open datetime ranges.
+
+    Returns (filter_start, filter_end, time_start, time_end). The filter range
+    restricts every count and is open-ended when no year or dates are given.
+    The time range selects the months reported in by_time: the requested year,
+    the months spanned by the date range, or the current year by default.
+    """
+    filter_start = filter_end = None
+    if year:
+        filter_start, filter_end = datetime(year, 1, 1), datetime(year + 1, 1, 1)
+    if start_date:
+        start = datetime.combine(start_date, time.min)
+        filter_start = max(filter_start, start) if filter_start else start
+    if end_date:
+        end = datetime.combine(end_date + timedelta(days=1), time.min)
+        filter_end = min(filter_end, end) if filter_end else end
+
+    if filter_start or filter_end:
+        time_start = filter_start or datetime((filter_end - timedelta(microseconds=1)).year, 1, 1)
+        time_end = filter_end or _next_month(datetime.now())
+    else:
+        current_year = datetime.now().year
+        time_start, time_end = datetime(current_year, 1, 1), datetime(current_year + 1, 1, 1)
+
+    return filter_start, filter_end, time_start, time_end
+
+
+def month_keys(time_start: datetime, time_end: datetime) -> List[str]:
+    """List the YYYY-MM keys of every month overlapping [time_start, time_end)."""
+    keys = []
+    month = _month_start(time_start)
+    while month < time_end:
+        keys.append(f"{month.year}-{month.month:02d}")
+        month = _next_month(month)
+    return keys
+
+
+def compute_defect_statistics(
+    db: Session,
+    year: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    use_rollups: Optional[bool] = None
+) -> Dict[str, Any]:
+    """
+    Count defects in total, by type, by severity and by month in one query.
+
+    A single scan is grouped with GROUPING SETS so the database returns the
+    total, per-type, per-severity and per-month counts together. The filters
+    are whole days, so the scan reads the daily rollup table when rollups are
+    enabled (use_rollups defaults to the ANALYTICS_USE_ROLLUPS setting) and
+    the raw defects table otherwise. Returns a dict matching the
+    DefectStatistics schema.
+    """
+    if use_rollups is None:
+        use_rollups = rollups_enabled()
+    filter_start, filter_end, time_start, time_end = statistics_window(year, start_date, end_date)
+
+    if use_rollups:
+        source = DefectDailyRollup
+        timestamp = DefectDailyRollup.day
+        count = func.sum(DefectDailyRollup.defect_count)
+    else:
+        source = Defect
+        timestamp = Defect.reported_at
+        count = func.count()
+
+    # Only rows inside the by_time window get a month, others fall into a NULL bucket
+    month = case(
+        (
+            and_(timestamp >= time_start, timestamp < time_end),
+            func.date_trunc("month", timestamp)
+        ),
+        else_=None
+    )
+
+    stmt = select(
+        source.defect_type,
+        source.severity,
+        month.label("month"),
+        func.grouping(source.defect_type, source.severity, month).label("grouping_id"),
+        count.label("defect_count")
+    ).group_by(
+        func.grouping_sets(
+            tuple_(source.defect_type),
+            tuple_(source.severity),
+            tuple_(month),
+            tuple_()
+        )
+    )
+    if filter_start:
+        stmt = stmt.where(timestamp >= filter_start)
+    if filter_end:
+        stmt = stmt.where(timestamp < filter_end)
+
+    total_count = 0
+    type_counts = {defect_type.value: 0 for defect_type in DefectType}
+    severity_counts = {severity.value: 0 for severity in SeverityLevel}
+    time_counts = {key: 0 for key in month_keys(time_start, time_end)}
+
+    for row in db.execute(stmt):
+        row_count = int(row.defect_count or 0)
+        if row.grouping_id == _TOTAL:
+            total_count = row_count
+        elif row.grouping_id == _BY_TYPE:
+            type_counts[row.defect_type.value] = row_count
+        elif row.grouping_id == _BY_SEVERITY:
+            severity_counts[row.severity.value] = row_count
+        elif row.grouping_id == _BY_MONTH and row.month is not None:
+            time_counts[f"{row.month.year}-{row.month.month:02d}"] = row_count
+
+    return {
+        "total_count": total_count,
+        "by_type": type_counts,
+        "by_severity": severity_counts,
+        "by_time": time_counts
+    }
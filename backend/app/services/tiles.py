@@ -0,0 +1,147 @@
+import math
+from typing import Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.defect import DefectType, SeverityLevel
+
+# MVT geometry resolution and clipping buffer, in tile units
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+
+# Width of the Web Mercator world in meters
+WORLD_SIZE_M = 2 * 20037508.342789244
+
+MAX_ZOOM = 22
+
+# Below this zoom a tile covers too much of the globe for a geography
+# bounding box, so the tile query skips the spatial prefilter
+MIN_FILTER_ZOOM = 3
+
+# Individual points, the most severe first when a tile is capped
+POINTS_SQL = """
+WITH pts AS (
+    SELECT id, defect_type, severity, reported_at,
+           ST_Transform(location::geometry, 3857) AS geom
+    FROM defects
+    WHERE {where}
+    ORDER BY severity DESC, reported_at DESC
+    LIMIT :max_features
+)
+SELECT ST_AsMVT(tile, 'defects', :extent, 'geom')
+FROM (
+    SELECT id,
+           lower(defect_type::text) AS defect_type,
+           lower(severity::text) AS severity,
+           extract(epoch FROM reported_at)::bigint AS reported_at,
+           1 AS point_count,
+           ST_AsMVTGeom(geom, ST_TileEnvelope(:z, :x, :y), :extent, :buffer, true) AS geom
+    FROM pts
+) AS tile
+WHERE geom IS NOT NULL
+"""
+
+# Points snapped to a grid and merged, carrying the count and worst severity
+CLUSTERS_SQL = """
+WITH pts AS (
+    SELECT defect_type, severity,
+           ST_Transform(location::geometry, 3857) AS geom
+    FROM defects
+    WHERE {where}
+),
+clusters AS (
+    SELECT ST_Centroid(ST_Collect(geom)) AS geom,
+           count(*) AS point_count,
+           max(severity) AS severity,
+           mode() WITHIN GROUP (ORDER BY defect_type) AS defect_type
+    FROM pts
+    GROUP BY ST_SnapToGrid(geom, :cell_size)
+)
+SELECT ST_AsMVT(tile, 'defects', :extent, 'geom')
+FROM (
+    SELECT point_count,
+           lower(defect_type::text) AS defect_type,
+           lower(severity::text) AS severity,
+           ST_AsMVTGeom(geom, ST_TileEnvelope(:z, :x, :y), :extent, :buffer, true) AS geom
+    FROM clusters
+) AS tile
+WHERE geom IS NOT NULL
+"""
+
+
+def valid_tile(z: int, x: int, y: int) -> bool:
+    """Whether z/x/y addresses an existing tile."""
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def tile_bounds(z: int, x: int, y: int, buffer: float = 0.0) -> Tuple[float, float, float, float]:
+    """
+    WGS84 bounds (lng_min, lat_min, lng_max, lat_max) of a slippy-map tile,
+    grown by `buffer` tile widths on each side.
+    """
+    n = 2 ** z
+
+    def lng(tx):
+        return tx / n * 360.0 - 180.0
+
+    def lat(ty):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+
+    return (
+        max(lng(x - buffer), -180.0),
+        max(lat(y + 1 + buffer), -85.0511287798),
+        min(lng(x + 1 + buffer), 180.0),
+        min(lat(y - buffer), 85.0511287798),
+    )
+
+
+def render_tile(
+    db: Session,
+    z: int,
+    x: int,
+    y: int,
+    defect_type: Optional[DefectType] = None,
+    severity: Optional[SeverityLevel] = None
+) -> bytes:
+    """
+    Render the defects inside a tile as a Mapbox Vector Tile with PostGIS.
+
+    Up to TILE_CLUSTER_MAX_ZOOM points are clustered on a grid of
+    TILE_CLUSTER_PIXELS screen pixels (assuming 256px tiles), so a tile
+    holds at most a few hundred features however many defects it covers.
+    Above that zoom each defect is its own feature, capped at
+    TILE_MAX_FEATURES with the most severe defects kept.
+    """
+    params = {
+        "z": z, "x": x, "y": y,
+        "extent": TILE_EXTENT,
+        "buffer": TILE_BUFFER,
+    }
+
+    conditions = []
+    if z >= MIN_FILTER_ZOOM:
+        # Bounding box overlap on the geography column uses idx_defects_location
+        lng_min, lat_min, lng_max, lat_max = tile_bounds(z, x, y, TILE_BUFFER / TILE_EXTENT)
+        conditions.append(
+            "location && ST_MakeEnvelope(:lng_min, :lat_min, :lng_max, :lat_max, 4326)::geography"
+        )
+        params.update(lng_min=lng_min, lat_min=lat_min, lng_max=lng_max, lat_max=lat_max)
+    if defect_type:
+        conditions.append("defect_type = :defect_type")
+        params["defect_type"] = defect_type.name
+    if severity:
+        conditions.append("severity = :severity")
+        params["severity"] = severity.name
+    where = " AND ".join(conditions) or "true"
+
+    if z <= settings.TILE_CLUSTER_MAX_ZOOM:
+        sql = CLUSTERS_SQL
+        params["cell_size"] = WORLD_SIZE_M / 2 ** z / (256 / settings.TILE_CLUSTER_PIXELS)
+    else:
+        sql = POINTS_SQL
+        params["max_features"] = settings.TILE_MAX_FEATURES
+
+    tile = db.execute(text(sql.format(where=where)), params).scalar()
+    return bytes(tile) if tile else b""
@@ -0,0 +1,165 @@
+import enum
+import json
+import logging
+import sys
+import time
+from typing import Any, BinaryIO, Dict, Iterator, Optional
+
+import ijson
+from sqlalchemy.orm import Session
+
+from app.services.bulk_ingest import InsertMethod, InvalidEntry, ingest_entries
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from the upload per parser refill
+READ_SIZE = 64 * 1024
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonlines", "application/x-jsonlines")
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+
+
+class UploadFormat(str, enum.Enum):
+    """Layout of a bulk upload file."""
+    JSON = "json"      # a single top-level array of entries
+    NDJSON = "ndjson"  # one entry object per line
+
+
+class StreamParseError(ValueError):
+    """Raised when an upload is not a JSON array of entries or stops parsing part way through."""
+
+
+def process_peak_rss_mb() -> Optional[float]:
+    """
+    Peak resident set size of this process in MB, if the platform reports it.
+
+    This is the high-water mark over the whole life of the worker, not the
+    memory used by one request: it only grows, so it shows what a worker
+    needs but not what a given upload cost (see benchmarks/upload_parsing.py).
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    if sys.platform == "darwin":
+        peak /= 1024
+    return round(peak / 1024, 1)
+
+
+def detect_format(
+    fileobj: BinaryIO,
+    filename: Optional[str] = None,
+    content_type: Optional[str] = None
+) -> UploadFormat:
+    """
+    Work out whether an upload is a JSON array or NDJSON.
+
+    The filename extension and content type are checked first, then the
+    first non-whitespace byte of the file: "[" means a JSON array.
+    """
+    if content_type and content_type.split(";")[0].strip() in NDJSON_CONTENT_TYPES:
+        return UploadFormat.NDJSON
+    if filename and filename.lower().endswith(NDJSON_EXTENSIONS):
+        return UploadFormat.NDJSON
+
+    position = fileobj.tell()
+    head = fileobj.read(1024).lstrip()
+    fileobj.seek(position)
+    return UploadFormat.JSON if head.startswith(b"[") or not head else UploadFormat.NDJSON
+
+
+class UploadStream:
+    """
+    Iterates the entries of an upload without loading the whole file.
+
+    JSON arrays are parsed incrementally with ijson and NDJSON is parsed a
+    line at a time, so memory stays bounded by the read size and the
+    consumer's batch size rather than the file size. Lines of an NDJSON
+    file that are not valid JSON are yielded as InvalidEntry so they show up
+    in failed_entries instead of aborting the upload.
+    """
+
+    def __init__(self, fileobj: BinaryIO, upload_format: UploadFormat):
+        self.fileobj = fileobj
+        self.format = upload_format
+        self.count = 0
+
+    def __iter__(self) -> Iterator[Any]:
+        if self.format == UploadFormat.NDJSON:
+            return self._iter_ndjson()
+        return self._iter_json_array()
+
+    def _iter_json_array(self) -> Iterator[Any]:
+        head = self.fileobj.read(1024)
+        if not head.lstrip().startswith(b"["):
+            raise StreamParseError("JSON file must contain an array of defect objects")
+        self.fileobj.seek(0)
+
+        try:
+            for entry in ijson.items(self.fileobj, "item", use_float=True, buf_size=READ_SIZE):
+                self.count += 1
+                yield entry
+        except ijson.JSONError as e:
+            raise StreamParseError(f"Invalid JSON after {self.count} entries: {e}")
+
+    def _iter_ndjson(self) -> Iterator[Any]:
+        for line in self.fileobj:
+            line = line.strip()
+            if not line:
+                continue
+            self.count += 1
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield InvalidEntry("Invalid JSON")
+
+
+def ingest_upload(
+    db: Session,
+    fileobj: BinaryIO,
+    upload_format: UploadFormat,
+    stream: bool = True,
+    chunk_size: Optional[int] = None,
+    method: Optional[InsertMethod] = None,
+    dedup: Optional[bool] = None
+) -> Dict[str, Any]:
+    """
+    Parse an upload file and feed it to the bulk ingest engine.
+
+    With stream=True (always the case for NDJSON) entries are handed to the
+    writer in chunk_size batches as they are parsed. Chunks written before a
+    parse error stay committed; the error message reports how many entries
+    were read first. With stream=False the file is read and parsed with
+    json.loads up front, as the endpoint originally did.
+
+    Returns the ingest summary with an added "stats" section describing
+    throughput and the worker process's peak memory so far.
+    """
+    streamed = stream or upload_format == UploadFormat.NDJSON
+    started = time.perf_counter()
+
+    if streamed:
+        entries = UploadStream(fileobj, upload_format)
+    else:
+        entries = json.loads(fileobj.read())
+        if not isinstance(entries, list):
+            raise StreamParseError("JSON file must contain an array of defect objects")
+
+    summary = ingest_entries(db, entries, chunk_size=chunk_size, method=method, dedup=dedup)
+    elapsed = time.perf_counter() - started
+
+    summary["stats"] = {
+        "format": upload_format.value,
+        "streamed": streamed,
+        "bytes_read": fileobj.tell(),
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(summary["processed_count"] / elapsed, 1) if elapsed else None,
+        "process_peak_rss_mb": process_peak_rss_mb()
+    }
+    logger.info(f"Bulk upload processed: {summary['stats']}")
+    return summary
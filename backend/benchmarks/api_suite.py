@@ -0,0 +1,328 @@
+"""
+Reproducible benchmark suite for the defects API.
+
+Seeds a local PostGIS with clustered synthetic defects (see benchmarks.seed),
+starts uvicorn and drives each defects endpoint at a fixed concurrency:
+the list with and without filters, the binary point feed, bulk upload,
+statistics, heatmap, density (single and batch) and hotspots, plus
+conditional GETs revalidating an earlier response's ETag ("... 304"). For
+every endpoint it reports requests/sec, p50/p95/p99 latency, errors, the
+mean response bytes on the wire (compressed as negotiated with
+--accept-encoding) and the number of SQL statements one request issues
+(counted in-process with an engine event hook).
+
+    python -m benchmarks.api_suite --rows 1000000 --requests 500 --concurrency 20 \\
+        --json results.json
+    python -m benchmarks.api_suite --rows 0 --json new.json --compare results.json
+
+Results are written as JSON keyed by endpoint so runs from two commits can be
+diffed; --compare prints the changes against an earlier run and exits
+non-zero if any endpoint regressed beyond --threshold (p95 latency,
+throughput or bytes per response) or issues more statements than before.
+Run once with --accept-encoding identity to see what compression saves.
+
+The response cache is off (CACHE_BACKEND=none) unless --cache-backend is
+given, so analytics endpoints measure their queries rather than cache hits.
+Bulk uploads run last, since they invalidate cached analytics. Seeded and
+uploaded rows are tagged with a "suite-" vehicle_id prefix and deleted
+afterwards unless --keep is given. Needs httpx.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.db.session import get_engine
+from benchmarks.load_test import percentile, start_server, wait_for_server
+from benchmarks.seed import CITY_CENTERS, cleanup_defects, seed_defects
+
+PREFIX = "suite-"
+
+# Sample center inside the seeded San Francisco cluster
+LAT, LNG = CITY_CENTERS[0]
+VIEWPORT = f"lat_min={LAT - 0.05}&lat_max={LAT + 0.05}&lng_min={LNG - 0.05}&lng_max={LNG + 0.05}"
+
+# The last quarter, inside the seeded date range
+TODAY = datetime.now(timezone.utc).date()
+QUARTER = f"start_date={TODAY - timedelta(days=90)}&end_date={TODAY}"
+
+# Entries per bulk upload request
+BULK_ENTRIES = 500
+
+
+def bulk_upload_body(rng):
+    """An NDJSON upload of BULK_ENTRIES new detections; timestamps differ per call so none are deduplicated."""
+    base = datetime.now(timezone.utc) - timedelta(seconds=rng.randrange(10 ** 8))
+    lines = []
+    for i in range(BULK_ENTRIES):
+        lines.append(json.dumps({
+            "vehicle_id": f"{PREFIX}{rng.randrange(100)}",
+            "timestamp": (base + timedelta(milliseconds=i)).isoformat(),
+            "coordinates": [LAT + rng.uniform(-0.1, 0.1), LNG + rng.uniform(-0.1, 0.1)],
+            "defect_type": rng.choice(["pothole", "crack", "damaged pavement", "water logging"]),
+            "severity": rng.choice(["low", "medium", "high", "critical"]),
+        }))
+    return "\n".join(lines).encode()
+
+
+def get(path):
+    return lambda rng: {"method": "GET", "url": path}
+
+
+def post_json(path, body):
+    return lambda rng: {"method": "POST", "url": path, "json": body}
+
+
+def bulk_upload(rng):
+    return {
+        "method": "POST",
+        "url": "/api/defects/upload/bulk?format=ndjson",
+        "files": {"file": ("suite.ndjson", bulk_upload_body(rng), "application/x-ndjson")},
+    }
+
+
+class Revalidate:
+    """Conditional GET sending the ETag of an earlier response, answered 304 while the data is unchanged."""
+
+    def __init__(self, path):
+        self.path = path
+        self.etag = None
+
+    def __call__(self, rng):
+        return {"method": "GET", "url": self.path, "headers": {"If-None-Match": self.etag or ""}}
+
+
+# (name, request factory); bulk upload last since it invalidates cached analytics
+ENDPOINTS = [
+    ("list", get("/api/defects/?limit=100")),
+    ("list?limit=1000", get("/api/defects/?limit=1000")),
+    ("list?type&severity", get("/api/defects/?defect_type=pothole&severity=high&limit=100")),
+    ("list?bbox", get(f"/api/defects/?{VIEWPORT}&limit=100")),
+    ("points?bbox", get(f"/api/defects/points?{VIEWPORT}")),
+    ("statistics", get("/api/defects/statistics/summary")),
+    ("statistics?date", get(f"/api/defects/statistics/summary?{QUARTER}")),
+    ("heatmap", get("/api/defects/analytics/heatmap?days=30")),
+    ("heatmap?zoom&bbox", get(f"/api/defects/analytics/heatmap?zoom=12&{VIEWPORT}")),
+    ("density", get(f"/api/defects/analytics/density?lat={LAT}&lng={LNG}&radius=500")),
+    ("density/batch", post_json("/api/defects/analytics/density/batch", {"centers": [
+        {"lat": LAT + dy, "lng": LNG + dx, "radius": 300}
+        for dy in (-0.01, 0, 0.01) for dx in (-0.01, 0, 0.01)
+    ]})),
+    ("hotspots", get("/api/defects/analytics/hotspots?days=30")),
+    ("list 304", Revalidate("/api/defects/?limit=100")),
+    ("statistics 304", Revalidate("/api/defects/statistics/summary")),
+    ("heatmap 304", Revalidate("/api/defects/analytics/heatmap?days=30")),
+    ("upload/bulk", bulk_upload),
+]
+
+
+class QueryCounter:
+    """Counts statements executed on any engine (sync, or async through its sync_engine)."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(Engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(Engine, "before_cursor_execute", self)
+
+
+def count_queries(selected):
+    """Statements issued by one request to each endpoint, served in-process."""
+    # Imported here so the app shares this process's settings overrides
+    from fastapi.testclient import TestClient
+    from main import app
+
+    rng = random.Random(0)
+    counts = {}
+    with TestClient(app) as client:
+        for name, factory in selected:
+            if isinstance(factory, Revalidate):
+                factory.etag = client.get(factory.path).headers.get("etag")
+            request = factory(rng)
+            client.request(**request)  # warm-up: first-use setup is not counted
+            request = factory(rng)
+            with QueryCounter() as counter:
+                response = client.request(**request)
+            counts[name] = counter.count if response.status_code < 400 else None
+    return counts
+
+
+async def drive(client, factory, requests, concurrency, seed):
+    """Send `requests` requests built by factory from `concurrency` workers."""
+    rng = random.Random(seed)
+    latencies = []
+    errors = 0
+    downloaded = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors, downloaded
+        for _ in remaining:
+            request = factory(rng)
+            started = time.perf_counter()
+            response = await client.request(**request)
+            latencies.append(time.perf_counter() - started)
+            # Body bytes as received, before decompression
+            downloaded += response.num_bytes_downloaded
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return latencies, errors, downloaded, time.perf_counter() - started
+
+
+async def run_endpoints(base_url, selected, requests, concurrency, warmup, accept_encoding):
+    results = {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    headers = {"Accept-Encoding": accept_encoding}
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120, headers=headers) as client:
+        for seed, (name, factory) in enumerate(selected):
+            if isinstance(factory, Revalidate):
+                factory.etag = (await client.get(factory.path)).headers.get("etag")
+            # Bulk uploads write rows, so they get a fraction of the requests
+            count = max(1, requests // 10) if name == "upload/bulk" else requests
+            if warmup:
+                await drive(client, factory, min(warmup, count), min(concurrency, warmup), seed + 1000)
+            latencies, errors, downloaded, elapsed = await drive(client, factory, count, concurrency, seed)
+            results[name] = {
+                "requests": count,
+                "errors": errors,
+                "rps": round(count / elapsed, 1),
+                "p50_ms": round(statistics.median(latencies) * 1000, 1),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+                "bytes": round(downloaded / count),
+            }
+            r = results[name]
+            print(f"{name:<22} {r['rps']:>9} req/s  p50 {r['p50_ms']:>8} ms  p95 {r['p95_ms']:>8} ms  "
+                  f"p99 {r['p99_ms']:>8} ms  {r['bytes']:>10} B  errors {errors}")
+    return results
+
+
+def compare(baseline, current, threshold):
+    """Print changes against a baseline run; returns the regressions found."""
+    regressions = []
+    print(f"\n{'endpoint':<22} {'rps':>16} {'p95 ms':>18} {'bytes':>22} {'queries':>10}")
+    for name, result in current.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<22} (new)")
+            continue
+        rps_change = result["rps"] / before["rps"] - 1 if before["rps"] else 0
+        p95_change = result["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0
+        print(f"{name:<22} {before['rps']:>7} → {result['rps']:<7} {before['p95_ms']:>8} → {result['p95_ms']:<8} "
+              f"{before.get('bytes')!s:>10} → {result.get('bytes')!s:<10} {before.get('queries')} → {result.get('queries')}")
+        if rps_change < -threshold:
+            regressions.append(f"{name}: throughput {rps_change:+.0%}")
+        if p95_change > threshold:
+            regressions.append(f"{name}: p95 latency {p95_change:+.0%}")
+        # Runs before bytes were recorded have none to compare
+        if before.get("bytes") and result.get("bytes") is not None:
+            bytes_change = result["bytes"] / before["bytes"] - 1
+            if bytes_change > threshold:
+                regressions.append(f"{name}: response bytes {bytes_change:+.0%}")
+        if None not in (result.get("queries"), before.get("queries")) and result["queries"] > before["queries"]:
+            regressions.append(f"{name}: {before['queries']} → {result['queries']} queries per request")
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the defects API endpoints")
+    parser.add_argument("--rows", type=int, default=100000, help="Defects to seed first, 10k-10M (0 to skip)")
+    parser.add_argument("--days", type=int, default=365, help="Spread seeded defects over this many days")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per endpoint first")
+    parser.add_argument("--endpoint", action="append", help="Only run the named endpoint(s)")
+    parser.add_argument("--mode", choices=["async", "sync"], default="async", help="Database mode (DB_ASYNC)")
+    parser.add_argument("--cache-backend", default="none", help="CACHE_BACKEND for the server")
+    parser.add_argument("--accept-encoding", default="br, gzip",
+                        help="Accept-Encoding sent with every request (identity for uncompressed responses)")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--keep", action="store_true", help="Keep seeded and uploaded rows")
+    parser.add_argument("--json", dest="json_path", help="Write the results to this file")
+    parser.add_argument("--compare", help="Earlier --json output to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative change counted as a regression")
+    args = parser.parse_args()
+
+    selected = [(name, factory) for name, factory in ENDPOINTS if not args.endpoint or name in args.endpoint]
+    # The in-process query counts use the same cache setting as the server
+    settings.CACHE_BACKEND = args.cache_backend
+
+    engine = get_engine()
+    if args.rows:
+        started = time.perf_counter()
+        seed_defects(engine, args.rows, prefix=PREFIX, days=args.days)
+        print(f"Seeded {args.rows} defects in {time.perf_counter() - started:.1f}s")
+
+    try:
+        queries = count_queries(selected)
+        server = start_server(args.mode, args.port, args.workers, CACHE_BACKEND=args.cache_backend)
+        base_url = f"http://127.0.0.1:{args.port}"
+        try:
+            asyncio.run(wait_for_server(base_url))
+            results = asyncio.run(run_endpoints(
+                base_url, selected, args.requests, args.concurrency, args.warmup, args.accept_encoding
+            ))
+        finally:
+            server.terminate()
+            server.wait()
+    finally:
+        if not args.keep:
+            cleanup_defects(engine, PREFIX)
+
+    for name, result in results.items():
+        result["queries"] = queries.get(name)
+
+    output = {
+        "revision": git_revision(),
+        "run_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "rows": args.rows, "requests": args.requests, "concurrency": args.concurrency,
+            "mode": args.mode, "cache_backend": args.cache_backend, "workers": args.workers,
+            "accept_encoding": args.accept_encoding,
+        },
+        "results": results,
+    }
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(output, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline["results"], results, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Benchmark the batch report aggregation.
+
+Compares the original aggregate_defect_data (one COUNT query per defect type
+plus a GROUP BY on exact coordinates for critical defects, on a new engine
+per run) against the single grouped scan in app.services.batch_processor.
+Both run over the same window; reports are built without uploading to S3.
+
+Needs a local PostGIS in DATABASE_URL with the schema migrated:
+
+    python -m benchmarks.batch_aggregation [--rows 1000000] [--days 30]
+                                           [--runs 5] [--cell-size 0.01]
+
+Seeded rows (see benchmarks.seed) are spread over the last 365 days and
+removed afterwards unless --keep is given; --rows 0 benchmarks the data
+already in the database.
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, create_engine, event, func
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.session import get_engine
+from app.models.defect import Defect, DefectType, SeverityLevel
+from app.services.batch_processor import aggregate_defect_data, report_window
+from benchmarks.seed import cleanup_defects, seed_defects
+
+PREFIX = "batch-bench-"
+
+
+class StatementCounter:
+    """Counts statements executed on every engine while active."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(type(get_engine()), "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(type(get_engine()), "before_cursor_execute", self)
+
+
+def legacy_aggregate(start, end):
+    """The original aggregation, minus the S3 upload, over [start, end)."""
+    engine = create_engine(settings.DATABASE_URL)
+    session = sessionmaker(bind=engine)()
+    try:
+        in_window = and_(Defect.reported_at >= start, Defect.reported_at < end)
+        defect_counts = {}
+        for defect_type in DefectType:
+            defect_counts[defect_type.value] = session.query(func.count(Defect.id)).filter(
+                Defect.defect_type == defect_type, in_window
+            ).scalar()
+
+        critical_areas = session.query(
+            Defect.latitude,
+            Defect.longitude,
+            func.count(Defect.id).label('defect_count')
+        ).filter(
+            Defect.severity == SeverityLevel.CRITICAL, in_window
+        ).group_by(
+            Defect.latitude,
+            Defect.longitude
+        ).order_by(
+            func.count(Defect.id).desc()
+        ).limit(10).all()
+
+        return {
+            'defect_counts': defect_counts,
+            'critical_areas': [
+                {'latitude': lat, 'longitude': lng, 'defect_count': count}
+                for lat, lng, count in critical_areas
+            ]
+        }
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def measure(fn, runs):
+    """Median and best wall time in ms over `runs` calls, statements per call, and the last result."""
+    fn()  # warm caches and the shared engine's pool
+    timings = []
+    with StatementCounter() as counter:
+        for _ in range(runs):
+            started = time.perf_counter()
+            result = fn()
+            timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), min(timings), counter.count // runs, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the batch report aggregation")
+    parser.add_argument("--rows", type=int, default=1000000, help="Defects to seed first (0 to skip)")
+    parser.add_argument("--days", type=int, default=30, help="Report window ending now")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--cell-size", type=float, default=settings.BATCH_CRITICAL_CELL_DEGREES)
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded rows")
+    args = parser.parse_args()
+
+    engine = get_engine()
+    if args.rows:
+        started = time.perf_counter()
+        seed_defects(engine, args.rows, prefix=PREFIX)
+        print(f"Seeded {args.rows} defects in {time.perf_counter() - started:.1f}s")
+
+    start, end = report_window(end=datetime.now(timezone.utc), days=args.days)
+    try:
+        results = {
+            "legacy": measure(lambda: legacy_aggregate(start, end), args.runs),
+            "single-pass": measure(
+                lambda: aggregate_defect_data(start, end, cell_size=args.cell_size, store=False), args.runs
+            ),
+        }
+    finally:
+        if args.rows and not args.keep:
+            cleanup_defects(engine, PREFIX)
+
+    print(f"\nwindow {start:%Y-%m-%d} .. {end:%Y-%m-%d}, median of {args.runs} runs")
+    print(f"{'method':<12} {'median ms':>10} {'best ms':>10} {'statements':>11}")
+    for name, (median_ms, best_ms, statements, _) in results.items():
+        print(f"{name:<12} {median_ms:>10.1f} {best_ms:>10.1f} {statements:>11}")
+
+    legacy_counts = results["legacy"][3]["defect_counts"]
+    counts = results["single-pass"][3]["defect_counts"]
+    print(f"\ntype counts match: {legacy_counts == counts}")
+    # Exact coordinates rarely repeat, so the legacy "areas" are mostly single defects
+    print(f"top legacy area: {(results['legacy'][3]['critical_areas'] or [None])[0]}")
+    print(f"top {args.cell_size}° cell: {(results['single-pass'][3]['critical_areas'] or [None])[0]}")
+
+
+if __name__ == "__main__":
+    main()
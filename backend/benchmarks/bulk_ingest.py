@@ -0,0 +1,133 @@
+"""
+Benchmark the bulk upload ingest path.
+
+Compares the original per-entry ORM loop (one DefectModel and one
+ST_SetSRID(ST_MakePoint(...)) expression per entry, db.add, single commit)
+against the chunked ingest engine in app.services.bulk_ingest.
+
+Usage:
+    python -m benchmarks.bulk_ingest [--sizes 10000,100000,1000000]
+                                     [--methods legacy,values,copy]
+                                     [--chunk-size 5000] [--validate-only]
+
+With --validate-only no database is touched and only the Python side
+(validation and row/ORM object construction) is measured. Otherwise
+DATABASE_URL must point at a PostGIS database with the schema migrated;
+rows inserted by the benchmark are tagged with a "bench-" vehicle_id and
+deleted after each run.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from geoalchemy2.functions import ST_MakePoint, ST_SetSRID
+from sqlalchemy import delete
+
+from app.db.session import SessionLocal
+from app.models.defect import Defect as DefectModel, DefectType, SeverityLevel
+from app.services.bulk_ingest import DEFECT_TYPE_MAPPING, ingest_entries, validate_entries
+
+VEHICLE_PREFIX = "bench-"
+
+EXTERNAL_TYPES = list(DEFECT_TYPE_MAPPING) + ["debris"]
+
+
+def generate_entries(count, seed=42):
+    """Generate synthetic upload entries in the bulk upload JSON format."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    severities = [s.value for s in SeverityLevel]
+    entries = []
+    for i in range(count):
+        entries.append({
+            "vehicle_id": f"{VEHICLE_PREFIX}{i % 50}",
+            "timestamp": (start + timedelta(seconds=i * 7)).isoformat().replace("+00:00", "Z"),
+            "coordinates": [37.70 + rng.random() * 0.15, -122.50 + rng.random() * 0.15],
+            "defect_type": rng.choice(EXTERNAL_TYPES),
+            "severity": rng.choice(severities),
+            "notes": "synthetic" if i % 10 == 0 else None
+        })
+    return entries
+
+
+def legacy_build(entries):
+    """Original loop body: validate one entry and build one ORM object for it."""
+    objects = []
+    for entry in entries:
+        timestamp = datetime.fromisoformat(entry["timestamp"].replace("Z", "+00:00"))
+        lat, lng = entry["coordinates"]
+        defect_type = DEFECT_TYPE_MAPPING.get(entry["defect_type"].lower(), DefectType.OTHER)
+        severity = SeverityLevel(entry["severity"].lower())
+        objects.append(DefectModel(
+            vehicle_id=entry["vehicle_id"],
+            defect_type=defect_type,
+            severity=severity,
+            latitude=lat,
+            longitude=lng,
+            location=ST_SetSRID(ST_MakePoint(lng, lat), 4326),
+            notes=entry.get("notes"),
+            reported_at=timestamp
+        ))
+    return objects
+
+
+def run_legacy(db, entries, chunk_size):
+    for obj in legacy_build(entries):
+        db.add(obj)
+    db.commit()
+
+
+def run_engine(method):
+    def run(db, entries, chunk_size):
+        summary = ingest_entries(db, entries, chunk_size=chunk_size, method=method)
+        if summary["failed_count"]:
+            raise RuntimeError(f"{summary['failed_count']} entries failed: {summary['failed_entries'][:3]}")
+    return run
+
+
+def cleanup(db):
+    db.execute(delete(DefectModel).where(DefectModel.vehicle_id.like(f"{VEHICLE_PREFIX}%")))
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk ingest benchmark")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--methods", default="legacy,values,copy")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--validate-only", action="store_true",
+                        help="Measure validation and row construction only, without a database")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    methods = args.methods.split(",")
+
+    print(f"{'entries':>10} {'method':>8} {'seconds':>10} {'rows/sec':>12}")
+    for size in sizes:
+        entries = generate_entries(size)
+        for method in methods:
+            if args.validate_only:
+                if method == "legacy":
+                    target = lambda: legacy_build(entries)
+                else:
+                    target = lambda: validate_entries(entries)
+                started = time.perf_counter()
+                target()
+                elapsed = time.perf_counter() - started
+            else:
+                runner = run_legacy if method == "legacy" else run_engine(method)
+                db = SessionLocal()
+                try:
+                    cleanup(db)
+                    started = time.perf_counter()
+                    runner(db, entries, args.chunk_size)
+                    elapsed = time.perf_counter() - started
+                    cleanup(db)
+                finally:
+                    db.close()
+            print(f"{size:>10} {method:>8} {elapsed:>10.2f} {size / elapsed:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
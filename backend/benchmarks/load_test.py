@@ -0,0 +1,137 @@
+"""
+Load test comparing the async (asyncpg) and sync (psycopg2) database modes.
+
+For each mode a uvicorn server is started with DB_ASYNC set accordingly,
+then every endpoint is driven at a fixed concurrency for a fixed number of
+requests. Reports requests/sec, p50 and p99 latency per endpoint and mode.
+
+Needs a seeded local PostGIS in DATABASE_URL (see benchmarks.seed) and httpx:
+
+    pip install httpx
+    python -m benchmarks.seed --rows 1000000
+    python -m benchmarks.load_test --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+MODES = {"async": "true", "sync": "false"}
+
+# (name, path) of the GET endpoints driven in each mode
+ENDPOINTS = [
+    ("defects", "/api/defects/?limit=100"),
+    ("defects?bbox", "/api/defects/?lat_min=37.76&lat_max=37.79&lng_min=-122.44&lng_max=-122.40"),
+    ("statistics", "/api/defects/statistics/summary"),
+    ("heatmap", "/api/defects/analytics/heatmap?zoom=12&lat_min=37.7&lat_max=37.85&lng_min=-122.5&lng_max=-122.35"),
+    ("density", "/api/defects/analytics/density?lat=37.7749&lng=-122.4194&radius=500"),
+    ("hotspots", "/api/defects/analytics/hotspots"),
+    ("tile", "/api/defects/tiles/12/655/1583.mvt"),
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def start_server(mode, port, workers, **extra_env):
+    env = dict(os.environ, DB_ASYNC=MODES[mode], **extra_env)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env
+    )
+
+
+async def wait_for_server(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start within {timeout}s")
+
+
+async def drive(client, path, requests, concurrency):
+    """Send `requests` GETs to path from `concurrency` workers; returns (latencies, errors, elapsed)."""
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return latencies, errors, time.perf_counter() - started
+
+
+async def run_mode(mode, base_url, requests, concurrency, warmup):
+    results = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        for name, path in ENDPOINTS:
+            if warmup:
+                await drive(client, path, warmup, min(concurrency, warmup))
+            latencies, errors, elapsed = await drive(client, path, requests, concurrency)
+            results.append({
+                "mode": mode,
+                "endpoint": name,
+                "requests": requests,
+                "errors": errors,
+                "rps": round(requests / elapsed, 1),
+                "p50_ms": round(statistics.median(latencies) * 1000, 1),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+            })
+            print(f"{mode:<6} {name:<14} {results[-1]['rps']:>9} req/s  "
+                  f"p50 {results[-1]['p50_ms']:>8} ms  p99 {results[-1]['p99_ms']:>8} ms  errors {errors}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare async and sync database modes under load")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per endpoint and mode")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests per endpoint first")
+    parser.add_argument("--modes", default="async,sync")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for mode in args.modes.split(","):
+        server = start_server(mode, args.port, args.workers)
+        base_url = f"http://127.0.0.1:{args.port}"
+        try:
+            asyncio.run(wait_for_server(base_url))
+            results.extend(asyncio.run(run_mode(mode, base_url, args.requests, args.concurrency, args.warmup)))
+        finally:
+            server.terminate()
+            server.wait()
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"concurrency": args.concurrency, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
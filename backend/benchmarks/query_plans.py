@@ -0,0 +1,204 @@
+"""
+Query plan checks for the defects API and the EC2 batch job.
+
+Each case calls a route function directly with a sync database session
+(through ThreadedSession, so the psycopg2 engine issues the SQL), captures
+the SQL it issues, and runs EXPLAIN (FORMAT JSON) on every captured
+statement against DATABASE_URL. A case fails if a plan scans `defects`
+sequentially or uses none of the indexes the case expects.
+
+The planner only prefers indexes on a realistically sized table, so seed
+one first (or pass --seed). On a small table (as in tests/test_query_plans.py)
+pass force_index=True, which plans with sequential scans disabled: a case
+still fails if no usable index exists.
+
+    python -m benchmarks.query_plans --seed 1000000 [--cleanup]
+
+Exits non-zero if any case fails.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import event, text
+
+from app.api.routes import defects as routes
+from app.db.session import SessionLocal, ThreadedSession, engine
+from app.models.defect import DefectType, SeverityLevel
+from app.schemas.defect import DensityBatchRequest
+from app.services.density import density_counts
+from app.services.pagination import encode_cursor
+from benchmarks.seed import cleanup_defects, seed_defects
+
+# The EC2 batch job's queries, from infrastructure/scripts/batch/batch_queries.py
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "infrastructure" / "scripts" / "batch"))
+from batch_queries import DAILY_AGGREGATES_SQL, DEFECT_COLUMNS, daily_defects_sql  # noqa: E402
+
+SEED_PREFIX = "plan-"
+
+# Sample center inside the seeded San Francisco cluster
+LAT, LNG = 37.7749, -122.4194
+
+
+# A small map viewport around that center
+VIEWPORT = {"lat_min": LAT - 0.01, "lat_max": LAT + 0.01, "lng_min": LNG - 0.01, "lng_max": LNG + 0.01}
+NO_VIEWPORT = {"lat_min": None, "lat_max": None, "lng_min": None, "lng_max": None}
+
+
+def defects_case(cursor=None, defect_type=None, severity=None, bbox=NO_VIEWPORT):
+    def run(db):
+        return routes.get_defects(
+            db=db, skip=0, limit=100, cursor=cursor,
+            defect_type=defect_type, severity=severity, **bbox
+        )
+    return run
+
+
+async def density_case(db):
+    # The uncached body of the density route
+    return await db.run_sync(density_counts, [(LAT, LNG, 500)], None, None)
+
+
+def density_batch_case(db):
+    body = DensityBatchRequest(centers=[
+        {"lat": LAT, "lng": LNG, "radius": 300},
+        {"lat": LAT + 0.01, "lng": LNG - 0.01, "radius": 300},
+    ])
+    return routes.get_defect_density_batch(body=body, db=db)
+
+
+def heatmap_case(db):
+    # The uncached body of the heatmap route
+    return routes._heatmap_data(
+        db=db, defect_type=DefectType.POTHOLE, severity=None, days=30,
+        zoom=None, resolution=None, **VIEWPORT
+    )
+
+
+def batch_case(sql, days):
+    async def run(db):
+        end = datetime.now(timezone.utc).date()
+        await db.execute(text(sql), {"start": end - timedelta(days=days), "end": end})
+    return run
+
+
+# A page about a month deep into the seeded data
+DEEP_CURSOR = encode_cursor(datetime.now(timezone.utc) - timedelta(days=30), 2 ** 31 - 1)
+
+# (name, coroutine function, indexes of which at least one must appear in the plans)
+CASES = [
+    ("defects", defects_case(), {"ix_defects_reported_at_id"}),
+    ("defects?cursor", defects_case(cursor=DEEP_CURSOR), {"ix_defects_reported_at_id"}),
+    ("defects?defect_type&severity", defects_case(defect_type=DefectType.POTHOLE, severity=SeverityLevel.HIGH),
+     {"ix_defects_reported_at_id", "ix_defects_type_severity_reported_at"}),
+    ("defects?bbox", defects_case(bbox=VIEWPORT), {"idx_defects_location"}),
+    ("analytics/density", density_case, {"idx_defects_location"}),
+    ("analytics/density/batch", density_batch_case, {"idx_defects_location"}),
+    ("analytics/heatmap?days&bbox", heatmap_case,
+     {"idx_defects_location", "ix_defects_type_reported_at", "ix_defects_type_severity_reported_at"}),
+    ("batch: daily defects", batch_case(daily_defects_sql(DEFECT_COLUMNS), 1), {"ix_defects_reported_at_id"}),
+    ("batch: daily aggregates", batch_case(DAILY_AGGREGATES_SQL, 7),
+     {"ix_defects_reported_at_id", "ix_defects_type_severity_reported_at"}),
+]
+
+
+@contextmanager
+def capture_statements(bind):
+    """Collect (statement, parameters) for every SELECT executed on bind."""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            captured.append((statement, parameters))
+
+    event.listen(bind, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield captured
+    finally:
+        event.remove(bind, "before_cursor_execute", before_cursor_execute)
+
+
+def walk_plan(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk_plan(child)
+
+
+def explain(bind, statement, parameters, force_index=False):
+    """Return the plan nodes of a statement as a flat list."""
+    raw = bind.raw_connection()
+    try:
+        cursor = raw.cursor()
+        if force_index:
+            # Transaction-scoped; rolled back when the connection returns to the pool
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return list(walk_plan(plan[0]["Plan"]))
+    finally:
+        raw.close()
+
+
+def check_case(name, target, expected_indexes, force_index=False):
+    """Run one case and return a list of problems found in its plans."""
+    problems = []
+    used_indexes = set()
+
+    db = SessionLocal()
+    try:
+        with capture_statements(engine) as captured:
+            asyncio.run(target(ThreadedSession(db)))
+    finally:
+        db.close()
+
+    if not captured:
+        return [f"{name}: no SELECT statements captured"]
+
+    for statement, parameters in captured:
+        for node in explain(engine, statement, parameters, force_index):
+            if "Index Name" in node:
+                used_indexes.add(node["Index Name"])
+            if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") == "defects":
+                problems.append(f"{name}: sequential scan on defects in: {' '.join(statement.split())[:200]}")
+
+    if expected_indexes and not expected_indexes & used_indexes:
+        problems.append(f"{name}: none of {sorted(expected_indexes)} used (used: {sorted(used_indexes)})")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check endpoint query plans for index usage")
+    parser.add_argument("--seed", type=int, default=0, help="Seed this many synthetic defects first")
+    parser.add_argument("--cleanup", action="store_true", help="Delete the seeded defects afterwards")
+    parser.add_argument("--case", action="append", help="Only run the named case(s)")
+    args = parser.parse_args()
+
+    if args.seed:
+        print(f"Seeding {args.seed} defects...")
+        seed_defects(engine, args.seed, prefix=SEED_PREFIX)
+
+    failures = []
+    try:
+        for name, target, expected_indexes in CASES:
+            if args.case and name not in args.case:
+                continue
+            problems = check_case(name, target, expected_indexes)
+            print(f"{'FAIL' if problems else 'ok  '} {name}")
+            for problem in problems:
+                print(f"     {problem}")
+            failures.extend(problems)
+    finally:
+        if args.cleanup:
+            cleanup_defects(engine, prefix=SEED_PREFIX)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
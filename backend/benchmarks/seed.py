@@ -0,0 +1,90 @@
+"""
+Seed a local PostGIS database with synthetic defects.
+
+Rows are generated server-side with generate_series, scattered around a few
+city centers so spatial queries see realistic clustering. Seeded rows are
+tagged with a vehicle_id prefix so they can be removed again.
+
+Usage:
+    python -m benchmarks.seed --rows 1000000 [--prefix seed-] [--days 365]
+    python -m benchmarks.seed --cleanup [--prefix seed-]
+"""
+import argparse
+import time
+
+from sqlalchemy import text
+
+from app.db.session import engine
+
+# (latitude, longitude) of the cities defects are clustered around
+CITY_CENTERS = [
+    (37.7749, -122.4194),  # San Francisco
+    (40.7128, -74.0060),   # New York
+    (34.0522, -118.2437),  # Los Angeles
+    (41.8781, -87.6298),   # Chicago
+    (47.6062, -122.3321),  # Seattle
+]
+
+SEED_SQL = """
+INSERT INTO defects (vehicle_id, defect_type, severity, latitude, longitude, location, notes, reported_at)
+SELECT vehicle_id, defect_type, severity, lat, lng,
+       ST_SetSRID(ST_MakePoint(lng, lat), 4326)::geography, NULL, reported_at
+FROM (
+    SELECT :prefix || (g % 500) AS vehicle_id,
+           (enum_range(NULL::defecttype))[1 + (random() * 5)::int] AS defect_type,
+           (enum_range(NULL::severitylevel))[1 + (random() * 3)::int] AS severity,
+           -- Gaussian-ish scatter (sum of uniforms) of roughly ±0.25° around the city
+           (:lats)[1 + g % :cities] + (random() + random() + random() - 1.5) / 6 AS lat,
+           (:lngs)[1 + g % :cities] + (random() + random() + random() - 1.5) / 6 AS lng,
+           now() - random() * (:days * interval '1 day') AS reported_at
+    FROM generate_series(:start, :stop) AS g
+) AS s
+"""
+
+
+def seed_defects(bind, rows, prefix="seed-", days=365, batch_size=200000):
+    """Insert `rows` synthetic defects in batches and ANALYZE the table."""
+    lats = [lat for lat, _ in CITY_CENTERS]
+    lngs = [lng for _, lng in CITY_CENTERS]
+    for start in range(0, rows, batch_size):
+        stop = min(start + batch_size, rows) - 1
+        with bind.begin() as conn:
+            conn.execute(text(SEED_SQL), {
+                "prefix": prefix,
+                "lats": lats,
+                "lngs": lngs,
+                "cities": len(CITY_CENTERS),
+                "days": days,
+                "start": start,
+                "stop": stop,
+            })
+    with bind.begin() as conn:
+        conn.execute(text("ANALYZE defects"))
+
+
+def cleanup_defects(bind, prefix="seed-"):
+    """Delete defects created by seed_defects with the given prefix."""
+    with bind.begin() as conn:
+        result = conn.execute(text("DELETE FROM defects WHERE vehicle_id LIKE :pattern"), {"pattern": f"{prefix}%"})
+        conn.execute(text("ANALYZE defects"))
+    return result.rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed synthetic defects")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--prefix", default="seed-")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--cleanup", action="store_true", help="Delete previously seeded rows instead")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.cleanup:
+        print(f"Deleted {cleanup_defects(engine, args.prefix)} seeded defects")
+    else:
+        seed_defects(engine, args.rows, args.prefix, args.days)
+        print(f"Seeded {args.rows} defects in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark the per-row cost of serializing GET /api/defects pages.
+
+Compares the original path (ORM objects validated against the Defect
+response model, dumped to JSON-compatible dicts and encoded with json.dumps,
+as FastAPI does for response_model endpoints) with the current one (column
+tuples turned into dicts and encoded with orjson by TimedJSONResponse), for
+full rows and for a map-marker sparse fieldset, and with the binary point
+feed of /api/defects/points, decoded from a binary COPY stream like the one
+PostgreSQL sends. No database is needed: rows are synthetic and built before
+timing, so only serialization is measured. Sizes are also reported gzipped.
+
+Usage:
+    python -m benchmarks.serialization [--sizes 100,1000,5000] [--runs 20]
+"""
+import argparse
+import gzip
+import json
+import struct
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.core.request_metrics import TimedJSONResponse
+from app.models.defect import Defect as DefectModel, DefectType, SeverityLevel
+from app.schemas.defect import Defect
+from app.services.defect_fields import DEFECT_FIELDS, parse_fields, rows_to_dicts
+from app.services.point_feed import SEVERITY_CODES, TYPE_CODES, _copy_tuples, encode_points
+
+MARKER_FIELDS = "id,latitude,longitude,severity"
+
+
+def generate_rows(count, seed=42):
+    """Synthetic rows as tuples in DEFECT_FIELDS order."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(count):
+        reported_at = start + timedelta(seconds=i * 7)
+        rows.append((
+            rng.choice(list(DefectType)),
+            rng.choice(list(SeverityLevel)),
+            37.70 + rng.random() * 0.15,
+            -122.50 + rng.random() * 0.15,
+            "synthetic" if i % 10 == 0 else None,
+            i + 1,
+            f"vehicle-{i % 50}",
+            reported_at,
+            reported_at if i % 3 == 0 else None,
+        ))
+    return rows
+
+
+def copy_stream(rows):
+    """The binary COPY output of point_feed.points_query() for the rows."""
+    parts = [b"PGCOPY\n\xff\r\n\x00", struct.pack(">ii", 0, 0)]
+    for row in rows:
+        defect_type, severity, lat, lng, reported_at = row[0], row[1], row[2], row[3], row[7]
+        parts.append(struct.pack(
+            ">hififihihiq", 5, 4, lat, 4, lng, 2, TYPE_CODES[defect_type], 2, SEVERITY_CODES[severity],
+            8, int(reported_at.timestamp())
+        ))
+    parts.append(struct.pack(">h", -1))
+    return b"".join(parts)
+
+
+def legacy_serialize(objects, adapter):
+    """Original path: response model validation of ORM objects, then json.dumps."""
+    content = adapter.dump_python(adapter.validate_python(objects, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def tuple_serialize(rows, names):
+    """Current path: column tuples to dicts, encoded with orjson."""
+    return TimedJSONResponse(rows_to_dicts(rows, names)).body
+
+
+def point_feed_serialize(stream):
+    """Point feed: COPY tuples viewed with NumPy and packed column by column."""
+    rows = _copy_tuples(stream)
+    return encode_points(rows["lat"], rows["lng"], rows["epoch"], rows["type"], rows["severity"])
+
+
+def measure(fn, runs):
+    """Median wall time in seconds over `runs` calls, and the last result."""
+    fn()
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Defect list serialization benchmark")
+    parser.add_argument("--sizes", default="100,1000,5000", help="Rows per page")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    adapter = TypeAdapter(List[Defect])
+    all_fields = list(DEFECT_FIELDS)
+    marker_fields = parse_fields(MARKER_FIELDS)
+    marker_indexes = [all_fields.index(name) for name in marker_fields]
+
+    print(f"{'rows':>6} {'method':<52} {'median ms':>10} {'µs/row':>8} {'KB':>8} {'gzip KB':>8}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        rows = generate_rows(size)
+        objects = [DefectModel(**dict(zip(all_fields, row))) for row in rows]
+        marker_rows = [tuple(row[i] for i in marker_indexes) for row in rows]
+        stream = copy_stream(rows)
+        cases = [
+            ("orm + response model", lambda: legacy_serialize(objects, adapter)),
+            ("tuples + orjson", lambda: tuple_serialize(rows, all_fields)),
+            (f"tuples + orjson ({MARKER_FIELDS})", lambda: tuple_serialize(marker_rows, marker_fields)),
+            ("binary point feed", lambda: point_feed_serialize(stream)),
+        ]
+        for name, fn in cases:
+            elapsed, body = measure(fn, args.runs)
+            print(
+                f"{size:>6} {name:<52} {elapsed * 1000:>10.2f} {elapsed / size * 1e6:>8.2f} "
+                f"{len(body) / 1024:>8.1f} {len(gzip.compress(body, 6)) / 1024:>8.1f}"
+            )
+
+    # Both paths must produce the same documents
+    rows = generate_rows(10)
+    objects = [DefectModel(**dict(zip(all_fields, row))) for row in rows]
+    same = json.loads(legacy_serialize(objects, adapter)) == json.loads(tuple_serialize(rows, all_fields))
+    print(f"\noutputs match: {same}")
+
+
+if __name__ == "__main__":
+    main()
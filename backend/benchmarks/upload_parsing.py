@@ -0,0 +1,96 @@
+"""
+Benchmark memory and throughput of bulk upload parsing.
+
+Writes a synthetic upload file, then parses it with the original
+read-everything json.loads approach and with the streaming parser used by
+/api/defects/upload/bulk?stream=true, passing entries through validation in
+batches the way the ingest engine does. No database is needed.
+
+Usage:
+    python -m benchmarks.upload_parsing [--sizes 10000,100000,1000000] [--batch-size 5000]
+
+Peak memory is measured with tracemalloc, which slows parsing down; the
+rows/sec figures are therefore only comparable with each other.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from itertools import islice
+
+from app.services.bulk_ingest import validate_entries
+from app.services.upload_stream import UploadFormat, UploadStream
+from benchmarks.bulk_ingest import generate_entries
+
+
+def write_upload(path, entries, upload_format):
+    with open(path, "w") as f:
+        if upload_format == UploadFormat.NDJSON:
+            for entry in entries:
+                f.write(json.dumps(entry))
+                f.write("\n")
+        else:
+            json.dump(entries, f)
+
+
+def parse_loaded(path, upload_format, batch_size):
+    with open(path, "rb") as f:
+        data = json.loads(f.read())
+    for start in range(0, len(data), batch_size):
+        validate_entries(data[start:start + batch_size], start)
+
+
+def parse_streamed(path, upload_format, batch_size):
+    with open(path, "rb") as f:
+        iterator = iter(UploadStream(f, upload_format))
+        start = 0
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                break
+            validate_entries(batch, start)
+            start += len(batch)
+
+
+def measure(target, *args):
+    tracemalloc.start()
+    started = time.perf_counter()
+    target(*args)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk upload parsing benchmark")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    cases = [
+        ("json.loads", UploadFormat.JSON, parse_loaded),
+        ("stream", UploadFormat.JSON, parse_streamed),
+        ("stream", UploadFormat.NDJSON, parse_streamed),
+    ]
+
+    print(f"{'entries':>10} {'file MB':>8} {'mode':>10} {'format':>7} {'rows/sec':>12} {'peak MB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in [int(s) for s in args.sizes.split(",")]:
+            entries = generate_entries(size)
+            for name, upload_format, target in cases:
+                path = os.path.join(tmp, f"upload.{upload_format.value}")
+                write_upload(path, entries, upload_format)
+                file_mb = os.path.getsize(path) / (1024 * 1024)
+                elapsed, peak_mb = measure(target, path, upload_format, args.batch_size)
+                print(
+                    f"{size:>10} {file_mb:>8.1f} {name:>10} {upload_format.value:>7} "
+                    f"{size / elapsed:>12,.0f} {peak_mb:>9.1f}"
+                )
+            del entries
+
+
+if __name__ == "__main__":
+    main()
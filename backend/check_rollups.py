@@ -0,0 +1,30 @@
+import argparse
+import sys
+
+from app.db.session import SessionLocal
+from app.services.rollups import check_rollup_consistency, rebuild_rollups
+
+def check_rollups():
+    """Compare the defect rollups with raw defect counts, optionally rebuilding them"""
+    parser = argparse.ArgumentParser(description="Check defect_daily_rollups against the defects table")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the rollups from scratch first")
+    parser.add_argument("--limit", type=int, default=20, help="Number of mismatched buckets to print")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.rebuild:
+            print(f"Rebuilt rollups: {rebuild_rollups(db)} buckets")
+
+        report = check_rollup_consistency(db, limit=args.limit)
+        print(f"Raw defects:    {report['raw_total']}")
+        print(f"Rollup total:   {report['rollup_total']}")
+        print(f"Mismatches:     {report['mismatch_count']}")
+        for mismatch in report["mismatches"]:
+            print(f"- {mismatch}")
+        return 0 if report["consistent"] else 1
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(check_rollups())
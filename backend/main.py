@@ -1,16 +1,24 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
 from mangum import Mangum
 
 from app.api.routes import router as api_router
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.http_cache import HttpCacheMiddleware
+from app.core.request_metrics import RequestMetricsMiddleware, TimedJSONResponse, prometheus_exposition
+from app.db.pool import pool_status
+from app.db.session import created_engines
+from app.services.cache import cache_status
 
 # Initialize FastAPI application with metadata
 app = FastAPI(
     title="Road Metrics AI API",
     description="API for road condition assessment and defect reporting",
     version="0.1.0",
+    # Records JSON encoding time in the request metrics
+    default_response_class=TimedJSONResponse,
 )
 
 # CORS middleware setup to allow cross-origin requests
@@ -26,9 +34,20 @@ app.add_middleware(
     # Allow all headers in requests
     allow_headers=["*"],
     # Specify which headers should be exposed to the frontend
-    expose_headers=["Content-Type", "X-Total-Count"],
+    expose_headers=["Content-Type", "X-Total-Count", "X-Next-Cursor", "Idempotent-Replayed", "Server-Timing", "ETag", "X-Point-Count"],
 )
 
+# ETag and Cache-Control headers of GET routes with an http_cache() policy
+app.add_middleware(HttpCacheMiddleware)
+
+# gzip/brotli compression of responses above COMPRESSION_MIN_SIZE, except
+# already-compressed content types such as vector tiles
+app.add_middleware(CompressionMiddleware)
+
+# Per-request DB query count and timings for a sampled fraction of requests,
+# as Server-Timing headers, structured logs and optional Prometheus histograms
+app.add_middleware(RequestMetricsMiddleware)
+
 # Include API routes with prefix
 # All API endpoints will be under /api/... path
 app.include_router(api_router, prefix="/api")
@@ -45,6 +64,34 @@ def root():
 def health_check():
     return {"status": "healthy"}
 
+# Connection pool metrics: occupancy, overflow and checkout wait times
+# for the sync engine and, when DB_ASYNC is on, the async engine
+# Engines not created yet (no database use so far) are reported as null
+@app.get("/health/pool")
+def pool_metrics():
+    engine, async_engine = created_engines()
+    return {
+        "mode": settings.DB_POOL_MODE,
+        "pgbouncer": settings.DB_PGBOUNCER,
+        "sync": pool_status(engine),
+        "async": pool_status(async_engine)
+    }
+
+# Analytics response cache metrics: backend, entries, data version and
+# hit/miss/eviction counters
+@app.get("/health/cache")
+async def cache_metrics():
+    return await cache_status()
+
+# Prometheus histograms of request duration, DB queries, DB time and
+# serialization time per route; only served when METRICS_PROMETHEUS is on
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    if not settings.METRICS_PROMETHEUS:
+        raise HTTPException(status_code=404, detail="Not Found")
+    body, content_type = prometheus_exposition()
+    return Response(content=body, media_type=content_type)
+
 # AWS Lambda handler using Mangum
 # This allows the FastAPI app to run as an AWS Lambda function
 # Mangum translates between AWS Lambda events and FastAPI requests
@@ -0,0 +1,131 @@
+"""
+Upload validation, and bulk ingest against PostgreSQL with both insert methods.
+"""
+import pytest
+from sqlalchemy import text
+
+from app.db.session import SessionLocal
+from app.models.defect import DefectType, SeverityLevel
+from app.services.bulk_ingest import InsertMethod, InvalidEntry, ingest_entries, validate_entries
+from benchmarks.seed import cleanup_defects
+
+PREFIX = "test-ingest-"
+
+
+@pytest.fixture
+def db(db_engine):
+    cleanup_defects(db_engine, prefix=PREFIX)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        cleanup_defects(db_engine, prefix=PREFIX)
+
+
+def entry(index, **fields):
+    return {
+        "vehicle_id": f"{PREFIX}{index % 2}",
+        "timestamp": "2024-03-01T08:00:00Z",
+        "coordinates": [37.77, -122.42],
+        "defect_type": "pothole",
+        **fields,
+    }
+
+
+def stored(db):
+    return db.execute(text(
+        "SELECT notes, dedup_key FROM defects WHERE vehicle_id LIKE :pattern ORDER BY id"
+    ), {"pattern": f"{PREFIX}%"}).all()
+
+
+@pytest.mark.parametrize("method", list(InsertMethod))
+def test_ingest_without_dedup_stores_every_row(db, method):
+    # Repeats of the same detection, which dedup would collapse
+    entries = [entry(i) for i in range(6)] + [entry(6, notes=""), entry(7, notes='say "hi", twice')]
+
+    summary = ingest_entries(db, entries, chunk_size=3, method=method, dedup=False)
+
+    assert summary["success_count"] == len(entries)
+    assert summary["duplicates_skipped"] == 0
+    assert summary["failed_count"] == 0
+    rows = stored(db)
+    assert [notes for notes, _ in rows] == [None] * 6 + ["", 'say "hi", twice']
+    assert [key for _, key in rows] == [None] * len(entries)
+
+
+@pytest.mark.parametrize("method", list(InsertMethod))
+def test_ingest_with_dedup_skips_repeats(db, method):
+    entries = [entry(i) for i in range(6)]
+
+    summary = ingest_entries(db, entries, chunk_size=4, method=method, dedup=True)
+    again = ingest_entries(db, entries, chunk_size=4, method=method, dedup=True)
+
+    # Two vehicles, one detection each
+    assert summary["success_count"] == 2
+    assert summary["duplicates_skipped"] == 4
+    assert again["success_count"] == 0
+    assert again["duplicates_skipped"] == 6
+    assert len(stored(db)) == 2
+
+
+def test_validation_reports_the_first_failed_check_per_entry():
+    entries = [
+        InvalidEntry("Invalid JSON"),
+        "not an object",
+        {"vehicle_id": "v"},
+        entry(0, timestamp="yesterday"),
+        entry(0, timestamp=None, coordinates="nowhere"),
+        entry(0, coordinates=[37.77]),
+        entry(0, coordinates=(37.77, -122.42)),
+        entry(0, coordinates=[37.77, "-122.42"]),
+        entry(0, coordinates=[91, -122.42]),
+        entry(0, coordinates=[37.77, float("nan")]),
+        entry(0, severity="extreme"),
+        entry(0, severity=["high"], defect_type=7),
+        entry(0, defect_type=7),
+        entry(0, defect_type=["pothole"]),
+    ]
+    rows, indexes, failed = validate_entries(entries, start_index=100)
+    assert rows == [] and indexes == []
+    assert failed == [{"index": 100 + i, "error": error} for i, error in enumerate([
+        "Invalid JSON",
+        "Missing required fields",
+        "Missing required fields",
+        "Invalid timestamp format",
+        "Invalid timestamp format",
+        "Coordinates must be [latitude, longitude]",
+        "Coordinates must be [latitude, longitude]",
+        "Invalid coordinates",
+        "Invalid coordinates",
+        "Invalid coordinates",
+        "Invalid severity level",
+        "Invalid severity level",
+        "'int' object has no attribute 'lower'",
+        "'list' object has no attribute 'lower'",
+    ])]
+
+
+def test_validation_builds_rows_for_valid_entries():
+    entries = [
+        entry(0, defect_type="Minor Pothole", severity="HIGH", notes="left lane"),
+        entry(1, coordinates=[91, 0]),
+        entry(1, defect_type="debris", coordinates=[-90, 180]),
+    ]
+    rows, indexes, failed = validate_entries(entries, dedup=False)
+    assert indexes == [0, 2]
+    assert failed == [{"index": 1, "error": "Invalid coordinates"}]
+    assert [(row["defect_type"], row["severity"]) for row in rows] == [
+        (DefectType.POTHOLE, SeverityLevel.HIGH), (DefectType.OTHER, SeverityLevel.MEDIUM)
+    ]
+    assert rows[0]["notes"] == "left lane" and rows[1]["notes"] is None
+    assert (rows[1]["lat"], rows[1]["lng"]) == (-90, 180)
+    assert {row["dedup_key"] for row in rows} == {None}
+
+
+def test_validation_dedup_keys():
+    rows, _, _ = validate_entries([entry(0), entry(2), entry(1), entry(0, idempotency_key=7)])
+    keys = [row["dedup_key"] for row in rows]
+    # Same vehicle, time and place; then another vehicle; then an explicit key
+    assert keys[0] == keys[1]
+    assert len(set(keys)) == 3
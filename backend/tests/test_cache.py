@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core.http_cache import VERSION_ETAG, HttpCacheMiddleware, http_cache
+from app.services.cache import FakeRedis, LocalCache, RedisCache, cached_json_response
+
+
+@pytest.fixture(params=["local", "redis"])
+def cache(request, monkeypatch):
+    if request.param == "local":
+        backend = LocalCache(max_entries=10, ttl=60)
+    else:
+        backend = RedisCache(FakeRedis(), ttl=60)
+    monkeypatch.setattr("app.services.cache.get_cache", lambda: backend)
+    monkeypatch.setattr("app.core.http_cache.get_cache", lambda: backend)
+    return backend
+
+
+@pytest.fixture
+def client(cache):
+    calls = []
+    app = FastAPI()
+
+    @app.get("/summary", dependencies=[Depends(http_cache(60, etag=VERSION_ETAG))])
+    async def summary(request: Request):
+        async def compute():
+            calls.append(1)
+            return {"total": len(calls)}
+        return await cached_json_response(request, "summary", compute)
+
+    app.add_middleware(HttpCacheMiddleware)
+    test_client = TestClient(app)
+    test_client.calls = calls
+    return test_client
+
+
+def test_second_request_is_a_hit(client):
+    first = client.get("/summary")
+    second = client.get("/summary")
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert first.json() == second.json() == {"total": 1}
+    assert len(client.calls) == 1
+
+
+def test_only_the_policy_sets_the_etag(client):
+    response = client.get("/summary")
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+    assert client.get("/summary", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_version_bump_recomputes(client, cache):
+    client.get("/summary")
+    asyncio.run(cache.bump_version())
+    response = client.get("/summary")
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json() == {"total": 2}
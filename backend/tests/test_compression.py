@@ -0,0 +1,117 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+
+from app.core.compression import (
+    CompressionMiddleware, accepted_encodings, brotli_available, compressible, negotiate_encoding
+)
+from app.core.config import settings
+
+LARGE = "defect " * 1000
+SMALL = "defect"
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, set()),
+    ("", set()),
+    ("gzip", {"gzip"}),
+    ("gzip, deflate, br", {"gzip", "deflate", "br"}),
+    ("GZIP;q=0.5, Br;q=1.0", {"gzip", "br"}),
+    ("gzip;q=0, br", {"br"}),
+    ("gzip;q=0.0, br;q=0.000", set()),
+    ("gzip;q=abc, br", {"br"}),
+    ("identity;q=1, *;q=0", {"identity"}),
+])
+def test_accepted_encodings(header, expected):
+    assert accepted_encodings(header) == expected
+
+
+def test_negotiation_prefers_brotli_then_gzip():
+    assert negotiate_encoding("gzip, br") == ("br" if brotli_available() else "gzip")
+    assert negotiate_encoding("gzip, br;q=0") == "gzip"
+    assert negotiate_encoding("deflate") is None
+    assert negotiate_encoding(None) is None
+
+
+@pytest.mark.parametrize("headers, expected", [
+    ({"content-type": "application/json"}, True),
+    ({"content-type": "text/csv; charset=utf-8"}, True),
+    ({}, True),
+    ({"content-type": "application/json", "content-encoding": "gzip"}, False),
+    ({"content-type": "application/vnd.mapbox-vector-tile"}, False),
+    ({"content-type": "application/vnd.apache.parquet"}, False),
+    ({"content-type": "Image/PNG"}, False),
+])
+def test_compressible(headers, expected):
+    assert compressible(Headers(headers)) is expected
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.get("/large")
+    def large():
+        return PlainTextResponse(LARGE)
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse(SMALL)
+
+    @app.get("/tile")
+    def tile():
+        return Response(LARGE.encode(), media_type="application/vnd.mapbox-vector-tile")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((LARGE for _ in range(3)), media_type="text/csv")
+
+    app.add_middleware(CompressionMiddleware)
+    return TestClient(app)
+
+
+def test_large_body_is_gzipped(client):
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(LARGE)
+    assert response.text == LARGE
+
+
+def test_large_body_is_brotli_compressed(client):
+    pytest.importorskip("brotli")
+    response = client.get("/large", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.text == LARGE
+
+
+def test_body_below_min_size_is_sent_as_is(client):
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert len(SMALL) < settings.COMPRESSION_MIN_SIZE
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.text == SMALL
+
+
+def test_excluded_type_is_sent_as_is(client):
+    response = client.get("/tile", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.content == LARGE.encode()
+
+
+def test_without_accept_encoding_nothing_is_compressed(client):
+    response = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.text == LARGE
+
+
+def test_stream_is_compressed_chunk_by_chunk(client):
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(raw).decode() == LARGE * 3
@@ -0,0 +1,73 @@
+"""
+Round trip of the batch job's defect chunks through the Parquet data lake
+(infrastructure/scripts/batch/data_lake.py) on a local directory.
+"""
+import sys
+
+import pytest
+
+from tests.conftest import BACKEND_DIR
+
+pd = pytest.importorskip("pandas")
+pc = pytest.importorskip("pyarrow.compute")
+
+sys.path.insert(0, str(BACKEND_DIR.parent / "infrastructure" / "scripts" / "batch"))
+import data_lake  # noqa: E402
+
+
+def defect_chunk(rows, vehicles, day, first_id=0, notes=None):
+    """A chunk as fetch_daily_defects reads it, with categorical columns."""
+    return pd.DataFrame({
+        "id": range(first_id, first_id + rows),
+        "defect_type": pd.Categorical(["POTHOLE", "CRACK"][i % 2] for i in range(rows)),
+        "severity": pd.Categorical(["LOW", "MEDIUM", "HIGH"][i % 3] for i in range(rows)),
+        "latitude": [37.7 + i * 1e-5 for i in range(rows)],
+        "longitude": [-122.4 - i * 1e-5 for i in range(rows)],
+        "reported_at": pd.to_datetime([f"{day} 12:00:00"] * rows, utc=True),
+        "notes": [notes] * rows,
+        "vehicle_id": pd.Categorical(f"vehicle-{i % vehicles}" for i in range(rows)),
+    })
+
+
+def write_day(lake, day, chunks):
+    # write_defect_chunks yields the chunks back as it writes them
+    assert len(list(data_lake.write_defect_chunks(lake, day, chunks))) == len(chunks)
+
+
+def test_chunks_with_different_category_counts_read_back(tmp_path):
+    lake = str(tmp_path)
+    # 3 vehicles fit an int8 dictionary index, 500 need int16
+    write_day(lake, "2024-01-01", [
+        defect_chunk(10, 3, "2024-01-01"),
+        defect_chunk(1000, 500, "2024-01-01", first_id=10, notes="rechecked"),
+    ])
+    write_day(lake, "2024-01-02", [defect_chunk(1000, 500, "2024-01-02", first_id=1010)])
+
+    table = data_lake.read_range(lake, data_lake.DEFECTS, "2024-01-01", "2024-01-02")
+    assert table.num_rows == 2010
+    assert sorted(table["id"].to_pylist()) == list(range(2010))
+    assert len(set(table["vehicle_id"].to_pylist())) == 500
+    assert table.filter(pc.less(table["id"], 10))["notes"].to_pylist() == [None] * 10
+
+
+def test_read_range_prunes_days_and_types(tmp_path):
+    lake = str(tmp_path)
+    write_day(lake, "2024-01-01", [defect_chunk(10, 3, "2024-01-01")])
+    write_day(lake, "2024-01-02", [defect_chunk(1000, 500, "2024-01-02", first_id=10)])
+
+    table = data_lake.read_range(
+        lake, data_lake.DEFECTS, "2024-01-02", "2024-01-02",
+        columns=["id", "vehicle_id"], defect_types=["CRACK"]
+    )
+    assert table.column_names == ["id", "vehicle_id"]
+    assert table.num_rows == 500
+    assert min(table["id"].to_pylist()) >= 10
+
+
+def test_rewriting_a_day_replaces_it(tmp_path):
+    lake = str(tmp_path)
+    write_day(lake, "2024-01-01", [defect_chunk(1000, 500, "2024-01-01")])
+    write_day(lake, "2024-01-01", [defect_chunk(10, 3, "2024-01-01")])
+
+    table = data_lake.read_range(lake, data_lake.DEFECTS, "2024-01-01", "2024-01-01")
+    assert table.num_rows == 10
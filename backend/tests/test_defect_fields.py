@@ -0,0 +1,31 @@
+import pytest
+
+from app.services.defect_fields import DEFECT_FIELDS, InvalidFields, field_columns, parse_fields, rows_to_dicts
+
+
+@pytest.mark.parametrize("fields", [None, ""])
+def test_no_fieldset_selects_every_field(fields):
+    assert parse_fields(fields) == list(DEFECT_FIELDS)
+
+
+def test_fields_come_back_in_schema_order():
+    assert parse_fields("severity,id,latitude") == ["severity", "latitude", "id"]
+
+
+def test_whitespace_empty_names_and_repeats_are_ignored():
+    assert parse_fields(" id , ,latitude,id,") == ["latitude", "id"]
+
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(InvalidFields) as excinfo:
+        parse_fields("id,location,password")
+    assert "location, password" in str(excinfo.value)
+
+
+def test_rows_become_dicts_of_the_selected_fields():
+    names = parse_fields("id,severity")
+    assert field_columns(names) == [DEFECT_FIELDS["severity"], DEFECT_FIELDS["id"]]
+    assert rows_to_dicts([("HIGH", 1), ("LOW", 2)], names) == [
+        {"severity": "HIGH", "id": 1},
+        {"severity": "LOW", "id": 2},
+    ]
@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.http_cache import (
+    VERSION_ETAG, HttpCacheMiddleware, body_etag, cache_control, etag_matches, http_cache
+)
+from app.services.cache import get_cache, invalidate_cache
+
+ETAG = 'W/"abc123"'
+
+
+@pytest.mark.parametrize("max_age, expected", [
+    (0, "no-cache"),
+    (-1, "no-cache"),
+    (300, "public, max-age=300"),
+])
+def test_cache_control(max_age, expected):
+    assert cache_control(max_age) == expected
+
+
+@pytest.mark.parametrize("if_none_match, expected", [
+    (None, False),
+    ("", False),
+    ('W/"abc123"', True),
+    ('"abc123"', True),
+    ('"abc12"', False),
+    ('"other", W/"abc123"', True),
+    ('"other",W/"abc123" ', True),
+    ('"other", "another"', False),
+    ("*", True),
+])
+def test_etag_matches(if_none_match, expected):
+    assert etag_matches(if_none_match, ETAG) is expected
+
+
+def test_strong_etag_matches_weak_candidate():
+    assert etag_matches('W/"abc123"', '"abc123"')
+
+
+@pytest.fixture
+def client():
+    calls = []
+    app = FastAPI()
+
+    @app.get("/analytics", dependencies=[Depends(http_cache(60, etag=VERSION_ETAG))])
+    def analytics():
+        calls.append(1)
+        return JSONResponse({"calls": len(calls)}, headers={"Cache-Control": "private"})
+
+    @app.get("/fresh", dependencies=[Depends(http_cache(0))])
+    def fresh(value: int = 0):
+        calls.append(1)
+        return JSONResponse({"value": value})
+
+    @app.get("/stream", dependencies=[Depends(http_cache(0))])
+    def stream():
+        return StreamingResponse(iter([b"a", b"b"]), media_type="text/plain")
+
+    @app.get("/uncached", dependencies=[Depends(http_cache(0, etag=None))])
+    def uncached():
+        return JSONResponse({})
+
+    app.add_middleware(HttpCacheMiddleware)
+    test_client = TestClient(app)
+    test_client.calls = calls
+    return test_client
+
+
+@pytest.fixture
+def shared_version(monkeypatch):
+    monkeypatch.setattr(get_cache(), "shared_version", True)
+
+
+def test_policy_headers_replace_the_endpoint_ones(client):
+    response = client.get("/analytics")
+    assert response.headers["cache-control"] == "public, max-age=60"
+    assert response.headers["etag"].startswith('W/"')
+    assert "etag" not in client.get("/uncached").headers
+    assert client.get("/uncached").headers["cache-control"] == "no-cache"
+
+
+def test_unknown_etag_kind_is_rejected():
+    with pytest.raises(ValueError):
+        http_cache(0, etag="strong")
+
+
+def test_version_etag_is_answered_304_without_running_the_endpoint(client):
+    etag = client.get("/analytics").headers["etag"]
+    response = client.get("/analytics", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+    assert len(client.calls) == 1
+
+
+def test_version_etag_depends_on_query_and_data_version(client):
+    etag = client.get("/analytics", params={"days": 7}).headers["etag"]
+    assert client.get("/analytics", params={"days": 7, "bbox": ""}).headers["etag"] == etag
+    assert client.get("/analytics", params={"days": 30}).headers["etag"] != etag
+
+    asyncio.run(invalidate_cache())
+    response = client.get("/analytics", params={"days": 7}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_content_etag_hashes_the_body_without_a_shared_version(client):
+    assert not get_cache().shared_version
+    response = client.get("/fresh", params={"value": 1})
+    assert response.headers["etag"] == body_etag(response.content)
+    assert response.headers["cache-control"] == "no-cache"
+
+    # Another process's write changes the body, not this process's version
+    assert client.get("/fresh", params={"value": 2}).headers["etag"] != response.headers["etag"]
+
+    revalidated = client.get("/fresh", params={"value": 1}, headers={"If-None-Match": response.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == response.headers["etag"]
+    assert revalidated.headers["cache-control"] == "no-cache"
+    assert "content-length" not in revalidated.headers
+    assert len(client.calls) == 3
+
+
+def test_content_etag_uses_the_shared_version(client, shared_version):
+    etag = client.get("/fresh").headers["etag"]
+    assert etag != body_etag(b'{"value":0}')
+    response = client.get("/fresh", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert len(client.calls) == 1
+
+
+def test_streamed_body_gets_no_content_etag(client):
+    response = client.get("/stream")
+    assert response.text == "ab"
+    assert "etag" not in response.headers
+    assert response.headers["cache-control"] == "no-cache"
@@ -0,0 +1,28 @@
+"""
+Cold start of the Lambda handler: `import main` leaves the heavy
+dependencies unloaded until first use. The import time budget itself is
+checked by the CI step running `python -m benchmarks.import_time`.
+"""
+import subprocess
+import sys
+
+import pytest
+
+from tests.conftest import BACKEND_DIR
+
+HEAVY_MODULES = ("boto3", "asyncpg", "pyarrow", "jose", "passlib")
+
+
+@pytest.fixture(autouse=True)
+def in_backend_dir(monkeypatch):
+    # `python -c "import main"` resolves main from the working directory
+    monkeypatch.chdir(BACKEND_DIR)
+
+
+def test_import_main_leaves_heavy_modules_unloaded():
+    completed = subprocess.run(
+        [sys.executable, "-c", "import sys, main; print('\\n'.join(sys.modules))"],
+        capture_output=True, text=True, check=True,
+    )
+    loaded = set(completed.stdout.split())
+    assert [name for name in HEAVY_MODULES if name in loaded] == []
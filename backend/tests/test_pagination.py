@@ -0,0 +1,68 @@
+import base64
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.pagination import InvalidCursor, after_cursor, decode_cursor, encode_cursor
+
+
+def raw_cursor(payload: bytes) -> str:
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("reported_at", [
+    datetime(2024, 3, 1, 8, 30, 15, 123456, tzinfo=timezone.utc),
+    datetime(2024, 3, 1, 8, 30),
+    None,
+])
+def test_round_trip(reported_at):
+    cursor = encode_cursor(reported_at, 42)
+    assert decode_cursor(cursor) == (reported_at, 42)
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor(datetime(2024, 3, 1, tzinfo=timezone.utc), 2 ** 40)
+    assert "=" not in cursor
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not a cursor",
+    "%%%",
+    raw_cursor(b"\xff\xfe"),
+    raw_cursor(b"[1, 2"),
+    raw_cursor(b'{"reported_at": null, "id": 1}'),
+    raw_cursor(b'[null, 1, 2]'),
+    raw_cursor(b'["yesterday", 1]'),
+    raw_cursor(b'[null, "1"]'),
+    raw_cursor(b'[null, 1.5]'),
+])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_tampered_cursor_is_rejected():
+    cursor = encode_cursor(datetime(2024, 3, 1, tzinfo=timezone.utc), 42)
+    tampered = raw_cursor(base64.urlsafe_b64decode(cursor + "==").replace(b"2024-03-01", b"2024-13-01"))
+    with pytest.raises(InvalidCursor):
+        decode_cursor(tampered)
+
+
+def test_cursor_from_another_filter_is_a_plain_position():
+    # Cursors hold only a (reported_at, id) position in DEFECT_ORDER, not the
+    # filters of the page they came from: under other filters they continue
+    # after the same position, which is still a well-defined page
+    reported_at = datetime(2024, 3, 1, tzinfo=timezone.utc)
+    cursor = encode_cursor(reported_at, 42)
+    assert decode_cursor(cursor) == (reported_at, 42)
+    condition = str(after_cursor(*decode_cursor(cursor)).compile(dialect=postgresql.dialect()))
+    assert condition == "(defects.reported_at, defects.id) < (%(param_1)s, %(param_2)s)"
+
+
+def test_cursor_without_timestamp_continues_into_timestamped_rows():
+    condition = str(after_cursor(None, 42).compile(dialect=postgresql.dialect()))
+    assert "defects.reported_at IS NULL AND defects.id < " in condition
+    assert "defects.reported_at IS NOT NULL" in condition
@@ -0,0 +1,78 @@
+import struct
+
+import numpy as np
+import pytest
+
+from app.models.defect import DefectType, SeverityLevel
+from app.services.point_feed import (
+    HEADER_SIZE, MAGIC, SEVERITY_CODES, TYPE_CODES, VERSION, InvalidPayload, decode_points, encode_points
+)
+
+POINTS = [
+    # latitude, longitude, reported_at, defect type, severity
+    (37.7749, -122.4194, 1700000000, DefectType.POTHOLE, SeverityLevel.CRITICAL),
+    (40.7128, -74.0060, 1700000100, DefectType.CRACK, SeverityLevel.LOW),
+    (-33.8688, 151.2093, 0, DefectType.OTHER, SeverityLevel.MEDIUM),
+]
+
+
+def encode(points):
+    lat, lng, epoch, types, severities = zip(*points) if points else ([], [], [], [], [])
+    return encode_points(
+        lat, lng, epoch, [TYPE_CODES[t] for t in types], [SEVERITY_CODES[s] for s in severities]
+    )
+
+
+def test_header():
+    payload = encode(POINTS)
+    magic, version, flags, count, reserved = struct.unpack("<4sHHII", payload[:HEADER_SIZE])
+    assert (magic, version, flags, count, reserved) == (MAGIC, VERSION, 0, 3, 0)
+    assert len(payload) == HEADER_SIZE + 14 * 3
+
+
+def test_columns_are_aligned_and_in_order():
+    payload = encode(POINTS)
+    n = len(POINTS)
+    # Each column can be viewed in place with a typed array at its offset
+    assert np.frombuffer(payload, "<f4", n, HEADER_SIZE).tolist() == pytest.approx([p[0] for p in POINTS])
+    assert np.frombuffer(payload, "<f4", n, HEADER_SIZE + 4 * n).tolist() == pytest.approx([p[1] for p in POINTS])
+    assert np.frombuffer(payload, "<u4", n, HEADER_SIZE + 8 * n).tolist() == [p[2] for p in POINTS]
+    assert np.frombuffer(payload, "u1", n, HEADER_SIZE + 12 * n).tolist() == [TYPE_CODES[p[3]] for p in POINTS]
+    assert np.frombuffer(payload, "u1", n, HEADER_SIZE + 13 * n).tolist() == [SEVERITY_CODES[p[4]] for p in POINTS]
+    assert all(offset % 4 == 0 for offset in (HEADER_SIZE, HEADER_SIZE + 4 * n, HEADER_SIZE + 8 * n))
+
+
+def test_round_trip():
+    columns = decode_points(encode(POINTS))
+    assert columns["latitude"].tolist() == pytest.approx([p[0] for p in POINTS])
+    assert columns["longitude"].tolist() == pytest.approx([p[1] for p in POINTS])
+    assert columns["reported_at"].tolist() == [p[2] for p in POINTS]
+    types = list(DefectType)
+    severities = list(SeverityLevel)
+    assert [types[code] for code in columns["defect_type"]] == [p[3] for p in POINTS]
+    assert [severities[code] for code in columns["severity"]] == [p[4] for p in POINTS]
+
+
+def test_codes_follow_declaration_order():
+    assert list(TYPE_CODES.values()) == list(range(len(DefectType)))
+    assert [s for s, _ in sorted(SEVERITY_CODES.items(), key=lambda item: item[1])] == list(SeverityLevel)
+    assert SEVERITY_CODES[SeverityLevel.LOW] < SEVERITY_CODES[SeverityLevel.CRITICAL]
+
+
+def test_empty_feed():
+    payload = encode([])
+    assert len(payload) == HEADER_SIZE
+    assert struct.unpack("<I", payload[8:12]) == (0,)
+    columns = decode_points(payload)
+    assert all(len(column) == 0 for column in columns.values())
+
+
+@pytest.mark.parametrize("payload", [
+    b"",
+    b"XXXX" + bytes(12),
+    MAGIC + struct.pack("<HHII", VERSION + 1, 0, 0, 0),
+    MAGIC + struct.pack("<HHII", VERSION, 0, 2, 0) + bytes(14),
+])
+def test_invalid_payloads(payload):
+    with pytest.raises(InvalidPayload):
+        decode_points(payload)
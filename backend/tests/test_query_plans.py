@@ -0,0 +1,54 @@
+"""
+Index usage of the endpoint queries, checked with benchmarks.query_plans on
+a small seeded table. Sequential scans are disabled while planning, so a
+case fails only when no expected index can serve the query.
+"""
+import pytest
+
+from benchmarks import query_plans
+
+pytestmark = pytest.mark.usefixtures("seeded_defects")
+
+
+def _case(name):
+    for case_name, target, expected_indexes in query_plans.CASES:
+        if case_name == name:
+            return target, expected_indexes
+    raise KeyError(name)
+
+
+@pytest.mark.parametrize("name", [
+    "analytics/density",
+    "analytics/density/batch",
+])
+def test_density_uses_location_index(name):
+    target, expected_indexes = _case(name)
+    assert query_plans.check_case(name, target, expected_indexes, force_index=True) == []
+
+
+@pytest.mark.parametrize("name", [
+    "defects",
+    "defects?cursor",
+    "defects?defect_type&severity",
+])
+def test_defect_list_uses_keyset_indexes(name):
+    target, expected_indexes = _case(name)
+    assert query_plans.check_case(name, target, expected_indexes, force_index=True) == []
+
+
+@pytest.mark.parametrize("name", [
+    "defects?bbox",
+    "analytics/heatmap?days&bbox",
+])
+def test_viewport_queries_use_indexes(name):
+    target, expected_indexes = _case(name)
+    assert query_plans.check_case(name, target, expected_indexes, force_index=True) == []
+
+
+@pytest.mark.parametrize("name", [
+    "batch: daily defects",
+    "batch: daily aggregates",
+])
+def test_batch_day_ranges_use_reported_at_indexes(name):
+    target, expected_indexes = _case(name)
+    assert query_plans.check_case(name, target, expected_indexes, force_index=True) == []
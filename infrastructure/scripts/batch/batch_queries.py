@@ -0,0 +1,39 @@
+"""
+Road Metrics AI - Batch Queries
+
+SQL of the batch job's reads from the defects table. Both filter on a
+half-open range of the bare reported_at column, which the reported_at
+indexes can serve, unlike DATE(reported_at) = ...
+
+Kept free of heavy imports so the backend's query plan checks
+(backend/benchmarks/query_plans.py) can EXPLAIN the exact text the job runs.
+"""
+
+# Columns of the defects table the batch job may read
+DEFECT_COLUMNS = (
+    "id", "defect_type", "severity", "latitude", "longitude", "reported_at", "notes", "vehicle_id"
+)
+
+def daily_defects_sql(columns):
+    """Defects reported in [:start, :end), with only the given columns."""
+    return f"""
+    SELECT 
+        {", ".join(columns)}
+    FROM 
+        defects
+    WHERE 
+        reported_at >= :start AND reported_at < :end
+    """
+
+# Per-day (type, severity) counts of defects reported in [:start, :end)
+DAILY_AGGREGATES_SQL = """
+    SELECT
+        DATE(reported_at) AS day, defect_type::text AS defect_type,
+        severity::text AS severity, COUNT(*) AS defect_count
+    FROM
+        defects
+    WHERE
+        reported_at >= :start AND reported_at < :end
+    GROUP BY
+        1, 2, 3
+    """
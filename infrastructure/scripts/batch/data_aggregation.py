@@ -6,13 +6,30 @@ This script performs daily aggregation of road defect data, generating statistic
 and reports that are stored in S3 and the database.
 
 Usage:
-    python data_aggregation.py [--date YYYY-MM-DD]
+    python data_aggregation.py [--date YYYY-MM-DD] [--chunksize 50000]
+                               [--lake s3://bucket/lake | /local/dir] [--skip-lake]
+    python data_aggregation.py --start YYYY-MM-DD --end YYYY-MM-DD [--workers N]
+                               [--chunk-days 7] [--skip-s3] [--restart]
+
+A single day is read in chunks of --chunksize rows (BATCH_CHUNKSIZE) through a
+server-side cursor, so memory stays bounded on busy days; throughput and peak
+RSS are logged.
+
+Each processed day is also written to the Parquet data lake (data_lake.py):
+the day's raw defects in single-day mode, its aggregates in both modes.
+
+With --start/--end (both inclusive) the script backfills a range of days:
+days are split into chunks aggregated in SQL by a pool of worker processes,
+each chunk's statistics are written in one bulk upsert, and completed days
+are recorded in a checkpoint file so a crashed backfill resumes where it
+stopped (--restart ignores the checkpoint).
 
 Dependencies:
     - pandas
     - sqlalchemy
     - boto3
     - psycopg2-binary
+    - pyarrow (data lake output, see data_lake.py; not needed with --skip-lake)
 """
 
 import os
@@ -21,11 +38,18 @@ import logging
 import argparse
 from datetime import datetime, timedelta
 import json
+import resource
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
 import boto3
 from sqlalchemy import create_engine, text
 from sqlalchemy.exc import SQLAlchemyError
 
+from batch_queries import DAILY_AGGREGATES_SQL, DEFECT_COLUMNS, daily_defects_sql
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -48,6 +72,25 @@ DB_CONFIG = {
 
 S3_BUCKET = os.environ.get("S3_BUCKET", "road-metrics-data")
 
+# Root of the Parquet data lake: an s3:// URI or a local directory
+DATA_LAKE_URI = os.environ.get("DATA_LAKE_URI", f"s3://{S3_BUCKET}/lake")
+
+# Columns read as pandas categoricals (few distinct values, so far smaller
+# than object strings)
+CATEGORICAL_COLUMNS = ("defect_type", "severity", "vehicle_id")
+
+# Columns needed for the daily statistics
+STATISTICS_COLUMNS = ("defect_type", "severity")
+
+# Rows per DataFrame chunk; peak memory grows with this, not with the day's volume
+DEFAULT_CHUNKSIZE = int(os.environ.get("BATCH_CHUNKSIZE", "50000"))
+
+# Backfill checkpoints, one file per date range
+CHECKPOINT_DIR = os.environ.get("CHECKPOINT_DIR", "/opt/road-metrics/batch/checkpoints")
+
+# Engine of a backfill worker process, created by init_worker
+_worker_engine = None
+
 def parse_args():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(description="Road Metrics AI Data Aggregation")
@@ -56,7 +99,31 @@ def parse_args():
         type=str,
         help="Date to process in YYYY-MM-DD format (default: yesterday)"
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=DEFAULT_CHUNKSIZE,
+        help="Rows read per chunk when processing a single day"
+    )
+    parser.add_argument("--lake", default=DATA_LAKE_URI, help="Data lake root (default: DATA_LAKE_URI)")
+    parser.add_argument("--skip-lake", action="store_true", help="Do not write Parquet to the data lake")
+    parser.add_argument("--start", type=str, help="First date of a backfill range (YYYY-MM-DD)")
+    parser.add_argument("--end", type=str, help="Last date of a backfill range, inclusive (YYYY-MM-DD)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes for a backfill (default: CPU count)"
+    )
+    parser.add_argument("--chunk-days", type=int, default=7, help="Days aggregated per worker task")
+    parser.add_argument("--skip-s3", action="store_true", help="Only update the database during a backfill")
+    parser.add_argument("--restart", action="store_true", help="Ignore the backfill checkpoint")
+    args = parser.parse_args()
+    if bool(args.start) != bool(args.end):
+        parser.error("--start and --end must be given together")
+    if args.start and args.date:
+        parser.error("--date cannot be combined with --start/--end")
+    return args
 
 def get_db_connection():
     """Create a database connection."""
@@ -69,51 +136,72 @@ def get_db_connection():
         logger.error(f"Failed to connect to database: {e}")
         raise
 
-def fetch_daily_defects(engine, date):
-    """Fetch defects reported on the specified date."""
+def day_range(date):
+    """Half-open [start, end) bounds of a YYYY-MM-DD day, for index-friendly filters on reported_at."""
+    start = datetime.strptime(date, "%Y-%m-%d").date()
+    return start, start + timedelta(days=1)
+
+def fetch_daily_defects(engine, date, columns=STATISTICS_COLUMNS, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Fetch defects reported on the specified date as DataFrames of at most chunksize rows.
+
+    Only the given columns are read. Rows are streamed through a server-side
+    cursor, so memory use is bounded by the chunk size rather than the day.
+    """
+    unknown = set(columns) - set(DEFECT_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown defect columns: {sorted(unknown)}")
     try:
-        query = f"""
-        SELECT 
-            id, defect_type, severity, latitude, longitude, 
-            reported_at, notes, vehicle_id
-        FROM 
-            defects
-        WHERE 
-            DATE(reported_at) = '{date}'
-        """
-        df = pd.read_sql(query, engine)
-        logger.info(f"Fetched {len(df)} defects for {date}")
-        return df
+        query = text(daily_defects_sql(columns))
+        start, end = day_range(date)
+        dtype = {column: "category" for column in CATEGORICAL_COLUMNS if column in columns}
+        with engine.connect() as conn:
+            conn = conn.execution_options(stream_results=True, max_row_buffer=chunksize)
+            yield from pd.read_sql(
+                query, conn, params={"start": start, "end": end}, chunksize=chunksize, dtype=dtype
+            )
     except SQLAlchemyError as e:
         logger.error(f"Database query error: {e}")
         raise
 
-def generate_daily_statistics(df):
-    """Generate statistics from daily defect data."""
-    if df.empty:
-        logger.warning("No data available for statistics generation")
-        return {
-            "total_count": 0,
-            "by_type": {},
-            "by_severity": {},
-            "date": df.name
-        }
-    
-    # Count by defect type
-    type_counts = df['defect_type'].value_counts().to_dict()
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB."""
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def generate_daily_statistics(chunks, date):
+    """Generate statistics from daily defect data, combining the counts of each chunk."""
+    started = time.perf_counter()
+    total_count = 0
+    type_counts = Counter()
+    severity_counts = Counter()
+    type_severity_counts = Counter()
+    for df in chunks:
+        total_count += len(df)
+        # Categories missing from a chunk count as 0 and are dropped below
+        type_counts.update(df['defect_type'].value_counts(sort=False).to_dict())
+        severity_counts.update(df['severity'].value_counts(sort=False).to_dict())
+        type_severity_counts.update(df.groupby(['defect_type', 'severity'], observed=True).size().to_dict())
+    elapsed = time.perf_counter() - started
     
-    # Count by severity
-    severity_counts = df['severity'].value_counts().to_dict()
+    if total_count == 0:
+        logger.warning("No data available for statistics generation")
     
     # Create statistics object
     stats = {
-        "total_count": len(df),
-        "by_type": type_counts,
-        "by_severity": severity_counts,
-        "date": df.name
+        "total_count": total_count,
+        "by_type": {str(k): int(v) for k, v in type_counts.items() if v},
+        "by_severity": {str(k): int(v) for k, v in severity_counts.items() if v},
+        "by_type_severity": {},
+        "date": date
     }
+    for (defect_type, severity), count in type_severity_counts.items():
+        stats["by_type_severity"].setdefault(str(defect_type), {})[str(severity)] = int(count)
     
-    logger.info(f"Generated statistics: {len(df)} total defects")
+    logger.info(
+        f"Generated statistics: {total_count} total defects in {elapsed:.2f}s "
+        f"({total_count / elapsed if elapsed else 0:.0f} rows/sec, peak RSS {peak_rss_mb():.1f} MB)"
+    )
     return stats
 
 def save_to_s3(data, bucket, key):
@@ -134,45 +222,161 @@ def save_to_s3(data, bucket, key):
 def update_statistics_table(engine, stats):
     """Update the statistics table in the database."""
     try:
-        # Convert stats to JSON string for storage
-        stats_json = json.dumps(stats, default=str)
-        
-        # Check if entry for this date already exists
-        check_query = f"""
-        SELECT id FROM defect_statistics WHERE date = '{stats['date']}'
-        """
-        with engine.connect() as conn:
-            result = conn.execute(text(check_query))
-            existing_id = result.scalar()
-            
-            if existing_id:
-                # Update existing record
-                update_query = f"""
-                UPDATE defect_statistics 
-                SET statistics = '{stats_json}'::jsonb, 
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE id = {existing_id}
-                """
-                conn.execute(text(update_query))
-                logger.info(f"Updated statistics for {stats['date']}")
-            else:
-                # Insert new record
-                insert_query = f"""
-                INSERT INTO defect_statistics (date, statistics, created_at, updated_at)
-                VALUES ('{stats['date']}', '{stats_json}'::jsonb, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-                """
-                conn.execute(text(insert_query))
-                logger.info(f"Inserted new statistics for {stats['date']}")
-            
-            conn.commit()
+        upsert_statistics(engine, [stats])
+        logger.info(f"Upserted statistics for {stats['date']}")
     except Exception as e:
         logger.error(f"Failed to update statistics table: {e}")
         raise
 
+def fetch_daily_aggregates(engine, start_date, end_date):
+    """
+    Per-day statistics for start_date..end_date (inclusive), aggregated in SQL.
+
+    Only (day, type, severity, count) groups are transferred, never the
+    defects themselves. Days without defects get zero statistics.
+    """
+    query = text(DAILY_AGGREGATES_SQL)
+    with engine.connect() as conn:
+        rows = conn.execute(query, {"start": start_date, "end": end_date + timedelta(days=1)}).all()
+
+    stats = {}
+    day = start_date
+    while day <= end_date:
+        stats[day] = {
+            "total_count": 0, "by_type": {}, "by_severity": {}, "by_type_severity": {}, "date": day.isoformat()
+        }
+        day += timedelta(days=1)
+    for day, defect_type, severity, count in rows:
+        day_stats = stats[day]
+        day_stats["total_count"] += count
+        day_stats["by_type"][defect_type] = day_stats["by_type"].get(defect_type, 0) + count
+        day_stats["by_severity"][severity] = day_stats["by_severity"].get(severity, 0) + count
+        day_stats["by_type_severity"].setdefault(defect_type, {})[severity] = count
+    return list(stats.values())
+
+def upsert_statistics(engine, stats_list):
+    """
+    Insert or replace the statistics of one or more days in one statement.
+
+    Relies on the unique date of defect_statistics (backend migration
+    add_defect_statistics) as the conflict target.
+    """
+    if not stats_list:
+        return
+    query = text("""
+    INSERT INTO defect_statistics (date, statistics, created_at, updated_at)
+    SELECT CAST(s.date AS DATE), CAST(s.statistics AS JSONB), CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+    FROM unnest(CAST(:dates AS TEXT[]), CAST(:statistics AS TEXT[])) AS s(date, statistics)
+    ON CONFLICT (date) DO UPDATE
+    SET statistics = EXCLUDED.statistics, updated_at = CURRENT_TIMESTAMP
+    """)
+    with engine.begin() as conn:
+        conn.execute(query, {
+            "dates": [stats["date"] for stats in stats_list],
+            "statistics": [json.dumps(stats, default=str) for stats in stats_list]
+        })
+
+def init_worker():
+    """Give each backfill worker process its own engine."""
+    global _worker_engine
+    _worker_engine = get_db_connection()
+
+def process_chunk(start_date, end_date, skip_s3, lake):
+    """Backfill worker task: aggregate one chunk of days and save each day to S3 and the lake."""
+    stats_list = fetch_daily_aggregates(_worker_engine, start_date, end_date)
+    for stats in stats_list:
+        if not skip_s3:
+            save_to_s3(stats, S3_BUCKET, f"statistics/daily/{stats['date']}.json")
+        if lake:
+            import data_lake  # loads pyarrow, so only imported when the lake is written
+            data_lake.write_statistics(lake, stats)
+    return stats_list
+
+def checkpoint_path(start_date, end_date):
+    return os.path.join(CHECKPOINT_DIR, f"backfill_{start_date}_{end_date}.json")
+
+def load_checkpoint(path):
+    """Dates already completed by an earlier run of the same backfill."""
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return set(json.load(f)["completed"])
+
+def save_checkpoint(path, completed):
+    # Write then rename, so a crash never leaves a truncated checkpoint
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with tempfile.NamedTemporaryFile("w", dir=os.path.dirname(path), delete=False) as f:
+        json.dump({"completed": sorted(completed)}, f)
+    os.replace(f.name, path)
+
+def pending_chunks(start_date, end_date, completed, chunk_days):
+    """Contiguous runs of at most chunk_days days not yet completed."""
+    chunks = []
+    chunk = []
+    day = start_date
+    while day <= end_date:
+        if day.isoformat() in completed:
+            if chunk:
+                chunks.append((chunk[0], chunk[-1]))
+                chunk = []
+        else:
+            chunk.append(day)
+            if len(chunk) == chunk_days:
+                chunks.append((chunk[0], chunk[-1]))
+                chunk = []
+        day += timedelta(days=1)
+    if chunk:
+        chunks.append((chunk[0], chunk[-1]))
+    return chunks
+
+def run_backfill(args):
+    """Aggregate every day from --start to --end in parallel, resuming from the checkpoint."""
+    start_date = datetime.strptime(args.start, "%Y-%m-%d").date()
+    end_date = datetime.strptime(args.end, "%Y-%m-%d").date()
+    if end_date < start_date:
+        raise ValueError("--end is before --start")
+
+    path = checkpoint_path(start_date, end_date)
+    completed = set() if args.restart else load_checkpoint(path)
+    chunks = pending_chunks(start_date, end_date, completed, max(1, args.chunk_days))
+    logger.info(
+        f"Backfilling {start_date} to {end_date}: {len(completed)} days already done, "
+        f"{len(chunks)} chunks over {args.workers} workers"
+    )
+
+    engine = get_db_connection()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker) as pool:
+        futures = {
+            pool.submit(process_chunk, chunk_start, chunk_end, args.skip_s3, None if args.skip_lake else args.lake): (chunk_start, chunk_end)
+            for chunk_start, chunk_end in chunks
+        }
+        for future in as_completed(futures):
+            chunk_start, chunk_end = futures[future]
+            stats_list = future.result()
+            # Checkpoint only after the chunk's statistics are committed
+            upsert_statistics(engine, stats_list)
+            logger.info(f"Upserted statistics for {len(stats_list)} days")
+            completed.update(stats["date"] for stats in stats_list)
+            save_checkpoint(path, completed)
+            logger.info(f"Completed {chunk_start} to {chunk_end} ({len(completed)} days done)")
+
+    # A finished backfill starts from scratch when run again
+    if os.path.exists(path):
+        os.remove(path)
+    logger.info(f"Backfill completed for {start_date} to {end_date}")
+
 def main():
     """Main execution function."""
     args = parse_args()
     
+    if args.start:
+        try:
+            run_backfill(args)
+            return 0
+        except Exception as e:
+            logger.error(f"Backfill failed: {e}")
+            return 1
+    
     # Determine the date to process
     if args.date:
         process_date = args.date
@@ -186,12 +390,21 @@ def main():
         # Connect to database
         engine = get_db_connection()
         
-        # Fetch defects for the specified date
-        df = fetch_daily_defects(engine, process_date)
-        df.name = process_date  # Set name attribute for reference in other functions
-        
-        # Generate statistics
-        stats = generate_daily_statistics(df)
+        # Fetch defects for the specified date chunk by chunk and generate
+        # statistics, copying the raw defects to the data lake on the way
+        if args.skip_lake:
+            chunks = fetch_daily_defects(engine, process_date, chunksize=args.chunksize)
+        else:
+            import data_lake  # loads pyarrow, so only imported when the lake is written
+            chunks = data_lake.write_defect_chunks(
+                args.lake,
+                process_date,
+                fetch_daily_defects(engine, process_date, columns=DEFECT_COLUMNS, chunksize=args.chunksize)
+            )
+        stats = generate_daily_statistics(chunks, process_date)
+        if not args.skip_lake:
+            data_lake.write_statistics(args.lake, stats)
+            logger.info(f"Wrote {process_date} to the data lake at {args.lake}")
         
         # Save to S3
         s3_key = f"statistics/daily/{process_date}.json"
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Road Metrics AI - Parquet Data Lake
+
+Columnar copy of the batch job's output for offline analytics. Two datasets
+live under the lake root (an s3:// URI or a local directory), both
+hive-partitioned by day and defect type:
+
+    <lake>/defects/date=YYYY-MM-DD/defect_type=POTHOLE/part-<n>-0.parquet
+    <lake>/daily_statistics/date=YYYY-MM-DD/defect_type=POTHOLE/part-0-0.parquet
+
+`defects` holds the raw defects of each processed day; `daily_statistics`
+holds (severity, defect_count) per day and type. Writing a day replaces its
+date= partition, so reprocessing a day is idempotent.
+
+read_range() queries a date range: partitions outside the range (or the
+requested defect types) are never opened, only the requested columns are
+read, and other filters are pushed down to Parquet row-group statistics.
+
+Usage:
+    python data_lake.py --lake s3://road-metrics-data/lake --start 2023-11-01 --end 2023-11-30
+                        [--dataset defects] [--columns severity,latitude,longitude]
+                        [--defect-type POTHOLE] [--output november.parquet]
+
+Dependencies:
+    - pyarrow
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+DEFECTS = "defects"
+DAILY_STATISTICS = "daily_statistics"
+DATASETS = (DEFECTS, DAILY_STATISTICS)
+
+PARTITIONING = ds.partitioning(
+    pa.schema([("date", pa.date32()), ("defect_type", pa.string())]),
+    flavor="hive"
+)
+
+def resolve(lake):
+    """Filesystem and root path of a lake URI (s3://bucket/prefix) or local directory."""
+    if "://" in lake:
+        return fs.FileSystem.from_uri(lake)
+    return fs.LocalFileSystem(), os.path.abspath(lake)
+
+def _clear_day(filesystem, root, dataset, date):
+    filesystem.delete_dir_contents(f"{root}/{dataset}/date={date}", missing_dir_ok=True)
+
+def _uniform_type(data_type):
+    """
+    Column type that is the same in every file of a dataset.
+
+    Dictionary columns (pandas categoricals) get an index as narrow as their
+    category count allows, int8 in one chunk and int16 in the next, which the
+    dataset cannot read back together; they are stored as plain values, which
+    Parquet dictionary-encodes anyway. Strings are always pa.string(), whether
+    pandas produced string or large_string, and all-null columns are taken to
+    be strings.
+    """
+    if pa.types.is_dictionary(data_type):
+        return _uniform_type(data_type.value_type)
+    if pa.types.is_large_string(data_type) or pa.types.is_null(data_type):
+        return pa.string()
+    return data_type
+
+def _write_table(filesystem, root, dataset, date, index, table):
+    # The partition columns become directories: date is added, and
+    # defect_type is stored as plain strings whatever its pandas dtype
+    day = datetime.strptime(date, "%Y-%m-%d").date()
+    schema = pa.schema([field.with_type(_uniform_type(field.type)) for field in table.schema])
+    table = table.cast(schema)
+    type_index = table.schema.get_field_index("defect_type")
+    table = table.set_column(type_index, "defect_type", pc.cast(table["defect_type"], pa.string()))
+    table = table.append_column("date", pa.array([day] * table.num_rows, pa.date32()))
+    ds.write_dataset(
+        table,
+        f"{root}/{dataset}",
+        format="parquet",
+        partitioning=PARTITIONING,
+        filesystem=filesystem,
+        basename_template=f"part-{index}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore"
+    )
+
+def write_day(lake, dataset, date, tables):
+    """
+    Replace the date= partition of dataset with the given Arrow tables.
+
+    Tables need a defect_type column; the date column is added. Returns the
+    number of rows written.
+    """
+    filesystem, root = resolve(lake)
+    _clear_day(filesystem, root, dataset, date)
+    rows = 0
+    for index, table in enumerate(tables):
+        if table.num_rows:
+            _write_table(filesystem, root, dataset, date, index, table)
+            rows += table.num_rows
+    return rows
+
+def write_defect_chunks(lake, date, chunks):
+    """
+    Write DataFrame chunks of a day's defects to the defects dataset, yielding each on.
+
+    Lets the daily statistics and the lake copy come from a single read of
+    the day. The day's partition is replaced once the first chunk is requested.
+    """
+    filesystem, root = resolve(lake)
+    _clear_day(filesystem, root, DEFECTS, date)
+    for index, df in enumerate(chunks):
+        if len(df):
+            _write_table(filesystem, root, DEFECTS, date, index, pa.Table.from_pandas(df, preserve_index=False))
+        yield df
+
+def write_statistics(lake, stats):
+    """Write one day's statistics (with by_type_severity counts) to the daily_statistics dataset."""
+    rows = [
+        (defect_type, severity, count)
+        for defect_type, by_severity in stats["by_type_severity"].items()
+        for severity, count in by_severity.items()
+    ]
+    table = pa.table({
+        "defect_type": pa.array([row[0] for row in rows], pa.string()),
+        "severity": pa.array([row[1] for row in rows], pa.string()),
+        "defect_count": pa.array([row[2] for row in rows], pa.int64()),
+    })
+    return write_day(lake, DAILY_STATISTICS, stats["date"], [table])
+
+def read_range(lake, dataset, start, end, columns=None, defect_types=None, filter=None):
+    """
+    Read dataset rows from start to end (inclusive YYYY-MM-DD dates) as an Arrow table.
+
+    Only partitions in the date range and of the given defect_types are
+    opened, and only `columns` are read. `filter` is an optional extra
+    pyarrow.dataset expression, e.g. ds.field("severity") == "CRITICAL",
+    checked against Parquet row-group statistics before rows are decoded.
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f"dataset must be one of {DATASETS}, got {dataset!r}")
+    filesystem, root = resolve(lake)
+    try:
+        lake_dataset = ds.dataset(f"{root}/{dataset}", filesystem=filesystem, format="parquet", partitioning=PARTITIONING)
+    except FileNotFoundError:
+        return pa.table({})
+
+    expression = (
+        (ds.field("date") >= datetime.strptime(start, "%Y-%m-%d").date())
+        & (ds.field("date") <= datetime.strptime(end, "%Y-%m-%d").date())
+    )
+    if defect_types:
+        expression &= ds.field("defect_type").isin(list(defect_types))
+    if filter is not None:
+        expression &= filter
+    return lake_dataset.to_table(columns=columns, filter=expression)
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Query the Road Metrics AI Parquet data lake")
+    parser.add_argument("--lake", default=os.environ.get("DATA_LAKE_URI"), required="DATA_LAKE_URI" not in os.environ,
+                        help="Lake root: s3://bucket/prefix or a local directory (default: DATA_LAKE_URI)")
+    parser.add_argument("--dataset", choices=DATASETS, default=DEFECTS)
+    parser.add_argument("--start", required=True, help="First date (YYYY-MM-DD)")
+    parser.add_argument("--end", required=True, help="Last date, inclusive (YYYY-MM-DD)")
+    parser.add_argument("--columns", help="Comma-separated columns to read (default: all)")
+    parser.add_argument("--defect-type", action="append", help="Only these defect types (repeatable)")
+    parser.add_argument("--output", help="Write the result to a .parquet or .csv file instead of printing it")
+    return parser.parse_args()
+
+def main():
+    """Read a date range and print or save it."""
+    args = parse_args()
+    table = read_range(
+        args.lake, args.dataset, args.start, args.end,
+        columns=args.columns.split(",") if args.columns else None,
+        defect_types=args.defect_type
+    )
+    if args.output:
+        if args.output.endswith(".csv"):
+            import pyarrow.csv as pa_csv
+            pa_csv.write_csv(table, args.output)
+        else:
+            import pyarrow.parquet as pq
+            pq.write_table(table, args.output)
+        print(f"Wrote {table.num_rows} rows to {args.output}")
+    else:
+        print(table.to_pandas())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
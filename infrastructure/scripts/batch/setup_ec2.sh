@@ -17,7 +17,7 @@ sudo yum install -y python3 python3-pip git awscli jq
 
 # Install required Python packages
 echo "Installing Python packages..."
-sudo pip3 install boto3 pandas sqlalchemy psycopg2-binary requests schedule
+sudo pip3 install boto3 pandas pyarrow sqlalchemy psycopg2-binary requests schedule
 
 # Create directories
 echo "Creating application directories..."
@@ -30,7 +30,7 @@ sudo chown -R ec2-user:ec2-user /opt/road-metrics
 
 # Copy batch scripts
 echo "Setting up batch processing scripts..."
-cp data_aggregation.py /opt/road-metrics/batch/
+cp data_aggregation.py data_lake.py batch_queries.py /opt/road-metrics/batch/
 chmod +x /opt/road-metrics/batch/data_aggregation.py
 
 # Create environment file for database connection
@@ -46,6 +46,7 @@ DB_PASSWORD=your_secure_password
 # AWS configuration
 S3_BUCKET=road-metrics-data
 AWS_REGION=us-east-1
+DATA_LAKE_URI=s3://road-metrics-data/lake
 EOF
 
 # Set up cron job for daily processing